@@ -8,14 +8,23 @@
 - 对短实体做严格检查：若长度为1，仅允许方向词（北/南/东/西/中/上/下等）
 - 仅保留关系谓词中包含常见动词关键词的三元组（推进/实现/发展/建设/采用/覆盖/建立/设置/改善/增加/实现/推进/促进/推动/实施/完成）
 - 去重
+- 相邻块重叠（分块时带 overlap_chars）时，头尾实体都落在重叠区且上一块已抽出的三元组视为重复
 
 输出：`triplets_cleaned.json`，并打印清洗前/后统计与删除原因汇总。
+句法字段（syntax）原样透传，可通过 `--syntax-format full|compact` 在 full / 紧凑列式格式间转换。
+
+用法示例:
+    python clean_triplets.py --input triplets_final.json --output triplets_cleaned.json --syntax-format compact
+    python clean_triplets.py --input triplets_final.jsonl --output triplets_cleaned.jsonl   # JSON Lines 逐条读写
 """
-import json
+import argparse
 import re
 from collections import Counter
 from pathlib import Path
 
+from jsonl_io import iter_records, open_writer
+from syntax_format import convert_syntax
+
 
 PLACEHOLDER_KEYWORDS = {'演示', '示例', '三元组', 'demo'}
 REL_KEYWORDS = ['推进', '促进', '推动', '实现', '完成', '发展', '建设', '规划', '计划', '采用', '覆盖', '建立', '设置', '改善', '增加', '实施']
@@ -87,77 +96,93 @@ def rel_has_keyword(rel: str) -> bool:
     return False
 
 
-def clean_triplets(input_path='triplets_final.json', output_path='triplets_cleaned.json'):
+def clean_triplets(input_path='triplets_final.json', output_path='triplets_cleaned.json', syntax_format=None):
     p = Path(input_path)
     if not p.exists():
         raise FileNotFoundError(f'{input_path} not found')
 
-    data = json.loads(p.read_text(encoding='utf-8'))
     total_before = 0
     total_after = 0
     removed_reasons = Counter()
-    cleaned = []
-
-    for item in data:
-        triplets = item.get('triplets') or []
-        kept = []
-        if isinstance(triplets, dict) and 'error' in triplets:
-            removed_reasons['llm_parse_error'] += 1
-            triplets = []
-
-        for tri in triplets:
-            total_before += 1
-            try:
-                if not (isinstance(tri, list) and len(tri) >= 3):
-                    removed_reasons['bad_format'] += 1
-                    continue
-                h = str(tri[0]).strip()
-                r = str(tri[1]).strip()
-                t = str(tri[2]).strip()
-
-                # placeholder filter
-                if is_placeholder_token(h) or is_placeholder_token(r) or is_placeholder_token(t):
-                    removed_reasons['placeholder'] += 1
-                    continue
-
-                # head == tail
-                if h == t:
-                    removed_reasons['head_eq_tail'] += 1
-                    continue
-
-                # valid entity checks
-                if not (is_valid_entity(h) and is_valid_entity(t)):
-                    removed_reasons['invalid_entity'] += 1
+    prev_keys = set()
+
+    with open_writer(output_path) as w:
+        for item in iter_records(input_path):
+            triplets = item.get('triplets') or []
+            kept = []
+            if isinstance(triplets, dict) and 'error' in triplets:
+                removed_reasons['llm_parse_error'] += 1
+                triplets = []
+
+            for tri in triplets:
+                total_before += 1
+                try:
+                    if not (isinstance(tri, list) and len(tri) >= 3):
+                        removed_reasons['bad_format'] += 1
+                        continue
+                    h = str(tri[0]).strip()
+                    r = str(tri[1]).strip()
+                    t = str(tri[2]).strip()
+
+                    # placeholder filter
+                    if is_placeholder_token(h) or is_placeholder_token(r) or is_placeholder_token(t):
+                        removed_reasons['placeholder'] += 1
+                        continue
+
+                    # head == tail
+                    if h == t:
+                        removed_reasons['head_eq_tail'] += 1
+                        continue
+
+                    # valid entity checks
+                    if not (is_valid_entity(h) and is_valid_entity(t)):
+                        removed_reasons['invalid_entity'] += 1
+                        continue
+
+                    # relation keyword filter (strict)
+                    if not rel_has_keyword(r):
+                        removed_reasons['rel_no_keyword'] += 1
+                        continue
+
+                    # normalize relation
+                    r_norm = normalize_rel(r)
+
+                    kept.append([h, r_norm, t])
+                except Exception:
+                    removed_reasons['exception'] += 1
                     continue
 
-                # relation keyword filter (strict)
-                if not rel_has_keyword(r):
-                    removed_reasons['rel_no_keyword'] += 1
+            # deduplicate
+            unique = []
+            seen = set()
+            for tri in kept:
+                key = (tri[0], tri[1], tri[2])
+                if key in seen:
+                    removed_reasons['dup'] += 1
                     continue
-
-                # normalize relation
-                r_norm = normalize_rel(r)
-
-                kept.append([h, r_norm, t])
-            except Exception:
-                removed_reasons['exception'] += 1
-                continue
-
-        # deduplicate
-        unique = []
-        seen = set()
-        for tri in kept:
-            key = (tri[0], tri[1], tri[2])
-            if key in seen:
-                removed_reasons['dup'] += 1
-                continue
-            seen.add(key)
-            unique.append(tri)
-
-        total_after += len(unique)
-        cleaned.append({'id': item.get('id'), 'text': item.get('text'), 'syntax': item.get('syntax'), 'entities': item.get('entities'), 'triplets': unique})
-
-    Path(output_path).write_text(json.dumps(cleaned, ensure_ascii=False, indent=2), encoding='utf-8')
+                seen.add(key)
+                unique.append(tri)
+
+            # overlap dedup: 重叠区内的关系已由上一块抽出
+            keys = seen
+            overlap = item.get('overlap_chars') or 0
+            if overlap and prev_keys:
+                region = (item.get('text') or '')[:overlap]
+                kept_unique = []
+                for tri in unique:
+                    if tuple(tri) in prev_keys and tri[0] in region and tri[2] in region:
+                        removed_reasons['overlap_dup'] += 1
+                        continue
+                    kept_unique.append(tri)
+                unique = kept_unique
+            prev_keys = keys
+
+            total_after += len(unique)
+            syntax = convert_syntax(item.get('syntax'), syntax_format)
+            record = {'id': item.get('id'), 'text': item.get('text'), 'syntax': syntax, 'entities': item.get('entities'), 'triplets': unique}
+            if 'overlap_chars' in item:
+                record['overlap_chars'] = item['overlap_chars']
+            w.write(record)
 
     print('清洗完成')
     print('总三元组 (清洗前):', total_before)
@@ -173,5 +198,15 @@ def clean_triplets(input_path='triplets_final.json', output_path='triplets_clean
     }
 
 
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', '-i', default='triplets_final.json')
+    p.add_argument('--output', '-o', default='triplets_cleaned.json')
+    p.add_argument('--syntax-format', choices=['full', 'compact'], default=None,
+                   help='转换句法字段格式；默认保持输入格式不变')
+    args = p.parse_args()
+    clean_triplets(args.input, args.output, syntax_format=args.syntax_format)
+
+
 if __name__ == '__main__':
-    clean_triplets()
+    main()
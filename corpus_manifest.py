@@ -0,0 +1,119 @@
+"""语料增量处理清单（manifest）
+
+记录输入目录中每个文件的大小、修改时间、内容哈希及其产出的 chunk id：
+  - 大小与 mtime 均未变化的文件直接视为未变化，不重新读取；否则计算 sha256，内容相同仍视为未变化
+  - 未变化文件沿用原 chunk id，下游按 id/文本命中的缓存（句法缓存、LLM 缓存）继续有效
+  - 新增或内容变化的文件从 `next_id` 起分配新 id，旧 id 不再复用
+  - 已删除的文件写入 tombstones（保留其 chunk id 与删除时间），便于下游清理
+切块参数（max_tokens、PDF 后端、是否剔除页眉页脚）变化时清单作废，全部文件重新处理。
+
+清单格式:
+    {
+      "version": 1,
+      "settings": {"max_tokens": 512, ...},
+      "next_id": 120,
+      "patterns": [...],            # 剔除页眉页脚时使用的归一化行，增量运行时复用
+      "files": {"text1.txt": {"size": 128325, "mtime": 1700000000.0, "sha256": "...", "chunk_ids": [1, 2]}},
+      "tombstones": {"old.txt": {"sha256": "...", "chunk_ids": [3], "deleted_at": 1700000500.0}}
+    }
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CorpusManifest:
+    """加载/比较/更新增量处理清单。文件以 basename 为键，与输出中的 'file' 字段一致。"""
+
+    def __init__(self, path: str, settings: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.settings = settings or {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.tombstones: Dict[str, Dict[str, Any]] = {}
+        self.patterns: Optional[List[str]] = None
+        self.next_id = 1
+        self.reset_reason = None
+        self._hashes: Dict[str, str] = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # id 始终单调递增，即使清单作废也不回退，避免新旧 chunk 撞 id
+        self.next_id = int(data.get('next_id', 1))
+        if data.get('version') != MANIFEST_VERSION:
+            self.reset_reason = '清单版本不一致'
+            return
+        if data.get('settings') != self.settings:
+            self.reset_reason = '切块参数已变化'
+            return
+        self.files = data.get('files') or {}
+        self.tombstones = data.get('tombstones') or {}
+        self.patterns = data.get('patterns')
+
+    def diff(self, paths: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """把当前文件分为 (未变化, 新增或变化) 两组，并返回已删除的文件名列表。"""
+        unchanged, todo = [], []
+        for fp in paths:
+            name = os.path.basename(fp)
+            entry = self.files.get(name)
+            st = os.stat(fp)
+            if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+                unchanged.append(fp)
+                continue
+            sha = file_sha256(fp)
+            self._hashes[name] = sha
+            if entry and entry['sha256'] == sha:
+                # 只是 touch 过，内容未变
+                entry['mtime'] = st.st_mtime
+                unchanged.append(fp)
+            else:
+                todo.append(fp)
+        present = {os.path.basename(fp) for fp in paths}
+        deleted = [name for name in self.files if name not in present]
+        return unchanged, todo, deleted
+
+    def allocate(self, n: int) -> List[int]:
+        ids = list(range(self.next_id, self.next_id + n))
+        self.next_id += n
+        return ids
+
+    def record(self, fp: str, chunk_ids: List[int]) -> None:
+        name = os.path.basename(fp)
+        st = os.stat(fp)
+        sha = self._hashes.get(name) or file_sha256(fp)
+        self.files[name] = {'size': st.st_size, 'mtime': st.st_mtime, 'sha256': sha, 'chunk_ids': chunk_ids}
+        self.tombstones.pop(name, None)
+
+    def tombstone(self, name: str) -> None:
+        entry = self.files.pop(name, None)
+        if entry is not None:
+            self.tombstones[name] = {'sha256': entry['sha256'], 'chunk_ids': entry['chunk_ids'],
+                                     'deleted_at': time.time()}
+
+    def save(self) -> None:
+        data = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'next_id': self.next_id,
+            'patterns': self.patterns,
+            'files': self.files,
+            'tombstones': self.tombstones,
+        }
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
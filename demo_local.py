@@ -1,11 +1,11 @@
 """本地演示脚本：模拟 NER 和 RE，生成实体和三元组"""
-import json
 import random
 
+from jsonl_io import iter_records, write_records
+
 def demo_ner(input_json):
     """读取分块文本，模拟 NER 输出"""
-    with open(input_json, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    chunks = iter_records(input_json)
     
     # 模拟提取规则（演示用，不基于实际 LLM）
     results = []
@@ -42,8 +42,7 @@ def demo_ner(input_json):
 
 def demo_re(input_json):
     """读取 NER 结果，模拟 RE 生成三元组"""
-    with open(input_json, 'r', encoding='utf-8') as f:
-        ner_data = json.load(f)
+    ner_data = iter_records(input_json)
     
     results = []
     for item in ner_data:
@@ -95,8 +94,7 @@ def demo_pipeline():
     # 第2步：实体抽取
     print("\n【第2步】实体抽取（NER）- 运行中...")
     ner_results = demo_ner('processed_texts.json')
-    with open('entities_extracted.json', 'w', encoding='utf-8') as f:
-        json.dump(ner_results, f, ensure_ascii=False, indent=2)
+    write_records('entities_extracted.json', ner_results)
     print(f"✓ entities_extracted.json 已生成（{len(ner_results)} 条数据）")
     print(f"  示例 - 第1块的实体：")
     if ner_results:
@@ -107,8 +105,7 @@ def demo_pipeline():
     # 第3步：关系抽取
     print("\n【第3步】关系抽取（RE）- 运行中...")
     re_results = demo_re('entities_extracted.json')
-    with open('triplets_final.json', 'w', encoding='utf-8') as f:
-        json.dump(re_results, f, ensure_ascii=False, indent=2)
+    write_records('triplets_final.json', re_results)
     print(f"✓ triplets_final.json 已生成（{len(re_results)} 条数据）")
     print(f"  示例三元组：")
     if re_results:
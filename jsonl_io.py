@@ -0,0 +1,207 @@
+"""阶段产物的 JSON / JSON Lines 读写
+
+各阶段产物（processed_texts、entities_extracted、triplets_final、triplets_cleaned、index）默认是
+`json.dump(indent=2)` 的单个数组；路径扩展名为 .jsonl / .ndjson 时改用 JSON Lines（每行一条记录）。
+  - `iter_records` 是生成器，按扩展名识别格式；JSON 数组同样逐条增量解析，不必整体载入内存
+  - `open_writer` 每写一条记录就 flush，下游可以边写边读；JSON 数组输出与 json.dump(items, indent=2) 完全一致
+  - 进程中断后 JSONL 末尾没写完的半行会被忽略；`resume=True` 时截掉半行并追加写入，
+    配合 `completed_ids` 跳过已完成的记录（JSON 数组格式则保留已完整写出的记录后重写）
+  - 写出过程中抛出异常时 JSON 数组不会补上结尾的 `]`，中断的输出不会被误当作完整结果
+
+用法示例:
+    from jsonl_io import completed_ids, iter_records, open_writer
+    done = completed_ids('entities_extracted.jsonl')
+    with open_writer('entities_extracted.jsonl', resume=True) as w:
+        for item in iter_records('processed_texts.jsonl'):
+            if item['id'] not in done:
+                w.write(run_ner(item))
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+_READ_BLOCK = 1 << 16
+_WS_RE = re.compile(r'\s*')
+
+
+def is_jsonl(path: str) -> bool:
+    return str(path).lower().endswith(JSONL_SUFFIXES)
+
+
+def _iter_jsonl(path: str) -> Iterator[Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # 只有没写完的最后一行（没有换行符）可以忽略
+                if line.endswith('\n'):
+                    raise
+                return
+
+
+def _refill(f, buf, pos):
+    chunk = f.read(_READ_BLOCK)
+    return buf[pos:] + chunk, 0, not chunk
+
+
+def _iter_json_array(path: str, partial: bool = False) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos, eof = '', 0, False
+        state = 'start'
+        while True:
+            pos = _WS_RE.match(buf, pos).end()
+            if pos >= len(buf):
+                if eof:
+                    break
+                buf, pos, eof = _refill(f, buf, pos)
+                continue
+            ch = buf[pos]
+            if state == 'start':
+                if ch != '[':
+                    raise ValueError(f'{path} 不是 JSON 数组')
+                pos += 1
+                state = 'first'
+            elif state != 'item' and ch == ']':
+                return
+            elif state == 'sep':
+                if ch != ',':
+                    raise ValueError(f'{path} 中的 JSON 数组格式错误')
+                pos += 1
+                state = 'item'
+            else:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    obj, end = None, -1
+                # 解析失败或恰好解析到缓冲区末尾（记录可能被截断）时，读入更多内容再试
+                if (end < 0 or end == len(buf)) and not eof:
+                    buf, pos, eof = _refill(f, buf, pos)
+                    continue
+                if end < 0:
+                    break
+                yield obj
+                pos = end
+                state = 'sep'
+    if not partial:
+        raise ValueError(f'{path} 中的 JSON 数组不完整')
+
+
+def iter_records(path: str, partial: bool = False) -> Iterator[Any]:
+    """逐条读取记录。partial=True 时 JSON 数组被截断也不报错，只返回完整的记录。"""
+    if is_jsonl(path):
+        return _iter_jsonl(path)
+    return _iter_json_array(path, partial=partial)
+
+
+def read_records(path: str) -> List[Any]:
+    return list(iter_records(path))
+
+
+def completed_ids(path: str) -> Set[Any]:
+    """已有输出中完整写出的记录 id，用于断点续跑；文件不存在时返回空集合。"""
+    if not os.path.exists(path):
+        return set()
+    return {r.get('id') for r in iter_records(path, partial=True) if isinstance(r, dict)}
+
+
+class JsonArrayWriter:
+    """逐条写出 JSON 数组，输出与 json.dump(items, indent=2) 相同。"""
+
+    def __init__(self, path: str, initial: Iterable[Any] = ()):
+        self.path = path
+        self.count = 0
+        self._initial = list(initial)
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w', encoding='utf-8')
+        self._f.write('[')
+        for item in self._initial:
+            self.write(item)
+        return self
+
+    def write(self, item: Any) -> None:
+        body = json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        self._f.write((',\n  ' if self.count else '\n  ') + body)
+        self._f.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc):
+        # 异常退出时不写结尾的 ']'：截断的数组读取时报不完整，resume=True 时保留已写出的记录后重写
+        if exc_type is None:
+            self._f.write('\n]' if self.count else ']')
+        self._f.close()
+
+
+class JsonlWriter:
+    """逐行写出 JSON Lines，每条记录后 flush。append=True 时在已有文件末尾追加。"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'a' if self.append else 'w', encoding='utf-8')
+        return self
+
+    def write(self, item: Any) -> None:
+        self._f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self._f.flush()
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+def _truncate_partial_line(path: str) -> None:
+    # 去掉中断时没写完的最后一行，保证追加的记录从新行开始
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            start = max(0, pos - _READ_BLOCK)
+            f.seek(start)
+            block = f.read(pos - start)
+            cut = block.rfind(b'\n')
+            if cut >= 0:
+                pos = start + cut + 1
+                break
+            pos = start
+        if pos < size:
+            f.truncate(pos)
+
+
+def open_writer(path: str, resume: bool = False):
+    """按扩展名返回 JsonlWriter 或 JsonArrayWriter；resume=True 时保留已有的完整记录。"""
+    exists = resume and os.path.exists(path)
+    if is_jsonl(path):
+        if exists:
+            _truncate_partial_line(path)
+        return JsonlWriter(path, append=exists)
+    initial = list(iter_records(path, partial=True)) if exists else ()
+    return JsonArrayWriter(path, initial=initial)
+
+
+def write_records(path: str, records: Iterable[Any]) -> int:
+    with open_writer(path) as w:
+        for r in records:
+            w.write(r)
+    return w.count
+
+
+def write_mapping(path: str, mapping: Dict[str, Any], key: str = 'key', value: str = 'value') -> None:
+    """写出 {键: 值} 形式的产物（如倒排索引）：JSON 保持原来的对象格式，JSONL 每个键一行。"""
+    if is_jsonl(path):
+        write_records(path, ({key: k, value: v} for k, v in mapping.items()))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=2)
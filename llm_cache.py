@@ -0,0 +1,249 @@
+"""LLM 响应的持久化缓存（SQLite）
+
+只修改清洗规则或 Neo4j 导入时，原先必须重新运行 `ner_llm` / `relation_extraction`，每个相同的 prompt
+都要再付一次费用。本模块按请求内容寻址缓存响应文本：
+  - 键 = sha256(模型 + temperature + max_tokens + response_format + 规范化后的 messages)，
+    messages 按键排序序列化，文本统一换行与 Unicode 形式，因此语义相同的请求命中同一条目
+  - SQLite 使用 WAL 模式，多个线程 / 进程可以共享同一个缓存文件
+  - 条目超过 ttl 秒视为过期；总大小超过 max_bytes 时按最近访问时间淘汰最旧的条目；统计命中率
+  - cache_only=True 为回放模式：未命中时抛出 `CacheMiss`，从不访问网络，
+    便于在不调用 LLM 的情况下确定性地重跑、测试下游阶段的性能
+
+`llm_client.chat` / `achat` 在限速与发送请求之前先查缓存，成功的响应写回缓存。缓存默认关闭，
+通过 `configure` 或命令行 `--cache` / `--cache-only` 启用（也可用环境变量 LLM_CACHE、LLM_CACHE_ONLY、
+LLM_CACHE_TTL、LLM_CACHE_MAX_MB）。
+
+用法示例:
+    import llm_cache
+    llm_cache.configure('llm_cache.sqlite', ttl=30 * 86400)
+    ner_llm.run('processed_texts.jsonl', 'entities_extracted.jsonl')
+    print(llm_cache.get_cache().stats())
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PATH = 'llm_cache.sqlite'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 淘汰时清理到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+_cache = None
+_cache_only = False
+_configured = False
+_lock = threading.Lock()
+
+
+class CacheMiss(LookupError):
+    """回放模式下请求未命中缓存。"""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return unicodedata.normalize('NFC', value.replace('\r\n', '\n'))
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def canonical_messages(messages: List[Dict[str, Any]]) -> str:
+    return json.dumps(_normalize(messages), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def make_key(model: str, messages: List[Dict[str, Any]], temperature: float = 0, max_tokens: int = 1024,
+             response_format: Optional[Dict[str, Any]] = None) -> str:
+    params = json.dumps({'model': model, 'temperature': float(temperature), 'max_tokens': max_tokens,
+                         'response_format': response_format}, sort_keys=True, separators=(',', ':'))
+    h = hashlib.sha256()
+    h.update(params.encode('utf-8'))
+    h.update(b'\0')
+    h.update(canonical_messages(messages).encode('utf-8'))
+    return h.hexdigest()
+
+
+class LLMCache:
+    """以 SQLite 存储的 LLM 响应缓存，可在多个线程间共享；ttl 为 None 时条目不过期。"""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # 多个进程共享文件时写锁可能短暂被占用，等待而不是立即报错
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            ' key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed)')
+        self._conn.commit()
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+        self._total_bytes = int(row[0])
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, size, created FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                self._total_bytes -= row[1]
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE llm_cache SET accessed = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, model: str, value: str) -> None:
+        size = len(value.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, model, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, model, value, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                'SELECT key, size FROM llm_cache ORDER BY accessed ASC LIMIT 1000'
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            doomed = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                doomed.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany('DELETE FROM llm_cache WHERE key = ?', doomed)
+            self.evictions += len(doomed)
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除条数。"""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            row = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache WHERE created < ?', (cutoff,)
+            ).fetchone()
+            self._conn.execute('DELETE FROM llm_cache WHERE created < ?', (cutoff,))
+            self._conn.commit()
+            self._total_bytes -= int(row[1])
+            self.expired += row[0]
+        return row[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': self._total_bytes,
+        }
+
+    def summary(self) -> str:
+        st = self.stats()
+        return (f"LLM 缓存: hits={st['hits']} misses={st['misses']} hit_rate={st['hit_rate']:.1%} "
+                f"entries={st['entries']}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _configure_locked(path, ttl, max_mb, cache_only_):
+    global _cache, _cache_only, _configured
+    if _cache is not None:
+        _cache.close()
+    path = path or (DEFAULT_PATH if cache_only_ else None)
+    max_bytes = int(max_mb * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    _cache = LLMCache(path, max_bytes=max_bytes, ttl=ttl) if path else None
+    _cache_only = cache_only_
+    _configured = True
+
+
+def configure(path: Optional[str] = None, ttl: Optional[float] = None, max_mb: Optional[float] = None,
+              cache_only: bool = False) -> Optional[LLMCache]:
+    """启用（path 非空或 cache_only）或关闭本进程的 LLM 响应缓存，返回缓存对象。"""
+    with _lock:
+        _configure_locked(path, ttl, max_mb, cache_only)
+        return _cache
+
+
+def _ensure_configured() -> None:
+    if _configured:
+        return
+    with _lock:
+        if not _configured:
+            ttl = os.getenv('LLM_CACHE_TTL')
+            max_mb = os.getenv('LLM_CACHE_MAX_MB')
+            _configure_locked(os.getenv('LLM_CACHE') or None, float(ttl) if ttl else None,
+                              float(max_mb) if max_mb else None,
+                              os.getenv('LLM_CACHE_ONLY', '').lower() in ('1', 'true', 'yes'))
+
+
+def get_cache() -> Optional[LLMCache]:
+    """返回本进程的缓存；未调用 `configure` 时按环境变量决定，默认不启用。"""
+    _ensure_configured()
+    return _cache
+
+
+def cache_only() -> bool:
+    _ensure_configured()
+    return _cache_only
+
+
+def reset() -> None:
+    """关闭缓存并恢复为未配置状态（测试中使用）。"""
+    global _cache, _cache_only, _configured
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+        _cache_only = False
+        _configured = False
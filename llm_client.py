@@ -0,0 +1,276 @@
+"""进程内共享的 OpenAI-compatible LLM 客户端
+
+原先 `ner_llm` / `relation_extraction`（含 src 版本）的 `call_llm` 每次调用都新建 `OpenAI(...)`，
+每个请求都要重新建立 TCP/TLS 连接。本模块每个进程只构建一个客户端：
+  - 底层 httpx 连接池复用 keep-alive 连接，连接数、空闲连接保活时间与各阶段超时可通过环境变量调整
+  - SDK 自带重试关闭（max_retries=0），重试统一由 `chat` 完成，避免两层重试叠加
+  - 每次请求先经过进程内共享的限速器（见 rate_limiter）：按 RPM/TPM 预占额度、按响应 usage 与
+    x-ratelimit-* 响应头修正，只对 429/5xx/连接错误按 Retry-After 或抖动退避重试
+  - 启用响应缓存（见 llm_cache）时先查缓存，命中则不限速也不发送请求；回放模式下未命中抛出 CacheMiss，
+    此时也不需要 API Key
+  - 进程池 fork 出的子进程检测到 pid 变化后重新构建客户端，不与父进程共用连接
+  - 异步并发调用使用 `async_client` + `achat`：AsyncOpenAI 的连接池绑定事件循环，由调用方在一次运行内
+    `async with` 创建并共享，重试规则与 `chat` 相同
+
+环境变量:
+    GRAPHRAG_CHAT_API_KEY / OPENAI_API_KEY   API Key
+    GRAPHRAG_API_BASE                       OpenAI-compatible 服务地址（可选）
+    GRAPHRAG_CHAT_MODEL / OPENAI_MODEL      默认模型
+    LLM_MAX_CONNECTIONS (32) / LLM_MAX_KEEPALIVE (16) / LLM_KEEPALIVE_EXPIRY (60 秒)
+    LLM_CONNECT_TIMEOUT (10 秒) / LLM_READ_TIMEOUT (120 秒)
+    LLM_RPM / LLM_TPM / LLM_MAX_BACKOFF     限速器配置（见 rate_limiter）
+
+用法示例:
+    from llm_client import chat
+    content = chat(messages, temperature=0, max_tokens=1024)
+
+    async with async_client(max_connections=16) as client:
+        content = await achat(client, messages, temperature=0, max_tokens=1024)
+"""
+import asyncio
+import contextlib
+import inspect
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+try:
+    from openai import AsyncOpenAI, OpenAI
+except Exception:
+    AsyncOpenAI = OpenAI = None
+
+from llm_cache import CacheMiss, cache_only, get_cache, make_key
+from rate_limiter import estimate_request_tokens, get_limiter
+
+DEFAULT_MODEL = 'gpt-4o-mini'
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name) or default)
+
+
+def api_settings():
+    """返回 (api_key, base_url)；未配置 API Key 时报错。"""
+    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise RuntimeError('请设置环境变量 GRAPHRAG_CHAT_API_KEY 或 OPENAI_API_KEY')
+    return api_key, os.getenv('GRAPHRAG_API_BASE') or None
+
+
+def default_model(fallback: str = DEFAULT_MODEL) -> str:
+    return os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL') or fallback
+
+
+def _limits(max_connections: Optional[int] = None):
+    max_connections = max_connections or int(_env_float('LLM_MAX_CONNECTIONS', 32))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_connections, int(_env_float('LLM_MAX_KEEPALIVE', 16))),
+        keepalive_expiry=_env_float('LLM_KEEPALIVE_EXPIRY', 60.0),
+    )
+
+
+def _timeout():
+    return httpx.Timeout(
+        _env_float('LLM_READ_TIMEOUT', 120.0),
+        connect=_env_float('LLM_CONNECT_TIMEOUT', 10.0),
+    )
+
+
+def build_http_client():
+    """按环境变量配置连接池与超时的 httpx.Client；httpx 不可用时返回 None（使用 SDK 默认值）。"""
+    if httpx is None:
+        return None
+    return httpx.Client(limits=_limits(), timeout=_timeout())
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    api_key, base_url = api_settings()
+    kwargs = {'api_key': api_key, 'max_retries': 0}
+    if base_url:
+        kwargs['base_url'] = base_url
+    return kwargs
+
+
+def get_client():
+    """返回本进程共享的 OpenAI 客户端，首次调用时构建。"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            if OpenAI is None:
+                raise RuntimeError('openai package not installed')
+            kwargs = _client_kwargs()
+            http_client = build_http_client()
+            if http_client is not None:
+                kwargs['http_client'] = http_client
+            _client = OpenAI(**kwargs)
+            _client_pid = pid
+    return _client
+
+
+def ensure_ready() -> None:
+    """提前暴露配置错误（未安装 openai、未设置 API Key）；缓存回放模式不需要客户端。"""
+    if not cache_only():
+        get_client()
+
+
+def reset_client() -> None:
+    """关闭并丢弃共享客户端（环境变量变化后或测试中使用）。"""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            try:
+                _client.close()
+            except Exception:
+                pass
+        _client = None
+        _client_pid = None
+
+
+@contextlib.asynccontextmanager
+async def _no_client():
+    # contextlib.nullcontext 从 Python 3.10 起才支持 async with
+    yield None
+
+
+def async_client(max_connections: Optional[int] = None):
+    """新建 AsyncOpenAI 客户端，调用方用 `async with` 管理其生命周期；max_connections 默认取 LLM_MAX_CONNECTIONS。"""
+    if cache_only():
+        # 回放模式只读缓存，不建立连接
+        return _no_client()
+    if AsyncOpenAI is None:
+        raise RuntimeError('openai package not installed')
+    kwargs = _client_kwargs()
+    if httpx is not None:
+        kwargs['http_client'] = httpx.AsyncClient(limits=_limits(max_connections), timeout=_timeout())
+    return AsyncOpenAI(**kwargs)
+
+
+def _request(messages, model, temperature, max_tokens, response_format) -> Dict[str, Any]:
+    kwargs = {
+        'model': model or default_model(),
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+    }
+    if response_format is not None:
+        kwargs['response_format'] = response_format
+    return kwargs
+
+
+def _cache_lookup(kwargs):
+    """返回 (缓存, 键, 命中的内容)；回放模式下未命中抛出 CacheMiss。"""
+    cache = get_cache()
+    if cache is None:
+        return None, None, None
+    key = make_key(kwargs['model'], kwargs['messages'], kwargs['temperature'], kwargs['max_tokens'],
+                   kwargs.get('response_format'))
+    content = cache.get(key)
+    if content is None and cache_only():
+        raise CacheMiss(f'缓存回放模式下未命中: model={kwargs["model"]} key={key[:12]}')
+    return cache, key, content
+
+
+def _usage_tokens(response) -> Optional[int]:
+    return getattr(getattr(response, 'usage', None), 'total_tokens', None)
+
+
+def _create(client, kwargs):
+    # 通过 with_raw_response 同时取得响应头（限额信息）与解析后的结果
+    raw_api = getattr(client.chat.completions, 'with_raw_response', None)
+    if raw_api is None:
+        return client.chat.completions.create(**kwargs), None
+    raw = raw_api.create(**kwargs)
+    return raw.parse(), raw.headers
+
+
+async def _acreate(client, kwargs):
+    raw_api = getattr(client.chat.completions, 'with_raw_response', None)
+    if raw_api is None:
+        return await client.chat.completions.create(**kwargs), None
+    raw = await raw_api.create(**kwargs)
+    response = raw.parse()
+    if inspect.isawaitable(response):
+        response = await response
+    return response, raw.headers
+
+
+def chat(messages: List[Dict[str, Any]], model: Optional[str] = None, temperature: float = 0,
+         max_tokens: int = 1024, response_format: Optional[Dict[str, Any]] = None,
+         max_retries: int = 5, wait_base: float = 1.0) -> str:
+    """发送一次 chat completion 请求并返回文本内容；可重试的错误按限速器给出的间隔重试，最终失败抛出最后一次的异常。"""
+    kwargs = _request(messages, model, temperature, max_tokens, response_format)
+    cache, key, content = _cache_lookup(kwargs)
+    if content is not None:
+        return content
+    client = get_client()
+    limiter = get_limiter()
+    estimate = estimate_request_tokens(messages, max_tokens)
+    attempt = 0
+    while True:
+        delay = limiter.acquire(estimate)
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            response, headers = _create(client, kwargs)
+        except Exception as e:
+            # 失败的请求不计 token 用量
+            limiter.settle(estimate, 0)
+            attempt += 1
+            delay = limiter.retry_delay(e, attempt, wait_base)
+            if delay is None or attempt >= max_retries:
+                raise
+            time.sleep(delay)
+            continue
+        limiter.observe(headers)
+        limiter.settle(estimate, _usage_tokens(response))
+        content = response.choices[0].message.content
+        if cache is not None and content is not None:
+            cache.put(key, kwargs['model'], content)
+        return content
+
+
+async def achat(client, messages: List[Dict[str, Any]], model: Optional[str] = None, temperature: float = 0,
+                max_tokens: int = 1024, response_format: Optional[Dict[str, Any]] = None,
+                max_retries: int = 5, wait_base: float = 1.0) -> str:
+    """`chat` 的异步版本，使用 `async_client` 创建的客户端；限速与退避等待期间不阻塞事件循环。"""
+    kwargs = _request(messages, model, temperature, max_tokens, response_format)
+    cache, key, content = _cache_lookup(kwargs)
+    if content is not None:
+        return content
+    limiter = get_limiter()
+    estimate = estimate_request_tokens(messages, max_tokens)
+    attempt = 0
+    while True:
+        delay = limiter.acquire(estimate)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            response, headers = await _acreate(client, kwargs)
+        except Exception as e:
+            limiter.settle(estimate, 0)
+            attempt += 1
+            delay = limiter.retry_delay(e, attempt, wait_base)
+            if delay is None or attempt >= max_retries:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        limiter.observe(headers)
+        limiter.settle(estimate, _usage_tokens(response))
+        content = response.choices[0].message.content
+        if cache is not None and content is not None:
+            cache.put(key, kwargs['model'], content)
+        return content
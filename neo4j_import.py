@@ -2,14 +2,16 @@
 
 用法示例:
     python neo4j_import.py --input triplets_final.json --uri bolt://localhost:7687 --user neo4j --password your_password
+    python neo4j_import.py --input triplets_cleaned.jsonl --password your_password   # 也支持 JSON Lines
 """
 import argparse
-import json
 import re
 from tqdm import tqdm
 
 from neo4j import GraphDatabase
 
+from jsonl_io import iter_records
+
 
 def sanitize_rel(rel):
     s = re.sub(r"\W+", "_", str(rel)).strip('_')
@@ -22,11 +24,9 @@ def sanitize_rel(rel):
 
 def import_triplets(uri, user, password, input_json):
     driver = GraphDatabase.driver(uri, auth=(user, password))
-    with open(input_json, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
+    # 流式读取两遍：先统计总数用于进度条，再逐条导入
     total = 0
-    for item in data:
+    for item in iter_records(input_json):
         t = item.get('triplets', [])
         if isinstance(t, list):
             total += len(t)
@@ -39,7 +39,7 @@ def import_triplets(uri, user, password, input_json):
         return driver.session()
 
     with _session() as session:
-        for item in data:
+        for item in iter_records(input_json):
             triplets = item.get('triplets', [])
             if not isinstance(triplets, list):
                 continue
@@ -72,11 +72,8 @@ def main():
     if args.database:
         def import_with_db(uri, user, password, input_json, database):
             driver = GraphDatabase.driver(uri, auth=(user, password))
-            with open(input_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
             total = 0
-            for item in data:
+            for item in iter_records(input_json):
                 t = item.get('triplets', [])
                 if isinstance(t, list):
                     total += len(t)
@@ -84,7 +81,7 @@ def main():
             pbar = tqdm(total=total, desc='Importing to Neo4j')
             with driver.session(database=database) as session:
                 def import_batch(tx):
-                    for item in data:
+                    for item in iter_records(input_json):
                         triplets = item.get('triplets', [])
                         if not isinstance(triplets, list):
                             continue
@@ -2,20 +2,21 @@
 
 用法举例:
     python ner_llm.py --input processed_texts.json --output entities_extracted.json
+    python ner_llm.py --input processed_texts.jsonl --output entities_extracted.jsonl --resume   # 跳过已完成的块
+    python ner_llm.py --input processed_texts.jsonl --output entities_extracted.jsonl --concurrency 16   # 异步并发
 
 依赖: openai>=1.0.0, tqdm
 """
-import os
+import asyncio
 import json
-import time
 import argparse
 import re
 from tqdm import tqdm
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+from jsonl_io import completed_ids, iter_records, open_writer
+from llm_cache import configure as configure_cache, get_cache
+from llm_client import achat, async_client, chat
+from ordered_pool import async_ordered_map
 
 
 SYSTEM_PROMPT = (
@@ -44,34 +45,15 @@ FEW_SHOT_EXAMPLE_OUTPUT = {
 
 
 def call_llm(prompt_messages, model=None, max_retries=5, wait_base=1.0):
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
-    
-    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise RuntimeError('请设置环境变量 GRAPHRAG_CHAT_API_KEY 或 OPENAI_API_KEY')
-    
-    api_base = os.getenv('GRAPHRAG_API_BASE')
-    model = model or os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-    
-    client = OpenAI(api_key=api_key, base_url=api_base) if api_base else OpenAI(api_key=api_key)
-    
-    attempt = 0
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=prompt_messages,
-                temperature=0,
-                max_tokens=1024,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            attempt += 1
-            if attempt >= max_retries:
-                raise
-            sleep = wait_base * (2 ** (attempt - 1))
-            time.sleep(sleep)
+    # 复用进程内共享的客户端与连接池（见 llm_client）
+    return chat(prompt_messages, model=model, temperature=0, max_tokens=1024,
+                max_retries=max_retries, wait_base=wait_base)
+
+
+async def call_llm_async(client, prompt_messages, model=None, max_retries=5, wait_base=1.0):
+    # 与 call_llm 参数相同，保证并发运行与串行运行的输出一致
+    return await achat(client, prompt_messages, model=model, temperature=0, max_tokens=1024,
+                       max_retries=max_retries, wait_base=wait_base)
 
 
 def extract_json_from_text(s):
@@ -113,24 +95,43 @@ def build_messages(text):
     return messages
 
 
-def run(input_json, output_json, model=None):
-    with open(input_json, 'r', encoding='utf-8') as f:
-        items = json.load(f)
-
-    results = []
-    for it in tqdm(items, desc='NER'):
-        text = it.get('text')
-        messages = build_messages(text)
-        resp = call_llm(messages, model=model)
-        try:
-            parsed = extract_json_from_text(resp)
-        except Exception as e:
-            parsed = {"error": str(e), "raw": resp}
-        results.append({"id": it.get('id'), "text": text, "entities": parsed})
-
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    print('Saved', len(results), 'NER results to', output_json)
+def build_record(it, resp):
+    try:
+        parsed = extract_json_from_text(resp)
+    except Exception as e:
+        parsed = {"error": str(e), "raw": resp}
+    return {"id": it.get('id'), "text": it.get('text'), "entities": parsed}
+
+
+def run(input_json, output_json, model=None, resume=False, concurrency=1):
+    # 逐条读取、逐条写出；resume=True 时跳过输出中已有的 id，在原文件上续写
+    if concurrency > 1:
+        return asyncio.run(run_async(input_json, output_json, model=model, resume=resume, concurrency=concurrency))
+    done = completed_ids(output_json) if resume else set()
+    with open_writer(output_json, resume=resume) as w:
+        for it in tqdm(iter_records(input_json), desc='NER'):
+            if it.get('id') in done:
+                continue
+            resp = call_llm(build_messages(it.get('text')), model=model)
+            w.write(build_record(it, resp))
+    print('Saved', w.count, 'NER results to', output_json)
+
+
+async def run_async(input_json, output_json, model=None, resume=False, concurrency=8):
+    # 最多 concurrency 个请求同时在途，结果按输入顺序逐条写出，输出与 run 一致
+    done = completed_ids(output_json) if resume else set()
+    todo = (it for it in iter_records(input_json) if it.get('id') not in done)
+
+    async with async_client(max_connections=concurrency) as client:
+        async def extract(it):
+            resp = await call_llm_async(client, build_messages(it.get('text')), model=model)
+            return build_record(it, resp)
+
+        with open_writer(output_json, resume=resume) as w, tqdm(desc='NER') as bar:
+            async for record in async_ordered_map(extract, todo, concurrency=concurrency):
+                w.write(record)
+                bar.update()
+    print('Saved', w.count, 'NER results to', output_json)
 
 
 def main():
@@ -138,8 +139,19 @@ def main():
     p.add_argument('--input', '-i', default='processed_texts.json')
     p.add_argument('--output', '-o', default='entities_extracted.json')
     p.add_argument('--model', '-m', default=None)
+    p.add_argument('--resume', action='store_true', help='保留输出中已完成的记录，只处理剩余的块')
+    p.add_argument('--concurrency', '-c', type=int, default=1, help='同时在途的 LLM 请求数，大于 1 时使用异步并发')
+    p.add_argument('--cache', default=None, help='LLM 响应缓存路径（SQLite），相同请求直接复用已缓存的响应')
+    p.add_argument('--cache-only', action='store_true', help='只从缓存回放，未命中时报错，不访问网络')
+    p.add_argument('--cache-ttl', type=float, default=None, help='缓存条目有效期（秒），默认不过期')
+    p.add_argument('--cache-max-mb', type=int, default=512, help='缓存大小上限 (MB)，超出后淘汰最久未用条目')
     args = p.parse_args()
-    run(args.input, args.output, model=args.model)
+    if args.cache or args.cache_only:
+        configure_cache(args.cache, ttl=args.cache_ttl, max_mb=args.cache_max_mb, cache_only=args.cache_only)
+    run(args.input, args.output, model=args.model, resume=args.resume, concurrency=args.concurrency)
+    cache = get_cache()
+    if cache is not None:
+        print(cache.summary())
 
 
 if __name__ == '__main__':
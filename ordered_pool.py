@@ -0,0 +1,76 @@
+"""保持输入顺序的有界并发执行
+
+LLM 调用的耗时主要是网络等待，逐条串行调用时吞吐量被限制在 1/延迟。两种执行器都同时保持最多
+concurrency 个请求在途，但结果仍按输入顺序逐条产出：
+  - `async_ordered_map`：协程函数 + asyncio.Semaphore（NER 的 AsyncOpenAI 路径）
+  - `ordered_map`：阻塞函数 + 线程池（RE 的同步 `call_llm`，共享客户端的连接池是线程安全的）；
+    workers=1 时在当前线程内逐条执行，与原来的串行循环完全相同
+
+共同特性：
+  - 调用方可以边收结果边写盘，输出与串行执行完全一致
+  - 输入是惰性迭代器，排队中的任务数不超过 window（默认 4 倍并发数），不会一次性读入整个语料
+  - 每个任务的后处理放在 fn 内，在该请求完成时执行，不会阻塞其它请求的发出
+  - 某个任务抛出异常时，异常在轮到该结果时抛出，其余未完成的任务被取消
+
+用法示例:
+    async for record in async_ordered_map(extract, iter_records(path), concurrency=16):
+        writer.write(record)
+
+    for record in ordered_map(extract_item, iter_records(path), workers=8):
+        writer.write(record)
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+async def async_ordered_map(fn: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int = 8,
+                            window: Optional[int] = None) -> AsyncIterator[R]:
+    """对 items 逐个执行协程函数 fn，最多 concurrency 个并发，按输入顺序产出结果。"""
+    if concurrency < 1:
+        raise ValueError('concurrency 必须 >= 1')
+    sem = asyncio.Semaphore(concurrency)
+    window = max(window or concurrency * 4, concurrency)
+
+    async def guarded(item):
+        async with sem:
+            return await fn(item)
+
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(guarded(item)))
+            # 窗口已满时等待最早的任务；队首已完成的结果立即产出，便于下游逐条写盘
+            while pending and (len(pending) >= window or pending[0].done()):
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], workers: int = 4,
+                window: Optional[int] = None) -> Iterator[R]:
+    """在线程池中对 items 逐个执行 fn，最多 workers 个并发，按输入顺序产出结果。"""
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    window = max(window or workers * 4, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                while pending and (len(pending) >= window or pending[0].done()):
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,150 @@
+"""PDF 逐页提取结果缓存（SQLite）
+
+键 = sha256(提取后端 + 页面尺寸 + 页面内容流)，值为该页提取出的原始文本（与不启用缓存时相同，
+清洗在之后统一进行，因此两条路径的输出完全一致）。
+规划文件改版时通常只替换少数几页，未变化页面的内容流字节不变，`process_pdf` 直接复用缓存，
+只重新提取改动过的页面。页面哈希用 pdfminer（pdfplumber 的底层依赖）读取原始内容流，不做版面分析。
+缓存总大小超过 `max_bytes` 时按最近访问时间淘汰最旧的条目。
+
+用法示例:
+    from pdf_page_cache import PageCache
+    with PageCache('pdf_page_cache.sqlite') as cache:
+        process_pdf('plan.pdf', 'processed_texts.json', page_cache=cache)
+        print(cache.stats())
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+except Exception:
+    PDFPage = None
+
+# 提取逻辑或缓存内容变化时递增，使旧缓存整体失效
+CACHE_VERSION = '2'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 淘汰时清理到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+
+def hashing_available() -> bool:
+    return PDFPage is not None
+
+
+def page_hashes(path: str, backend: str = 'layout') -> List[str]:
+    """返回每页的内容哈希；需要 pdfminer.six。"""
+    if PDFPage is None:
+        raise RuntimeError('计算页面哈希需要安装 pdfminer.six（随 pdfplumber 安装）')
+    out = []
+    with open(path, 'rb') as f:
+        doc = PDFDocument(PDFParser(f))
+        for page in PDFPage.create_pages(doc):
+            h = hashlib.sha256()
+            h.update(f'{CACHE_VERSION}|{backend}|{page.mediabox}'.encode('utf-8'))
+            for stream in page.contents:
+                h.update(b'\0')
+                h.update(resolve1(stream).get_data())
+            out.append(h.hexdigest())
+    return out
+
+
+class PageCache:
+    """以 SQLite 存储的页面文本缓存，统计复用与重新提取的页数。"""
+
+    def __init__(self, path: str = 'pdf_page_cache.sqlite', max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.reused = 0
+        self.extracted = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS page_text ('
+            ' key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_page_text_accessed ON page_text(accessed)')
+        self._conn.commit()
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM page_text').fetchone()
+        self._total_bytes = int(row[0])
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """批量查询，返回命中的 {key: text}，并计入复用页数。"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                marks = ','.join('?' * len(batch))
+                rows = self._conn.execute(f'SELECT key, text FROM page_text WHERE key IN ({marks})', batch).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany('UPDATE page_text SET accessed = ? WHERE key = ?', [(now, k) for k in found])
+                self._conn.commit()
+        self.reused += sum(1 for k in keys if k in found)
+        return found
+
+    def put_many(self, entries: List[Tuple[str, str]]) -> None:
+        """写入新提取的 [(key, text), ...]，并计入重新提取的页数。"""
+        now = time.time()
+        rows = [(k, v, len(v.encode('utf-8')), now) for k, v in entries]
+        with self._lock:
+            for key, _, size, _ in rows:
+                old = self._conn.execute('SELECT size FROM page_text WHERE key = ?', (key,)).fetchone()
+                self._total_bytes += size - (old[0] if old else 0)
+                self._conn.execute('DELETE FROM page_text WHERE key = ?', (key,))
+            self._conn.executemany('INSERT INTO page_text (key, text, size, accessed) VALUES (?, ?, ?, ?)', rows)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+        self.extracted += len(entries)
+
+    def _evict_locked(self) -> None:
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        while self._total_bytes > target:
+            rows = self._conn.execute('SELECT key, size FROM page_text ORDER BY accessed ASC LIMIT 1000').fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            doomed = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                doomed.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany('DELETE FROM page_text WHERE key = ?', doomed)
+            self.evictions += len(doomed)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM page_text')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM page_text').fetchone()[0]
+        return {'reused': self.reused, 'extracted': self.extracted, 'evictions': self.evictions,
+                'entries': entries, 'bytes': self._total_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,12 +1,16 @@
 """端到端管道协调脚本
 
 功能:
-  - 将输入文本分块为句子块
+  - 将输入文本分块为句子块；可选（`--overlap-sentences` / `--overlap-tokens`）让相邻块重叠，
+    记录 overlap_chars，`clean_triplets.py` 据此去掉重叠区重复抽取的三元组
   - 可选调用 NER（LLM 或跳过）生成 `entities_extracted.json`
+  - 可选（`--triage`）按句法信号给文本块分诊，无关系内容的块不调用 LLM（见 `chunk_triage.py`）
+  - 可选（`--dedup`）检测近似重复块，重复块复用规范块的 NER/RE 结果（见 `near_duplicates.py`）
   - 对每个文本块运行 spaCy 句法分析并用 `prompt_builder` 构造 prompt
-  - 调用 relation_extraction 的 LLM 接口执行关系抽取
+  - 调用 relation_extraction 的 LLM 接口执行关系抽取；`--mode rules` 时改用 `rule_relations` 的依存模式离线抽取
   - 将结果重构并保存为 `triplets_final.json`
   - 构建简单倒排索引并保存为 `index.json`
+  - 各阶段产物的输出路径以 .jsonl 结尾时改用 JSON Lines，逐条读写（见 `jsonl_io.py`）
   - 可选将三元组导入 Neo4j（调用 `neo4j_import.py`）
 
 用法示例:
@@ -15,14 +19,22 @@
 注意: 真实调用 LLM 时会使用环境变量 `GRAPHRAG_CHAT_API_KEY` / `GRAPHRAG_API_BASE` 等。
 """
 import os
-import json
 import argparse
+import itertools
 import subprocess
 from tqdm import tqdm
 
-from pdf_processing import process_text_file
-from spacy_nlp import analyze_sentence_syntax
-from prompt_builder import build_core_prompt
+from pdf_processing import process_text_file, split_sentences, estimate_tokens
+from spacy_nlp import SYNTAX_PROFILES, analyze_many, warm_up
+from syntax_cache import SyntaxCache
+from syntax_format import convert_syntax, syntax_strings
+from prompt_builder import build_core_prompt, build_sentence_prompt
+from rule_relations import extract_triplets
+from chunk_triage import DEFAULT_LLM_THRESHOLD, DEFAULT_SKIP_THRESHOLD, summarize, triage
+from llm_cache import CacheMiss, configure as configure_llm_cache
+from jsonl_io import iter_records, read_records, write_mapping, write_records
+from ordered_pool import ordered_map
+from near_duplicates import DEFAULT_THRESHOLD as DEFAULT_DEDUP_THRESHOLD, dedup_stats, find_duplicates, propagate
 
 try:
     from ner_llm import run as ner_run
@@ -61,9 +73,47 @@ def build_inverted_index(triplets_list):
     return idx
 
 
-def call_relation_llm_for_item(text, syntax_info, core_concepts):
-    """构造 prompt 并调用 relation_extraction.call_llm，解析输出为三元组列表。"""
-    prompt = build_core_prompt(text, para_content=text, syntax_info=syntax_info, core_concepts=core_concepts)
+def flatten_entities(entities):
+    """NER 结果 {类别: [实体, ...]} -> 实体字符串列表；解析失败的结果视为无实体。"""
+    if not isinstance(entities, dict) or 'error' in entities:
+        return []
+    out = []
+    for vals in entities.values():
+        if not isinstance(vals, list):
+            continue
+        for v in vals:
+            v = str(v).strip()
+            if v:
+                out.append(v)
+    return out
+
+
+def iter_sentence_syntax(texts, **analyze_kwargs):
+    """按句切分每个文本块并批量做句法分析，按块依次产出 [(句子, 句法结果), ...]。"""
+    sent_lists = [split_sentences(t) if isinstance(t, str) else [] for t in texts]
+    syntaxes = analyze_many(itertools.chain.from_iterable(sent_lists), **analyze_kwargs)
+    for sents in sent_lists:
+        yield list(zip(sents, itertools.islice(syntaxes, len(sents))))
+
+
+def select_entity_sentences(sentence_syntaxes, entities):
+    """只保留包含至少一个 NER 实体的句子。"""
+    ents = flatten_entities(entities)
+    return [(s, syn) for s, syn in sentence_syntaxes if any(e in s for e in ents)]
+
+
+def _merge_sentence_syntax(sentence_syntaxes):
+    # 拼回整块的 dep/con_pos 字符串，用于估算整块模式下的 prompt 大小
+    deps, cons = [], []
+    for _, syn in sentence_syntaxes:
+        dep, con = syntax_strings(syn)
+        deps.append(dep)
+        cons.append(con)
+    return {'dep': ' -> '.join(d for d in deps if d), 'con_pos': ' '.join(c for c in cons if c)}
+
+
+def call_relation_llm_for_prompt(prompt):
+    """调用 relation_extraction.call_llm，解析输出为三元组列表。"""
     if call_llm is None:
         raise RuntimeError('relation_extraction.call_llm 不可用')
     messages = [{"role": "user", "content": prompt}]
@@ -75,6 +125,12 @@ def call_relation_llm_for_item(text, syntax_info, core_concepts):
     return triplets
 
 
+def call_relation_llm_for_item(text, syntax_info, core_concepts):
+    """构造 prompt 并调用 relation_extraction.call_llm，解析输出为三元组列表。"""
+    prompt = build_core_prompt(text, para_content=text, syntax_info=syntax_info, core_concepts=core_concepts)
+    return call_relation_llm_for_prompt(prompt)
+
+
 def run_pipeline(input_text_path,
                  processed_output='processed_texts.json',
                  ner_output='entities_extracted.json',
@@ -86,21 +142,124 @@ def run_pipeline(input_text_path,
                  neo4j_uri=None,
                  neo4j_user=None,
                  neo4j_password=None,
-                 neo4j_db=None):
+                 neo4j_db=None,
+                 syntax_batch_size=64,
+                 syntax_workers=1,
+                 syntax_profile=None,
+                 syntax_cache_path=None,
+                 syntax_cache_max_mb=256,
+                 syntax_format='full',
+                 syntax_scope='chunk',
+                 triage_chunks=False,
+                 triage_llm_threshold=DEFAULT_LLM_THRESHOLD,
+                 triage_skip_threshold=DEFAULT_SKIP_THRESHOLD,
+                 dedup=False,
+                 dedup_threshold=DEFAULT_DEDUP_THRESHOLD,
+                 max_tokens=512,
+                 overlap_sentences=0,
+                 overlap_tokens=0,
+                 ner_concurrency=1,
+                 re_concurrency=1,
+                 llm_cache_path=None,
+                 llm_cache_only=False,
+                 llm_cache_ttl=None,
+                 llm_cache_max_mb=512):
 
     core_concepts = core_concepts or []
 
     # 1. 文本分块
     print('1) 分块文本...')
-    items = process_text_file(input_text_path, processed_output)
+    items = process_text_file(input_text_path, processed_output, max_tokens=max_tokens,
+                              overlap_sentences=overlap_sentences, overlap_tokens=overlap_tokens)
     print(f'  保存分块到 {processed_output} (chunks={len(items)})')
 
+    # 句法缓存（可选）：相同文本 + 相同模型版本的结果直接从缓存读取；启用时模型延迟到首次未命中才加载，
+    # 全部命中时不会加载 spaCy，否则在此预热
+    syntax_cache = SyntaxCache(syntax_cache_path, max_bytes=syntax_cache_max_mb * 1024 * 1024) if syntax_cache_path else None
+    if syntax_cache is None:
+        # 模型在进程内只加载一次，后续每个文本块复用同一份已预热的模型
+        warm_up(profile=syntax_profile)
+
+    analyze_kwargs = dict(batch_size=syntax_batch_size, n_process=syntax_workers,
+                          profile=syntax_profile, cache=syntax_cache)
+
+    # 分诊时已分析过的块：id -> (文本, 句法结果)，第 3 步文本相同时直接复用，不再重复分析
+    analyzed = {}
+
+    def _analyze(texts):
+        if syntax_scope == 'sentence':
+            return iter_sentence_syntax(texts, **analyze_kwargs)
+        return analyze_many(texts, **analyze_kwargs)
+
+    def _iter_syntax(items):
+        texts = [it.get('text') for it in items]
+        if not analyzed:
+            yield from _analyze(texts)
+            return
+        known = [analyzed.get(it.get('id')) for it in items]
+        fresh = _analyze([t for t, k in zip(texts, known) if k is None or k[0] != t])
+        for t, k in zip(texts, known):
+            yield k[1] if k is not None and k[0] == t else next(fresh)
+
+    def _scoped_syntax(syntax):
+        if syntax_scope == 'sentence':
+            return {'scope': 'sentence', 'sentences': [{'text': s, 'syntax': syn} for s, syn in syntax]}
+        return syntax
+
+    def _stored_syntax(syntax):
+        return convert_syntax(_scoped_syntax(syntax), syntax_format)
+
+    # 1b. 分诊（可选）：只有 LLM 模式需要；按 --syntax-scope 分析（句子级时按句打分），结果留给第 3 步复用
+    routes = {}
+    if triage_chunks and mode == 'llm':
+        print('1b) 按句法信号分诊文本块...')
+        syntaxes = list(_analyze([it.get('text') for it in items]))
+        analyzed.update((it.get('id'), (it.get('text'), syn)) for it, syn in zip(items, syntaxes))
+        decisions = triage(items, map(_scoped_syntax, syntaxes),
+                           llm_threshold=triage_llm_threshold, skip_threshold=triage_skip_threshold)
+        routes = {d['id']: d['route'] for d in decisions}
+        counts = summarize(decisions)
+        print(f"  llm={counts['llm']} rules={counts['rules']} skip={counts['skip']}")
+
+    # 1c. 近似重复检测（可选）：重复块不调用 LLM，复用规范块的 NER/RE 结果
+    duplicates = {}
+    if dedup and mode == 'llm':
+        print('1c) 检测近似重复块...')
+        duplicates = find_duplicates(items, threshold=dedup_threshold)
+        st = dedup_stats(len(items), duplicates)
+        print(f"  重复块 {st['duplicates']}/{st['chunks']}（完全重复 {st['exact']}），去重率 {st['dedup_ratio']:.1%}")
+
+    # LLM 响应缓存（可选）：相同请求复用已缓存的响应；回放模式下未命中直接报错，不访问网络
+    llm_cache = None
+    if mode == 'llm' and (llm_cache_path or llm_cache_only):
+        llm_cache = configure_llm_cache(llm_cache_path, ttl=llm_cache_ttl, max_mb=llm_cache_max_mb,
+                                        cache_only=llm_cache_only)
+
     # 2. NER（可选）
     if mode == 'llm':
         if ner_run is None:
             raise RuntimeError('ner_llm.run 不可用')
         print('2) 运行 NER (LLM)...')
-        ner_run(processed_output, ner_output)
+        if routes or duplicates:
+            # 只把需要 LLM 的块（分诊为 llm 且不是重复块）写入过滤后的 NER 输入，其余块以空实体补齐
+            root, ext = os.path.splitext(processed_output)
+            ner_input = root + '_llm' + ext
+            llm_items = [it for it in items
+                         if routes.get(it.get('id'), 'llm') == 'llm' and it.get('id') not in duplicates]
+            write_records(ner_input, llm_items)
+            ner_run(ner_input, ner_output, concurrency=ner_concurrency)
+            ner_by_id = {it.get('id'): it for it in iter_records(ner_output)}
+            ent_items = [ner_by_id.get(it.get('id')) or {'id': it.get('id'), 'text': it.get('text'), 'entities': {}}
+                         for it in items]
+            propagate(ent_items, duplicates, fields=('entities',))
+            write_records(ner_output, ent_items)
+        else:
+            ner_run(processed_output, ner_output, concurrency=ner_concurrency)
+    elif mode == 'rules':
+        # 规则模式不调用 LLM，实体留空，关系由句法依存模式直接抽取
+        print('2) 规则模式：跳过 NER，使用空实体占位')
+        write_records(ner_output, ({'id': it.get('id'), 'text': it.get('text'), 'entities': {}}
+                                   for it in iter_records(processed_output)))
     elif mode == 'demo':
         # 使用 demo_local 的本地规则生成 NER 与 RE 输出（离线演示）
         if demo_local is None:
@@ -109,66 +268,118 @@ def run_pipeline(input_text_path,
                 print('2) 使用已存在的 NER 输出:', ner_output)
             else:
                 print('2) demo_local 未找到，使用空实体占位')
-                with open(processed_output, 'r', encoding='utf-8') as f:
-                    proc = json.load(f)
-                ent_items = []
-                for it in proc:
-                    ent_items.append({'id': it.get('id'), 'text': it.get('text'), 'entities': {}})
-                with open(ner_output, 'w', encoding='utf-8') as f:
-                    json.dump(ent_items, f, ensure_ascii=False, indent=2)
+                write_records(ner_output, ({'id': it.get('id'), 'text': it.get('text'), 'entities': {}}
+                                           for it in iter_records(processed_output)))
         else:
             print('2) 运行本地 DEMO NER 与 RE（离线）...')
             ner_results = demo_local.demo_ner(processed_output)
-            with open(ner_output, 'w', encoding='utf-8') as f:
-                json.dump(ner_results, f, ensure_ascii=False, indent=2)
+            write_records(ner_output, ner_results)
             print(f'  ✓ {ner_output} 已生成（{len(ner_results)} 条数据）')
             re_results = demo_local.demo_re(ner_output)
-            with open(triplets_output, 'w', encoding='utf-8') as f:
-                json.dump(re_results, f, ensure_ascii=False, indent=2)
+            write_records(triplets_output, re_results)
             print(f'  ✓ {triplets_output} 已生成（{len(re_results)} 条数据）')
     else:
-        raise ValueError('未知 mode, 支持 demo 或 llm')
+        raise ValueError('未知 mode, 支持 demo、llm 或 rules')
 
     # 3. 读取 NER 结果并对每条记录做句法分析与关系抽取
     print('3) 句法分析并调用 RE...')
-    with open(ner_output, 'r', encoding='utf-8') as f:
-        ner_items = json.load(f)
+    ner_items = read_records(ner_output)
 
     all_triplets = []
     # If demo mode used demo_local to produce triplets_output, read triplets_result and enrich with syntax
     if mode == 'demo' and demo_local is not None and os.path.exists(triplets_output):
-        with open(triplets_output, 'r', encoding='utf-8') as f:
-            re_items = json.load(f)
+        re_items = read_records(triplets_output)
         # create a map of entities by id from ner_items
         ent_map = {it.get('id'): it.get('entities') for it in ner_items}
-        for it in re_items:
+        for it, syntax in zip(re_items, _iter_syntax(re_items)):
             tid = it.get('id')
             text = it.get('text')
             entities = ent_map.get(tid, {})
-            syntax = analyze_sentence_syntax(text)
             triplets = it.get('triplets')
-            all_triplets.append({'id': tid, 'text': text, 'syntax': syntax, 'entities': entities, 'triplets': triplets})
+            all_triplets.append({'id': tid, 'text': text, 'syntax': _stored_syntax(syntax), 'entities': entities, 'triplets': triplets})
+    elif mode == 'rules':
+        for it, syntax in zip(tqdm(ner_items, desc='Rules'), _iter_syntax(ner_items)):
+            stored = _stored_syntax(syntax)
+            all_triplets.append({'id': it.get('id'), 'text': it.get('text'), 'syntax': stored,
+                                 'entities': it.get('entities'), 'triplets': extract_triplets(stored)})
     else:
-        for it in tqdm(ner_items, desc='Processing'):
-            tid = it.get('id')
-            text = it.get('text')
-            entities = it.get('entities')
-            syntax = analyze_sentence_syntax(text)
-            try:
-                triplets = call_relation_llm_for_item(text, syntax, core_concepts)
-            except Exception as e:
-                triplets = {'error': str(e)}
-            all_triplets.append({'id': tid, 'text': text, 'syntax': syntax, 'entities': entities, 'triplets': triplets})
-
-    with open(triplets_output, 'w', encoding='utf-8') as f:
-        json.dump(all_triplets, f, ensure_ascii=False, indent=2)
+        prompt_stats = {'prompt': 0, 'chunk': 0}
+
+        def _re_jobs():
+            # 句法分析与 prompt 构造在主线程内完成；需要 LLM 的块带上 prompt 交给工作线程
+            for it, syntax in zip(tqdm(ner_items, desc='Processing'), _iter_syntax(ner_items)):
+                tid = it.get('id')
+                text = it.get('text')
+                entities = it.get('entities')
+                record = {'id': tid, 'text': text, 'syntax': _stored_syntax(syntax), 'entities': entities, 'triplets': []}
+                if tid in duplicates:
+                    # 循环结束后再复制规范块的三元组
+                    yield record, None
+                    continue
+                route = routes.get(tid, 'llm')
+                if route != 'llm':
+                    if route == 'rules':
+                        record['triplets'] = extract_triplets(record['syntax'])
+                    yield record, None
+                    continue
+                if syntax_scope == 'sentence':
+                    # 段落原文只发送一次，句法结果只附上包含实体的句子
+                    selected = select_entity_sentences(syntax, entities)
+                    prompt = build_sentence_prompt(text, selected, core_concepts)
+                    baseline = build_core_prompt(text, text, _merge_sentence_syntax(syntax), core_concepts)
+                    prompt_stats['prompt'] += estimate_tokens(prompt)
+                    prompt_stats['chunk'] += estimate_tokens(baseline)
+                else:
+                    prompt = build_core_prompt(text, para_content=text, syntax_info=syntax, core_concepts=core_concepts)
+                yield record, prompt
+
+        def _complete(job):
+            record, prompt = job
+            if prompt is not None:
+                try:
+                    record['triplets'] = call_relation_llm_for_prompt(prompt)
+                except CacheMiss:
+                    raise
+                except Exception as e:
+                    record['triplets'] = {'error': str(e)}
+            return record
+
+        # re_concurrency > 1 时多个 RE 请求同时在途，结果仍按输入顺序收集
+        all_triplets = list(ordered_map(_complete, _re_jobs(), workers=re_concurrency))
+        analyzed.clear()
+        prompt_tokens, chunk_prompt_tokens = prompt_stats['prompt'], prompt_stats['chunk']
+        if syntax_scope == 'sentence' and chunk_prompt_tokens:
+            saved = chunk_prompt_tokens - prompt_tokens
+            print(f'  句子级 prompt: {prompt_tokens} tokens（整块模式约 {chunk_prompt_tokens}），'
+                  f'节省 {saved} tokens ({saved / chunk_prompt_tokens:.1%})')
+        if routes:
+            counts = summarize([{'route': r} for r in routes.values()])
+            print(f"  分诊: 规则抽取 {counts['rules']} 块，跳过 {counts['skip']} 块，"
+                  f"避免 {counts['llm_calls_avoided']} 次 LLM 调用（NER + RE）")
+        if duplicates:
+            propagate(all_triplets, duplicates)
+            print(f"  近似重复: {len(duplicates)} 块复用规范块结果，避免 {2 * len(duplicates)} 次 LLM 调用（NER + RE）")
+
+    # 重叠字符数随结果保存，供 clean_triplets 去掉重叠区的重复三元组
+    overlaps = {it.get('id'): it['overlap_chars'] for it in items if 'overlap_chars' in it}
+    if overlaps:
+        for rec in all_triplets:
+            if rec.get('id') in overlaps:
+                rec['overlap_chars'] = overlaps[rec.get('id')]
+
+    write_records(triplets_output, all_triplets)
     print('Saved triplets to', triplets_output)
+    if syntax_cache is not None:
+        st = syntax_cache.stats()
+        print(f"  句法缓存: hits={st['hits']} misses={st['misses']} hit_rate={st['hit_rate']:.1%} entries={st['entries']}")
+        syntax_cache.close()
+    if llm_cache is not None:
+        print('  ' + llm_cache.summary())
 
     # 4. 构建倒排索引
     print('4) 构建倒排索引...')
     idx = build_inverted_index(all_triplets)
-    with open(index_output, 'w', encoding='utf-8') as f:
-        json.dump(idx, f, ensure_ascii=False, indent=2)
+    write_mapping(index_output, idx, key='entity', value='occurrences')
     print('Saved index to', index_output)
 
     # 5. 可选导入 Neo4j
@@ -188,8 +399,21 @@ def run_pipeline(input_text_path,
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--text', '-t', required=True, help='输入纯文本文件')
-    p.add_argument('--mode', choices=['demo', 'llm'], default='demo')
+    p.add_argument('--mode', choices=['demo', 'llm', 'rules'], default='demo',
+                   help='rules: 不调用 LLM，基于依存句法模式离线抽取三元组')
     p.add_argument('--core-concepts', nargs='*', default=['城市更新'])
+    p.add_argument('--max-tokens', type=int, default=512, help='每个文本块的 token 上限')
+    p.add_argument('--overlap-sentences', type=int, default=0, help='相邻文本块重叠的句数')
+    p.add_argument('--overlap-tokens', type=int, default=0, help='相邻文本块重叠的 token 上限（按整句回退）')
+    p.add_argument('--ner-concurrency', type=int, default=1,
+                   help='llm 模式下 NER 同时在途的请求数，大于 1 时异步并发（输出顺序不变）')
+    p.add_argument('--re-concurrency', type=int, default=1,
+                   help='llm 模式下 RE 同时在途的请求数（线程池，输出顺序不变）')
+    p.add_argument('--llm-cache', default=None, help='LLM 响应缓存路径（SQLite），默认不启用')
+    p.add_argument('--llm-cache-only', action='store_true',
+                   help='只从 LLM 缓存回放，未命中时报错，不访问网络（用于确定性地重跑下游阶段）')
+    p.add_argument('--llm-cache-ttl', type=float, default=None, help='LLM 缓存条目有效期（秒），默认不过期')
+    p.add_argument('--llm-cache-max-mb', type=int, default=512, help='LLM 缓存大小上限 (MB)')
     p.add_argument('--import-neo4j', action='store_true')
     p.add_argument('--neo4j-uri', default=None)
     p.add_argument('--neo4j-user', default=None)
@@ -199,6 +423,26 @@ def main():
     p.add_argument('--ner-out', default='entities_extracted.json')
     p.add_argument('--triplets-out', default='triplets_final.json')
     p.add_argument('--index-out', default='index.json')
+    p.add_argument('--syntax-batch-size', type=int, default=64, help='spaCy nlp.pipe 每批文本数')
+    p.add_argument('--syntax-workers', type=int, default=1, help='spaCy nlp.pipe 工作进程数')
+    p.add_argument('--syntax-cache', default=None, help='句法结果缓存路径（SQLite），默认不启用')
+    p.add_argument('--syntax-cache-max-mb', type=int, default=256, help='句法缓存大小上限 (MB)，超出后淘汰最久未用条目')
+    p.add_argument('--syntax-format', choices=['full', 'compact'], default='full',
+                   help='triplets 输出中句法结果的存储格式；compact 为列式紧凑格式')
+    p.add_argument('--syntax-scope', choices=['chunk', 'sentence'], default='chunk',
+                   help='sentence: 按句解析，prompt 只附带包含实体的句子的句法结果')
+    p.add_argument('--syntax-profile', choices=list(SYNTAX_PROFILES), default=None,
+                   help='句法分析速度配置（fast/accurate/tokens-only），默认沿用 trf->sm 自动选择')
+    p.add_argument('--triage', action='store_true',
+                   help='llm 模式下按句法信号分诊文本块，低分块改用规则抽取或跳过，不调用 LLM')
+    p.add_argument('--triage-llm-threshold', type=float, default=DEFAULT_LLM_THRESHOLD,
+                   help='分数不低于该值的块调用 LLM')
+    p.add_argument('--triage-skip-threshold', type=float, default=DEFAULT_SKIP_THRESHOLD,
+                   help='分数低于该值的块直接跳过，介于两阈值之间的块用规则抽取')
+    p.add_argument('--dedup', action='store_true',
+                   help='llm 模式下检测近似重复块，重复块复制规范块的实体与三元组（记录 duplicate_of）')
+    p.add_argument('--dedup-threshold', type=float, default=DEFAULT_DEDUP_THRESHOLD,
+                   help='近似重复的字符 3-gram Jaccard 相似度阈值')
     args = p.parse_args()
 
     run_pipeline(
@@ -214,6 +458,27 @@ def main():
         neo4j_user=args.neo4j_user,
         neo4j_password=args.neo4j_password,
         neo4j_db=args.neo4j_db,
+        syntax_batch_size=args.syntax_batch_size,
+        syntax_workers=args.syntax_workers,
+        syntax_profile=args.syntax_profile,
+        syntax_cache_path=args.syntax_cache,
+        syntax_cache_max_mb=args.syntax_cache_max_mb,
+        syntax_format=args.syntax_format,
+        syntax_scope=args.syntax_scope,
+        triage_chunks=args.triage,
+        triage_llm_threshold=args.triage_llm_threshold,
+        triage_skip_threshold=args.triage_skip_threshold,
+        dedup=args.dedup,
+        dedup_threshold=args.dedup_threshold,
+        max_tokens=args.max_tokens,
+        overlap_sentences=args.overlap_sentences,
+        overlap_tokens=args.overlap_tokens,
+        ner_concurrency=args.ner_concurrency,
+        re_concurrency=args.re_concurrency,
+        llm_cache_path=args.llm_cache,
+        llm_cache_only=args.llm_cache_only,
+        llm_cache_ttl=args.llm_cache_ttl,
+        llm_cache_max_mb=args.llm_cache_max_mb,
     )
 
 
@@ -2,10 +2,13 @@
 
 提供函数:
     build_core_prompt(sentence, para_content, syntax_info, core_concepts) -> str
+    build_sentence_prompt(para_content, sentence_syntaxes, core_concepts) -> str
 
 该函数按用户要求的模板严格构造最终 Prompt（使用 Python f-string 风格）。
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+from syntax_format import is_compact, syntax_strings
 
 
 def build_core_prompt(sentence: str,
@@ -18,15 +21,45 @@ def build_core_prompt(sentence: str,
         sentence: 当前要处理的句子（本函数模板中并未直接插入句子，但保留为输入以便扩展）。
         para_content: 段落背景上下文文本。
         syntax_info: 句法分析结果字典，至少包含键 'dep' 与 'con'（或 'con_pos'）；如果键名不同，会尝试回退。
+            也接受 `syntax_format` 的紧凑格式，此时按需推导 dep / con_pos 字符串。
         core_concepts: 用户自定义的核心概念列表。
 
     返回:
         构造好的 Prompt 字符串（已按模板组织）。
     """
     # defensive extraction for syntax_info keys
-    dep = syntax_info.get('dep') or syntax_info.get('dependency') or ''
-    con = syntax_info.get('con') or syntax_info.get('con_pos') or syntax_info.get('const') or ''
+    if is_compact(syntax_info):
+        dep, con = syntax_strings(syntax_info)
+    else:
+        dep = syntax_info.get('dep') or syntax_info.get('dependency') or ''
+        con = syntax_info.get('con') or syntax_info.get('con_pos') or syntax_info.get('const') or ''
+
+    return _render_prompt(para_content, f"句法分析结果：\n依存关系：{dep}\n成分分析：{con}\n\n", core_concepts)
+
+
+def build_sentence_prompt(para_content: str,
+                          sentence_syntaxes: List[Tuple[str, Dict[str, Any]]],
+                          core_concepts: List[str]) -> str:
+    """句子级 Prompt：段落原文只出现一次，句法结果只附上包含实体的句子。
+
+    参数:
+        para_content: 段落（文本块）原文。
+        sentence_syntaxes: [(句子, 句法结果), ...]，通常只传入包含 NER 实体的句子。
+        core_concepts: 用户自定义的核心概念列表。
+    """
+    if sentence_syntaxes:
+        parts = ["句法分析结果（仅含实体的句子）：\n"]
+        for n, (_, syn) in enumerate(sentence_syntaxes, 1):
+            dep, con = syntax_strings(syn)
+            parts.append(f"[句{n}] 依存关系：{dep}\n[句{n}] 成分分析：{con}\n")
+        parts.append("\n")
+        syntax_block = ''.join(parts)
+    else:
+        syntax_block = "句法分析结果：（无包含实体的句子，已省略）\n\n"
+    return _render_prompt(para_content, syntax_block, core_concepts)
+
 
+def _render_prompt(para_content: str, syntax_block: str, core_concepts: List[str]) -> str:
     # format core concepts as a readable list
     if isinstance(core_concepts, (list, tuple)):
         cc_display = ', '.join(str(x) for x in core_concepts)
@@ -37,9 +70,7 @@ def build_core_prompt(sentence: str,
         f"系统：你是一个NLP专家，专注于城市规划领域的关系抽取（RE）任务。\n"
         f"用户：你的任务是根据提供的信息，在每个输入句子中提取关系三元组。\n\n"
         f"段落的背景内容：\n{para_content}\n\n"
-        f"句法分析结果：\n"
-        f"依存关系：{dep}\n"
-        f"成分分析：{con}\n\n"
+        f"{syntax_block}"
         f"任务目标：\n"
         f"围绕核心概念【{cc_display}】进行抽取。请确保提取的三元组中，头实体或尾实体至少有一个与上述核心概念语义高度相关。\n\n"
         f"实体约束（a1）：\n"
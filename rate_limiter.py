@@ -0,0 +1,278 @@
+"""按服务商 RPM/TPM 限额控制 LLM 请求速率
+
+原先 `call_llm` 失败后一律按 `wait_base * 2**attempt` 睡眠重试：并发时既会超出服务商限额、
+引发大量 429 连锁重试，也会在额度充足时白白等待。本模块为每个进程提供一个共享的限速器：
+  - 请求数与 token 数各用一个令牌桶（容量为每分钟限额，按秒匀速补充）；发送前按 prompt 估算值
+    加 max_tokens 预占 token，收到响应后按 `usage.total_tokens` 多退少补
+  - 令牌桶允许预支，预支量决定调用方需要等待的时间，先到先得，线程与协程共用同一套逻辑
+  - 解析 `x-ratelimit-limit-* / remaining-* / reset-*` 响应头：未配置限额时按服务商返回的限额建桶，
+    剩余额度低于本地估计时以服务端为准，额度耗尽时暂停到重置时间
+  - 只对 429、5xx 与连接/超时错误重试：优先遵守 `Retry-After`（429 时所有调用方一起暂停），
+    否则使用带抖动的指数退避；其他 4xx（参数错误、鉴权失败等）直接抛出
+
+环境变量:
+    LLM_RPM   每分钟请求数上限（默认不限，仅按响应头自适应）
+    LLM_TPM   每分钟 token 数上限（默认不限，仅按响应头自适应）
+    LLM_MAX_BACKOFF (60 秒)   单次退避等待的上限
+
+用法示例:
+    limiter = get_limiter()
+    time.sleep(limiter.acquire(estimate))
+    ...发送请求...
+    limiter.observe(headers)
+    limiter.settle(estimate, usage.total_tokens)
+"""
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+try:
+    from openai import APIConnectionError
+except Exception:
+    APIConnectionError = None
+
+from tokenizer_service import count_tokens
+
+TRANSIENT_ERRORS = tuple(e for e in (ConnectionError, TimeoutError, APIConnectionError) if e is not None)
+
+# 每条消息除正文外的固定开销（角色、分隔符），与 OpenAI 的计数方式一致
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_UNIT_SECONDS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+_limiter = None
+_limiter_pid = None
+_lock = threading.Lock()
+
+
+def estimate_request_tokens(messages, max_tokens: int = 0) -> int:
+    """发送前估算一次请求占用的 token：prompt 估算值 + max_tokens（服务商按此预占 TPM）。"""
+    prompt = 0
+    for m in messages or ():
+        content = m.get('content') if isinstance(m, Mapping) else None
+        prompt += MESSAGE_OVERHEAD_TOKENS + (count_tokens(content) if isinstance(content, str) and content else 0)
+    return prompt + (max_tokens or 0)
+
+
+def parse_duration(value) -> Optional[float]:
+    """解析 `1s`、`6m0s`、`20ms`、`0.5` 这类重置时间，返回秒数；无法解析时返回 None。"""
+    if value is None:
+        return None
+    s = str(value).strip()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(s)
+    if not parts or ''.join(n + u for n, u in parts) != s:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def _header(headers, name: str):
+    if not headers:
+        return None
+    try:
+        return headers.get(name)
+    except AttributeError:
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_retry_after(headers, now: Optional[float] = None) -> Optional[float]:
+    """从 `retry-after-ms` / `retry-after`（秒数或 HTTP 日期）中取得需要等待的秒数。"""
+    ms = _header(headers, 'retry-after-ms')
+    if ms is not None:
+        try:
+            return max(0.0, float(ms) / 1000)
+        except ValueError:
+            pass
+    value = _header(headers, 'retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+def status_code(exc) -> Optional[int]:
+    code = getattr(exc, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return code if isinstance(code, int) else None
+
+
+def error_headers(exc):
+    return getattr(getattr(exc, 'response', None), 'headers', None)
+
+
+def is_retryable(exc) -> bool:
+    """429、5xx 与连接/超时错误可以重试；其他错误重试也不会成功。"""
+    code = status_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+class TokenBucket:
+    """容量 capacity、每秒补充 rate 的令牌桶；允许预支，余额为负时返回需要等待的秒数。"""
+
+    def __init__(self, capacity: float, now: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, n: float, now: float) -> float:
+        self._refill(now)
+        self.level -= n
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def credit(self, n: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + n)
+
+    def resize(self, capacity: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, capacity)
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+
+    def observe_remaining(self, remaining: float, now: float) -> None:
+        # 服务端的剩余额度包含其他进程的用量，只在它比本地估计更少时采用
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """请求数 + token 数双令牌桶限速器，线程安全；rpm/tpm 为 0 时该维度只按响应头自适应。"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_backoff: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic, jitter: Callable[[], float] = random.random):
+        self.clock = clock
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        now = clock()
+        self.requests = TokenBucket(rpm, now) if rpm else None
+        self.tokens = TokenBucket(tpm, now) if tpm else None
+        self.paused_until = 0.0
+        self.counters = {'requests': 0, 'throttled': 0, 'retries': 0, 'waited': 0.0}
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """预占 1 个请求与 tokens 个 token，返回发送前需要等待的秒数。"""
+        with self._lock:
+            now = self.clock()
+            delay = max(0.0, self.paused_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.counters['requests'] += 1
+            if delay > 0:
+                self.counters['throttled'] += 1
+                self.counters['waited'] += delay
+            return delay
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """按实际用量修正 token 预占；actual 为 None（响应没有 usage）时保留预占值。"""
+        if actual is None or self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.credit(estimated - actual, self.clock())
+
+    def pause(self, seconds: float) -> None:
+        """所有调用方暂停 seconds 秒（429 的 Retry-After、额度耗尽）。"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def observe(self, headers) -> None:
+        """根据 x-ratelimit-* 响应头调整限额与剩余额度。"""
+        if not headers:
+            return
+        with self._lock:
+            now = self.clock()
+            for kind in ('requests', 'tokens'):
+                limit = _to_float(_header(headers, f'x-ratelimit-limit-{kind}'))
+                remaining = _to_float(_header(headers, f'x-ratelimit-remaining-{kind}'))
+                reset = parse_duration(_header(headers, f'x-ratelimit-reset-{kind}'))
+                bucket = getattr(self, kind)
+                if limit:
+                    if bucket is None:
+                        bucket = TokenBucket(limit, now)
+                        setattr(self, kind, bucket)
+                    elif limit < bucket.capacity:
+                        bucket.resize(limit, now)
+                if bucket is not None and remaining is not None:
+                    bucket.observe_remaining(remaining, now)
+                if remaining is not None and remaining <= 0 and reset:
+                    self.paused_until = max(self.paused_until, now + reset)
+
+    def retry_delay(self, exc, attempt: int, wait_base: float = 1.0) -> Optional[float]:
+        """第 attempt 次失败后的等待秒数；不应重试时返回 None。"""
+        if not is_retryable(exc):
+            return None
+        headers = error_headers(exc)
+        self.observe(headers)
+        delay = parse_retry_after(headers)
+        if delay is None:
+            # 抖动退避：在 [0.5, 1] 倍的指数间隔内随机取值，避免并发调用方同时重试
+            delay = min(self.max_backoff, wait_base * (2 ** (attempt - 1))) * (0.5 + 0.5 * self.jitter())
+        else:
+            delay = min(self.max_backoff, delay)
+        if status_code(exc) == 429:
+            self.pause(delay)
+        with self._lock:
+            self.counters['retries'] += 1
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters)
+
+
+def get_limiter() -> RateLimiter:
+    """返回本进程共享的限速器，首次调用时按环境变量构建。"""
+    global _limiter, _limiter_pid
+    pid = os.getpid()
+    if _limiter is not None and _limiter_pid == pid:
+        return _limiter
+    with _lock:
+        if _limiter is None or _limiter_pid != pid:
+            _limiter = RateLimiter(
+                rpm=float(os.getenv('LLM_RPM') or 0),
+                tpm=float(os.getenv('LLM_TPM') or 0),
+                max_backoff=float(os.getenv('LLM_MAX_BACKOFF') or 60.0),
+            )
+            _limiter_pid = pid
+    return _limiter
+
+
+def reset_limiter() -> None:
+    """丢弃共享限速器（环境变量变化后或测试中使用）。"""
+    global _limiter, _limiter_pid
+    with _lock:
+        _limiter = None
+        _limiter_pid = None
@@ -2,18 +2,19 @@
 
 用法示例:
     python relation_extraction.py --input entities_extracted.json --output triplets_final.json
+    python relation_extraction.py --input entities_extracted.jsonl --output triplets_final.jsonl --resume
+    python relation_extraction.py --input entities_extracted.jsonl --output triplets_final.jsonl --concurrency 8
 """
-import os
 import json
-import time
 import argparse
 import re
+from functools import partial
 from tqdm import tqdm
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+from jsonl_io import completed_ids, iter_records, open_writer
+from llm_cache import configure as configure_cache, get_cache
+from llm_client import chat
+from ordered_pool import ordered_map
 
 
 SYSTEM_PROMPT = (
@@ -23,33 +24,8 @@ SYSTEM_PROMPT = (
 
 
 def call_llm(messages, model=None, max_retries=5):
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
-    
-    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise RuntimeError('请设置环境变量 GRAPHRAG_CHAT_API_KEY 或 OPENAI_API_KEY')
-    
-    api_base = os.getenv('GRAPHRAG_API_BASE')
-    model = model or os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-    
-    client = OpenAI(api_key=api_key, base_url=api_base) if api_base else OpenAI(api_key=api_key)
-    
-    attempt = 0
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0,
-                max_tokens=1024,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            attempt += 1
-            if attempt >= max_retries:
-                raise
-            time.sleep(1 * (2 ** (attempt - 1)))
+    # 复用进程内共享的客户端与连接池（见 llm_client）
+    return chat(messages, model=model, temperature=0, max_tokens=1024, max_retries=max_retries)
 
 
 def extract_json_array(s):
@@ -76,24 +52,25 @@ def build_messages(text, entities):
     return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user}]
 
 
-def run(input_json, output_json, model=None):
-    with open(input_json, 'r', encoding='utf-8') as f:
-        items = json.load(f)
-
-    all_triplets = []
-    for it in tqdm(items, desc='Relation Extraction'):
-        text = it.get('text')
-        entities = it.get('entities')
-        messages = build_messages(text, entities)
-        resp = call_llm(messages, model=model)
-        try:
-            triplets = extract_json_array(resp)
-        except Exception as e:
-            triplets = {"error": str(e), "raw": resp}
-        all_triplets.append({"id": it.get('id'), "text": text, "triplets": triplets})
-
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(all_triplets, f, ensure_ascii=False, indent=2)
+def extract_item(it, model=None):
+    text = it.get('text')
+    resp = call_llm(build_messages(text, it.get('entities')), model=model)
+    try:
+        triplets = extract_json_array(resp)
+    except Exception as e:
+        triplets = {"error": str(e), "raw": resp}
+    return {"id": it.get('id'), "text": text, "triplets": triplets}
+
+
+def run(input_json, output_json, model=None, resume=False, concurrency=1):
+    # 逐条读取、逐条写出；resume=True 时跳过输出中已有的 id，在原文件上续写
+    # concurrency > 1 时线程池内同时保持多个请求在途，结果仍按输入顺序写出
+    done = completed_ids(output_json) if resume else set()
+    todo = (it for it in iter_records(input_json) if it.get('id') not in done)
+    records = ordered_map(partial(extract_item, model=model), todo, workers=concurrency)
+    with open_writer(output_json, resume=resume) as w:
+        for record in tqdm(records, desc='Relation Extraction'):
+            w.write(record)
     print('Saved triplets to', output_json)
 
 
@@ -102,8 +79,19 @@ def main():
     p.add_argument('--input', '-i', default='entities_extracted.json')
     p.add_argument('--output', '-o', default='triplets_final.json')
     p.add_argument('--model', '-m', default=None)
+    p.add_argument('--resume', action='store_true', help='保留输出中已完成的记录，只处理剩余的块')
+    p.add_argument('--concurrency', '-c', type=int, default=1, help='同时在途的 LLM 请求数（线程池）')
+    p.add_argument('--cache', default=None, help='LLM 响应缓存路径（SQLite），相同请求直接复用已缓存的响应')
+    p.add_argument('--cache-only', action='store_true', help='只从缓存回放，未命中时报错，不访问网络')
+    p.add_argument('--cache-ttl', type=float, default=None, help='缓存条目有效期（秒），默认不过期')
+    p.add_argument('--cache-max-mb', type=int, default=512, help='缓存大小上限 (MB)，超出后淘汰最久未用条目')
     args = p.parse_args()
-    run(args.input, args.output, model=args.model)
+    if args.cache or args.cache_only:
+        configure_cache(args.cache, ttl=args.cache_ttl, max_mb=args.cache_max_mb, cache_only=args.cache_only)
+    run(args.input, args.output, model=args.model, resume=args.resume, concurrency=args.concurrency)
+    cache = get_cache()
+    if cache is not None:
+        print(cache.summary())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+"""对比逐句计数与批量计数 + 前缀和二分的分块吞吐量，输出 MB/s
+
+用法:
+    python scripts/benchmark_chunking.py --text input/text1.txt --scale 20
+"""
+import argparse
+import os
+import sys
+import time
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from pdf_processing import chunk_sentences, clean_text, split_sentences  # noqa: E402
+from tokenizer_service import estimate_tokens_fast, tiktoken  # noqa: E402
+
+
+def legacy_estimate_tokens(s):
+    # 改造前的实现：每句都重新获取编码器
+    if tiktoken:
+        try:
+            enc = tiktoken.get_encoding('cl100k_base')
+            return len(enc.encode(s))
+        except Exception:
+            pass
+    return max(1, len(s) // 2)
+
+
+def legacy_chunk_sentences(sentences, max_tokens=512):
+    chunks = []
+    cur = []
+    cur_tokens = 0
+    for s in sentences:
+        t = legacy_estimate_tokens(s)
+        if cur and cur_tokens + t > max_tokens:
+            chunks.append(''.join(cur))
+            cur = [s]
+            cur_tokens = t
+        else:
+            cur.append(s)
+            cur_tokens += t
+    if cur:
+        chunks.append(''.join(cur))
+    return chunks
+
+
+def bench(name, fn, text, max_tokens):
+    mb = len(text.encode('utf-8')) / (1024 * 1024)
+    t0 = time.perf_counter()
+    chunks = fn(split_sentences(text), max_tokens=max_tokens)
+    dt = time.perf_counter() - t0
+    print(f'{name:<10} {len(chunks):>7} {dt:>9.2f} {mb / dt if dt > 0 else float("inf"):>8.2f}')
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--text', default=os.path.join(root, 'input', 'text1.txt'))
+    p.add_argument('--scale', type=int, default=20, help='将样本文本重复的次数')
+    p.add_argument('--max-tokens', type=int, default=512)
+    args = p.parse_args()
+
+    with open(args.text, 'r', encoding='utf-8') as f:
+        text = clean_text(f.read()) * args.scale
+    print(f"样本: {len(text.encode('utf-8')) / (1024 * 1024):.1f} MB，计数后端: {'tiktoken' if tiktoken else '估算'}")
+    print(f"{'impl':<10} {'chunks':>7} {'time(s)':>9} {'MB/s':>8}")
+    bench('legacy', legacy_chunk_sentences, text, args.max_tokens)
+    bench('batched', chunk_sentences, text, args.max_tokens)
+    if tiktoken:
+        # 无 tiktoken 时的回退估算单独计时，便于评估其开销
+        bench('estimator', lambda sents, max_tokens: [estimate_tokens_fast(s) for s in sents], text, args.max_tokens)
+
+
+if __name__ == '__main__':
+    main()
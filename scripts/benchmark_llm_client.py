@@ -0,0 +1,113 @@
+"""对比“每次调用新建 OpenAI 客户端”与 llm_client 共享连接池的吞吐量，输出 requests/sec
+
+在本机启动一个 OpenAI-compatible 的替身服务（固定返回 "[]"，可模拟服务端延迟），不会访问真实 API。
+替身服务为明文 HTTP，真实服务还有 TLS 握手开销，每次新建连接的实际损失比这里更大。
+
+用法:
+    python scripts/benchmark_llm_client.py --requests 500 --threads 8 --latency-ms 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+import llm_client  # noqa: E402
+
+MESSAGES = [{'role': 'user', 'content': '政府推进老旧小区改造。'}]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    connections = 0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # 每个 handler 实例对应一条 TCP 连接，keep-alive 时在同一实例内处理多个请求
+        with StandInHandler._lock:
+            StandInHandler.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if self.latency:
+            time.sleep(self.latency)
+        payload = json.dumps({
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body.get('model', 'stand-in'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': '[]'}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def per_call_client(messages):
+    # 改造前的写法：每次调用都新建客户端
+    client = llm_client.OpenAI(api_key=os.environ['OPENAI_API_KEY'], base_url=os.environ['GRAPHRAG_API_BASE'],
+                               max_retries=0)
+    try:
+        resp = client.chat.completions.create(model='stand-in', messages=messages, temperature=0, max_tokens=16)
+        return resp.choices[0].message.content
+    finally:
+        client.close()
+
+
+def shared_client(messages):
+    return llm_client.chat(messages, model='stand-in', max_tokens=16, max_retries=1)
+
+
+def bench(name, fn, n, threads):
+    StandInHandler.connections = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(lambda _: fn(MESSAGES), range(n)))
+    dt = time.perf_counter() - t0
+    print(f'{name:<10} {n:>8} {dt:>9.2f} {n / dt if dt > 0 else float("inf"):>9.1f} {StandInHandler.connections:>12}')
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--requests', type=int, default=500)
+    p.add_argument('--threads', type=int, default=8)
+    p.add_argument('--latency-ms', type=float, default=0.0, help='替身服务每个请求的模拟处理时间')
+    args = p.parse_args()
+    if llm_client.OpenAI is None:
+        raise SystemExit('需要安装 openai>=1.0.0')
+
+    StandInHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['OPENAI_API_KEY'] = 'stand-in'
+    os.environ['GRAPHRAG_API_BASE'] = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    llm_client.reset_client()
+
+    print(f"替身服务 {os.environ['GRAPHRAG_API_BASE']}，{args.threads} 线程，服务端延迟 {args.latency_ms} ms")
+    print(f"{'client':<10} {'requests':>8} {'time(s)':>9} {'req/s':>9} {'connections':>12}")
+    try:
+        bench('per-call', per_call_client, args.requests, args.threads)
+        bench('shared', shared_client, args.requests, args.threads)
+    finally:
+        llm_client.reset_client()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
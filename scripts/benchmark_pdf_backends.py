@@ -0,0 +1,47 @@
+"""对比 PDF 文本提取后端（fast / layout / auto）的吞吐量，输出 pages/sec
+
+用法:
+    python scripts/benchmark_pdf_backends.py --pdf plan.pdf --backends fast layout auto --pages 100
+"""
+import argparse
+import os
+import sys
+import time
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from pdf_processing import PDF_BACKENDS, _iter_page_texts, count_pdf_pages  # noqa: E402
+
+
+def bench_backend(path, backend, pages):
+    t0 = time.perf_counter()
+    chars = sum(len(t) for t in _iter_page_texts(path, 0, pages, backend))
+    dt = time.perf_counter() - t0
+    return {'backend': backend, 'seconds': dt, 'chars': chars,
+            'pages_per_sec': pages / dt if dt > 0 else float('inf')}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--pdf', required=True)
+    p.add_argument('--backends', nargs='*', default=list(PDF_BACKENDS))
+    p.add_argument('--pages', type=int, default=None, help='只测前 N 页')
+    args = p.parse_args()
+
+    total = count_pdf_pages(args.pdf)
+    pages = min(args.pages, total) if args.pages else total
+    print(f'{args.pdf}: 测试 {pages}/{total} 页')
+    print(f"{'backend':<8} {'time(s)':>9} {'pages/sec':>10} {'chars':>10}")
+    for backend in args.backends:
+        try:
+            r = bench_backend(args.pdf, backend, pages)
+        except RuntimeError as err:
+            print(f'{backend:<8} 跳过: {err}')
+            continue
+        print(f"{r['backend']:<8} {r['seconds']:>9.2f} {r['pages_per_sec']:>10.1f} {r['chars']:>10}")
+
+
+if __name__ == '__main__':
+    main()
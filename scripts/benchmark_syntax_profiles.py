@@ -0,0 +1,55 @@
+"""对比各句法速度配置（SYNTAX_PROFILES）的吞吐量，输出 docs/sec
+
+用法:
+    python scripts/benchmark_syntax_profiles.py --text input/text1.txt --profiles fast accurate tokens-only
+"""
+import argparse
+import os
+import sys
+import time
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from pdf_processing import clean_text, split_sentences  # noqa: E402
+from spacy_nlp import SYNTAX_PROFILES, analyze_many, release, warm_up  # noqa: E402
+
+
+def bench_profile(profile, texts, batch_size=64, n_process=1):
+    t0 = time.perf_counter()
+    warm_up(profile=profile)
+    load_s = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    n = sum(1 for _ in analyze_many(texts, batch_size=batch_size, n_process=n_process, profile=profile))
+    parse_s = time.perf_counter() - t1
+    return {'profile': profile, 'docs': n, 'load_s': load_s, 'parse_s': parse_s,
+            'docs_per_sec': n / parse_s if parse_s > 0 else float('inf')}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--text', default=os.path.join(root, 'input', 'text1.txt'))
+    p.add_argument('--profiles', nargs='*', default=list(SYNTAX_PROFILES))
+    p.add_argument('--limit', type=int, default=500, help='最多解析的句子数')
+    p.add_argument('--batch-size', type=int, default=64)
+    p.add_argument('--n-process', type=int, default=1)
+    args = p.parse_args()
+
+    with open(args.text, 'r', encoding='utf-8') as f:
+        texts = split_sentences(clean_text(f.read()))[:args.limit]
+    print(f'样本句子数: {len(texts)}')
+    print(f"{'profile':<12} {'load(s)':>8} {'parse(s)':>9} {'docs/sec':>10}")
+    for prof in args.profiles:
+        try:
+            r = bench_profile(prof, texts, batch_size=args.batch_size, n_process=args.n_process)
+        except RuntimeError as err:
+            print(f'{prof:<12} 跳过: {str(err).splitlines()[0]}')
+            continue
+        print(f"{r['profile']:<12} {r['load_s']:>8.2f} {r['parse_s']:>9.2f} {r['docs_per_sec']:>10.1f}")
+        # 每个配置测完即释放，避免多个大模型同时驻留内存
+        release()
+
+
+if __name__ == '__main__':
+    main()
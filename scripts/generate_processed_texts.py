@@ -1,12 +1,18 @@
-"""读取 input/*.txt，清洗并按约 512 tokens 切分为 chunks，输出 processed_texts.json
+"""读取 input/*.txt 与 input/*.pdf，清洗并按约 512 tokens 切分为 chunks，输出 processed_texts.json
 
 用法:
     python scripts/generate_processed_texts.py --input_dir input --output processed_texts.json --max-tokens 512
+    python scripts/generate_processed_texts.py --input_dir input --workers 8   # 多进程并行处理文件
+    python scripts/generate_processed_texts.py --input_dir input --full       # 忽略增量清单，全部重新处理
+    python scripts/generate_processed_texts.py --input_dir input --output processed_texts.jsonl   # JSON Lines 输出
+
+默认在输出旁维护增量清单 <output>.manifest.json（见 corpus_manifest.py），重复运行时只处理新增或变化的文件，
+未变化文件沿用原 chunk id。
 """
 import argparse
-import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
 import importlib.util
 import sys
@@ -17,6 +23,7 @@ if root not in sys.path:
     sys.path.insert(0, root)
 try:
     from pdf_processing import clean_text as base_clean_text, split_sentences, chunk_sentences
+    from pdf_processing import PDF_BACKENDS, extract_pages_from_pdf
 except Exception:
     # 兜底：按路径直接加载模块
     spec = importlib.util.spec_from_file_location('pdf_processing', os.path.join(root, 'pdf_processing.py'))
@@ -25,6 +32,11 @@ except Exception:
     base_clean_text = pdf_processing.clean_text
     split_sentences = pdf_processing.split_sentences
     chunk_sentences = pdf_processing.chunk_sentences
+    PDF_BACKENDS = pdf_processing.PDF_BACKENDS
+    extract_pages_from_pdf = pdf_processing.extract_pages_from_pdf
+from boilerplate import detect_boilerplate, format_stats, strip_boilerplate  # noqa: E402
+from corpus_manifest import CorpusManifest  # noqa: E402
+from jsonl_io import iter_records, write_records  # noqa: E402
 
 
 def clean_text_extra(raw: str) -> str:
@@ -49,27 +61,133 @@ def clean_text_extra(raw: str) -> str:
     return txt
 
 
-def process_all_txt(input_dir: str, output_path: str, max_tokens: int = 512):
-    files = sorted(glob(os.path.join(input_dir, '*.txt')))
+INPUT_PATTERNS = ('*.txt', '*.pdf')
+
+
+def list_input_files(input_dir: str):
+    return sorted(fp for pat in INPUT_PATTERNS for fp in glob(os.path.join(input_dir, pat)))
+
+
+def _read_pages(fp, pdf_backend='layout'):
+    if fp.lower().endswith('.pdf'):
+        return extract_pages_from_pdf(fp, backend=pdf_backend)
+    # 文本中的换页符 \f 视为分页；没有换页符时整个文件作为一页参与跨文件统计
+    with open(fp, 'r', encoding='utf-8') as f:
+        return f.read().split('\f')
+
+
+def _load_task(task):
+    fp, pdf_backend = task
+    return _read_pages(fp, pdf_backend)
+
+
+def _chunk_pages(pages, max_tokens, patterns):
+    stats = None
+    if patterns is not None:
+        pages, stats = strip_boilerplate(pages, patterns=patterns)
+    cleaned = clean_text_extra('\n'.join(pages))
+    sents = split_sentences(cleaned)
+    return chunk_sentences(sents, max_tokens=max_tokens), stats
+
+
+def _chunk_task(task):
+    pages, max_tokens, patterns = task
+    return _chunk_pages(pages, max_tokens, patterns)
+
+
+def _file_task(task):
+    fp, max_tokens, pdf_backend, patterns = task
+    return _chunk_pages(_read_pages(fp, pdf_backend), max_tokens, patterns)
+
+
+def _map(fn, tasks, workers):
+    # 进程池按提交顺序返回结果，保证 id / chunk_index 与串行处理一致
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fn, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return [fn(t) for t in tasks]
+
+
+def _previous_chunks(output_path):
+    # 上次输出按文件分组，供未变化文件直接复用
+    by_file = {}
+    if os.path.exists(output_path):
+        for item in iter_records(output_path):
+            by_file.setdefault(item.get('file'), []).append(item)
+    return by_file
+
+
+def process_all_txt(input_dir: str, output_path: str, max_tokens: int = 512, strip_repeated: bool = False,
+                    workers: int = 1, pdf_backend: str = 'layout', manifest_path: str = None, full: bool = False):
+    files = list_input_files(input_dir)
+    manifest = None
+    unchanged, todo, deleted = [], files, []
+    previous = {}
+    if manifest_path:
+        settings = {'max_tokens': max_tokens, 'strip_boilerplate': strip_repeated, 'pdf_backend': pdf_backend}
+        manifest = CorpusManifest(manifest_path, settings)
+        if manifest.reset_reason:
+            print(f'增量清单失效（{manifest.reset_reason}），全部重新处理')
+        previous = {} if full else _previous_chunks(output_path)
+        unchanged, todo, deleted = manifest.diff(files)
+
+        def _reusable(fp):
+            name = os.path.basename(fp)
+            return [it['id'] for it in previous.get(name, [])] == manifest.files[name]['chunk_ids']
+
+        # 上次输出缺失或与清单不一致时（含 --full），对应文件也重新处理
+        stale = [fp for fp in unchanged if not _reusable(fp)]
+        if stale:
+            unchanged = [fp for fp in unchanged if fp not in stale]
+            todo = sorted(todo + stale)
+        print(f'增量: 复用 {len(unchanged)} 个文件，处理 {len(todo)} 个新增/变化文件，删除 {len(deleted)} 个文件')
+    if strip_repeated and manifest is not None and unchanged and manifest.patterns is not None:
+        # 增量运行沿用上次在全量语料上检测出的页眉页脚，每个进程读取并处理自己的文件
+        patterns = set(manifest.patterns)
+        results = _map(_file_task, [(fp, max_tokens, pdf_backend, patterns) for fp in todo], workers)
+    elif strip_repeated:
+        # 先在全部文件的全部页面上统计重复的页眉页脚，再逐文件剔除。检测需要所有页面，
+        # 因此页面文本会在父进程中汇总一次（内存约为待处理语料的文本大小），再分发给各进程切分
+        pages_list = _map(_load_task, [(fp, pdf_backend) for fp in todo], workers)
+        patterns = detect_boilerplate([pg for pages in pages_list for pg in pages])
+        results = _map(_chunk_task, [(pages, max_tokens, patterns) for pages in pages_list], workers)
+        del pages_list
+    else:
+        patterns = None
+        results = _map(_file_task, [(fp, max_tokens, pdf_backend, None) for fp in todo], workers)
+    fresh = dict(zip(todo, results))
     all_chunks = []
     gid = 1
+    totals = {'patterns': len(patterns or ()), 'lines_removed': 0, 'chars_removed': 0, 'tokens_removed': 0}
     for fp in files:
-        with open(fp, 'r', encoding='utf-8') as f:
-            raw = f.read()
-        cleaned = clean_text_extra(raw)
-        sents = split_sentences(cleaned)
-        chunks = chunk_sentences(sents, max_tokens=max_tokens)
-        for i, c in enumerate(chunks, 1):
+        name = os.path.basename(fp)
+        if fp not in fresh:
+            all_chunks.extend(previous[name])
+            continue
+        chunks, stats = fresh[fp]
+        ids = manifest.allocate(len(chunks)) if manifest is not None else list(range(gid, gid + len(chunks)))
+        gid += len(chunks)
+        for i, (cid, c) in enumerate(zip(ids, chunks), 1):
             item = {
-                'id': gid,
-                'file': os.path.basename(fp),
+                'id': cid,
+                'file': name,
                 'chunk_index': i,
                 'text': c
             }
             all_chunks.append(item)
-            gid += 1
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_chunks, f, ensure_ascii=False, indent=2)
+        if manifest is not None:
+            manifest.record(fp, ids)
+        if stats:
+            for k in ('lines_removed', 'chars_removed', 'tokens_removed'):
+                totals[k] += stats[k]
+    write_records(output_path, all_chunks)
+    if manifest is not None:
+        for name in deleted:
+            manifest.tombstone(name)
+        manifest.patterns = sorted(patterns) if patterns is not None else None
+        manifest.save()
+    if patterns is not None:
+        print(format_stats(totals))
     return all_chunks
 
 
@@ -78,8 +196,19 @@ def main():
     p.add_argument('--input_dir', default='input')
     p.add_argument('--output', default='processed_texts.json')
     p.add_argument('--max-tokens', type=int, default=512)
+    p.add_argument('--strip-boilerplate', action='store_true', help='剔除跨页/跨文件重复的页眉页脚')
+    p.add_argument('--workers', type=int, default=1, help='并行处理文件的进程数')
+    p.add_argument('--pdf-backend', choices=PDF_BACKENDS, default='layout', help='PDF 文本提取后端')
+    p.add_argument('--manifest', default=None, help='增量清单路径，默认 <output>.manifest.json')
+    p.add_argument('--no-manifest', action='store_true', help='不使用增量清单（每次全部处理，id 从 1 开始）')
+    p.add_argument('--full', action='store_true', help='忽略已有清单内容，全部重新处理（id 继续递增）')
     args = p.parse_args()
-    chunks = process_all_txt(args.input_dir, args.output, max_tokens=args.max_tokens)
+    manifest_path = None
+    if not args.no_manifest:
+        manifest_path = args.manifest or os.path.splitext(args.output)[0] + '.manifest.json'
+    chunks = process_all_txt(args.input_dir, args.output, max_tokens=args.max_tokens,
+                             strip_repeated=args.strip_boilerplate, workers=args.workers,
+                             pdf_backend=args.pdf_backend, manifest_path=manifest_path, full=args.full)
     print(f'Found {len(chunks)} chunks from {args.input_dir}, saved to {args.output}')
 
 
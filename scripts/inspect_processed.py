@@ -1,8 +1,11 @@
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from jsonl_io import read_records  # noqa: E402
 
 def main():
-    with open('processed_texts.json', 'r', encoding='utf-8') as f:
-        items = json.load(f)
+    items = read_records(sys.argv[1] if len(sys.argv) > 1 else 'processed_texts.json')
     print('Total chunks:', len(items))
     for it in items[:5]:
         print('-', it.get('file'), 'chunk', it.get('chunk_index'), 'len', len(it.get('text','')))
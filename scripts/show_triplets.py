@@ -1,9 +1,12 @@
-import json
+import os
+import sys
 from collections import Counter
 
-p = 'triplets_final.json'
-with open(p, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from jsonl_io import read_records  # noqa: E402
+
+p = sys.argv[1] if len(sys.argv) > 1 else 'triplets_final.json'
+data = read_records(p)
 
 total_records = len(data)
 
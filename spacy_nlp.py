@@ -2,25 +2,220 @@
 
 提供函数:
     analyze_sentence_syntax(text) -> dict
+    analyze_many(texts, batch_size=64, n_process=1) -> Iterator[dict]
+    get_nlp(model_name=None, disable=None, exclude=None, profile=None) -> spacy.Language
+    warm_up(model_name=None, disable=None, exclude=None, profile=None) -> spacy.Language
+    release(model_name=None, disable=None) -> int
 
 返回字典包含:
     - 'dep': 依存关系字符串（示例: "政府(nsubj) -> 加强(ROOT) -> 建设(dobj)"）
     - 'con_pos': 词性/成分标注字符串（示例: "政府(NOUN) 加强(VERB) 建设(NOUN)"）
 
+模型在进程内只加载一次：`get_nlp` 维护一个以 (模型名, 禁用组件, 排除组件) 为键的注册表，
+orchestrator、测试与批处理入口共用同一份已加载的 `Language` 对象；注册表读写由锁保护，
+可在工作线程中安全调用。
+
+句法分析只用到 pos_/tag_/dep_/lemma_/head，`SYNTAX_PROFILES` 提供按速度裁剪的命名配置
+（fast / accurate / tokens-only），加载时直接排除不需要的管道组件（如 NER）。
+
 注意: 需要先安装 `spacy` 与中文模型，例如:
     pip install -U spacy
     python -m spacy download zh_core_web_sm
 
 此模块对缺少依赖或模型提供友好错误提示。
 """
-from typing import Dict
+import functools
+import itertools
+import json
+import os
+import threading
+from importlib import metadata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_MODEL_CANDIDATES = ("zh_core_web_trf", "zh_core_web_sm")
+
+# 命名速度配置：model 为该配置使用的模型（未安装时报错，不回退到其他模型），exclude 为加载时排除的组件
+SYNTAX_PROFILES: Dict[str, Dict[str, object]] = {
+    'fast': {'model': 'zh_core_web_sm', 'exclude': ('ner',)},
+    'accurate': {'model': 'zh_core_web_trf', 'exclude': ('ner',)},
+    'tokens-only': {
+        'model': 'zh_core_web_sm',
+        'exclude': ('transformer', 'tok2vec', 'tagger', 'parser', 'attribute_ruler', 'ner'),
+    },
+}
+
+RegistryKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+# 进程级模型注册表: (请求的模型名, 禁用组件, 排除组件) -> spacy.Language
+_NLP_REGISTRY: Dict[RegistryKey, object] = {}
+_NLP_REGISTRY_LOCK = threading.Lock()
+
+
+def _registry_key(model_name: Optional[str],
+                  disable: Optional[Iterable[str]],
+                  exclude: Optional[Iterable[str]] = None) -> RegistryKey:
+    return (model_name or '', tuple(sorted(set(disable or ()))), tuple(sorted(set(exclude or ()))))
+
+
+def resolve_profile(model_name: str = None, profile: str = None) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """将 profile 展开为 (模型名, 排除组件)；显式给出的 model_name 优先于 profile 中的模型。"""
+    if not profile:
+        return model_name, ()
+    if profile not in SYNTAX_PROFILES:
+        raise ValueError(f'未知 syntax profile: {profile}，可选: {", ".join(SYNTAX_PROFILES)}')
+    conf = SYNTAX_PROFILES[profile]
+    return model_name or conf['model'], tuple(conf['exclude'])
+
+
+def _model_candidates(model_name: Optional[str]) -> Tuple[str, ...]:
+    # 指定了模型（直接给出或来自 profile）时只用该模型，避免例如 'fast' 在缺少 sm 模型时悄悄加载 trf；
+    # 未指定时依次尝试默认候选
+    return (model_name,) if model_name else DEFAULT_MODEL_CANDIDATES
+
+
+def _load_model(model_name: Optional[str], disable: Tuple[str, ...], exclude: Tuple[str, ...] = ()):
+    # lazy import to keep module import cheap and allow py_compile to pass
+    try:
+        import spacy
+    except Exception as e:  # pragma: no cover - runtime dependency
+        raise RuntimeError(
+            "spaCy 未安装。请先运行: pip install -U spacy；\n"
+            "然后下载中文模型，例如: python -m spacy download zh_core_web_sm"
+        ) from e
+
+    last_err = None
+    for m in _model_candidates(model_name):
+        try:
+            return spacy.load(m, disable=list(disable), exclude=list(exclude))
+        except Exception as e:
+            last_err = e
+            continue
+
+    if model_name:
+        raise RuntimeError(
+            f"spaCy 模型 {model_name} 不可用（指定模型或 syntax profile 时不会回退到其他模型）。请先下载:\n"
+            f"python -m spacy download {model_name}"
+        ) from last_err
+    raise RuntimeError(
+        "找不到可用的 spaCy 中文模型。请安装并下载一个中文模型，例如:\n"
+        "pip install -U spacy\n"
+        "python -m spacy download zh_core_web_sm\n"
+        "或者指定模型名称传入 analyze_sentence_syntax(..., model_name='your_model')"
+    ) from last_err
+
+
+def get_nlp(model_name: str = None,
+            disable: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            profile: str = None):
+    """返回进程内共享的 spaCy 模型，首次调用时加载并缓存。
+
+    Args:
+        model_name: 可选 spaCy 模型名，只加载该模型；为空时依次尝试 'zh_core_web_trf'、'zh_core_web_sm'。
+        disable: 加载时禁用的管道组件名（仍加载权重，可再启用）。
+        exclude: 加载时完全排除的管道组件名（不加载，速度与内存更优）。
+        profile: SYNTAX_PROFILES 中的配置名，只加载该配置的模型，其排除组件与 exclude 合并。
+
+    Raises:
+        RuntimeError: 当 spacy 未安装或模型不可用时。
+        ValueError: profile 不存在时。
+    """
+    model_name, profile_exclude = resolve_profile(model_name, profile)
+    key = _registry_key(model_name, disable, tuple(exclude or ()) + profile_exclude)
+    nlp = _NLP_REGISTRY.get(key)
+    if nlp is not None:
+        return nlp
+    # 加载放在锁内，避免多个线程同时加载同一个大模型
+    with _NLP_REGISTRY_LOCK:
+        nlp = _NLP_REGISTRY.get(key)
+        if nlp is None:
+            nlp = _load_model(model_name, key[1], key[2])
+            _NLP_REGISTRY[key] = nlp
+    return nlp
+
+
+def warm_up(model_name: str = None,
+            disable: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            profile: str = None):
+    """显式预热：提前加载模型并跑一次空解析，避免首个文本块承担加载耗时。"""
+    nlp = get_nlp(model_name, disable, exclude, profile)
+    nlp("")
+    return nlp
 
-def analyze_sentence_syntax(text: str, model_name: str = None) -> Dict[str, object]:
+
+def release(model_name: str = None, disable: Iterable[str] = None) -> int:
+    """释放注册表中的模型，返回释放的数量。
+
+    不带参数调用时释放全部模型；只给出 model_name 时释放该模型的所有组件组合。
+    """
+    with _NLP_REGISTRY_LOCK:
+        if model_name is None and disable is None:
+            n = len(_NLP_REGISTRY)
+            _NLP_REGISTRY.clear()
+            return n
+        if disable is None:
+            keys = [k for k in _NLP_REGISTRY if k[0] == (model_name or '')]
+        else:
+            keys = [k for k in _NLP_REGISTRY if k[:2] == _registry_key(model_name, disable)[:2]]
+        n = 0
+        for k in keys:
+            if _NLP_REGISTRY.pop(k, None) is not None:
+                n += 1
+        return n
+
+
+def _model_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except Exception:
+        pass
+    meta_path = os.path.join(name, 'meta.json')
+    if os.path.isfile(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return str(json.load(f).get('version') or 'unknown')
+        except Exception:
+            return 'unknown'
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def model_identity(model_name: str = None, profile: str = None) -> str:
+    """返回 '模型名@版本[|exclude=...]' 形式的标识，用作结果缓存键的一部分。
+
+    只查询已安装包的元数据而不加载模型，因此缓存全部命中时无需启动 spaCy。
+    候选顺序与 get_nlp 的回退顺序一致。
+    """
+    model_name, exclude = resolve_profile(model_name, profile)
+    ident = f"{model_name or 'default'}@unknown"
+    for m in _model_candidates(model_name):
+        ver = _model_version(m)
+        if ver:
+            ident = f'{m}@{ver}'
+            break
+    if exclude:
+        ident += '|exclude=' + ','.join(sorted(exclude))
+    return ident
+
+
+def loaded_models() -> List[RegistryKey]:
+    """列出当前注册表中的 (模型名, 禁用组件, 排除组件) 键。"""
+    with _NLP_REGISTRY_LOCK:
+        return list(_NLP_REGISTRY)
+
+
+def analyze_sentence_syntax(text: str,
+                            model_name: str = None,
+                            profile: str = None,
+                            cache=None) -> Dict[str, object]:
     """分析中文句子的依存关系与词性标注。
 
     Args:
         text: 待分析的中文句子或文本片段。
         model_name: 可选 spaCy 模型名，默认会尝试 'zh_core_web_trf'，再尝试 'zh_core_web_sm'.
+        profile: 可选速度配置名（见 SYNTAX_PROFILES），如 'fast'。
+        cache: 可选 `syntax_cache.SyntaxCache`；命中时直接返回缓存结果，不调用 spaCy。
 
     Returns:
         dict: 结构化结果，示例：
@@ -37,43 +232,88 @@ def analyze_sentence_syntax(text: str, model_name: str = None) -> Dict[str, obje
         RuntimeError: 当 spacy 未安装或模型不可用时，包含安装/下载建议。
     """
     if not isinstance(text, str) or not text.strip():
-        return {'tokens': [], 'dep': '', 'con_pos': ''}
+        return _empty_result()
 
-    # lazy import to keep module import cheap and allow py_compile to pass
-    try:
-        import spacy
-    except Exception as e:  # pragma: no cover - runtime dependency
-        raise RuntimeError(
-            "spaCy 未安装。请先运行: pip install -U spacy；\n"
-            "然后下载中文模型，例如: python -m spacy download zh_core_web_sm"
-        ) from e
+    if cache is not None:
+        model_id = model_identity(model_name, profile)
+        cached = cache.get(text, model_id)
+        if cached is not None:
+            return cached
 
-    # model selection
-    candidates = []
-    if model_name:
-        candidates.append(model_name)
-    candidates.extend(["zh_core_web_trf", "zh_core_web_sm"])
+    nlp = get_nlp(model_name, profile=profile)
+    res = _doc_to_result(nlp(text))
+    if cache is not None:
+        cache.put(text, model_id, res)
+    return res
 
-    nlp = None
-    last_err = None
-    for m in candidates:
-        try:
-            nlp = spacy.load(m)
+
+def analyze_many(texts: Iterable[str],
+                 model_name: str = None,
+                 batch_size: int = 64,
+                 n_process: int = 1,
+                 profile: str = None,
+                 cache=None) -> Iterator[Dict[str, object]]:
+    """批量句法分析，基于 `nlp.pipe` 按输入顺序流式产出结果。
+
+    Args:
+        texts: 文本可迭代对象（可以是生成器，不会被一次性读入内存）。
+        model_name: 同 analyze_sentence_syntax。
+        batch_size: 每批送入 spaCy 的文本数。
+        n_process: spaCy 工作进程数；大于 1 时由 spaCy 派生子进程并行解析。
+        profile: 同 analyze_sentence_syntax。
+        cache: 可选 `syntax_cache.SyntaxCache`；按窗口先查缓存，只把未命中的文本送入 spaCy。
+
+    Yields:
+        与 analyze_sentence_syntax 相同结构的字典，顺序与输入一致。
+    """
+    if cache is not None:
+        yield from _analyze_many_cached(texts, model_name, batch_size, n_process, profile, cache)
+        return
+
+    nlp = get_nlp(model_name, profile=profile)
+    # 空文本/非字符串以空串占位送入 pipe，保证输出与输入一一对应
+    pairs = (
+        (t, True) if isinstance(t, str) and t.strip() else ('', False)
+        for t in texts
+    )
+    for doc, valid in nlp.pipe(pairs, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield _doc_to_result(doc) if valid else _empty_result()
+
+
+def _analyze_many_cached(texts, model_name, batch_size, n_process, profile, cache):
+    model_id = model_identity(model_name, profile)
+    # 多进程时放大窗口，减少 spaCy 子进程的重复启动
+    window_size = max(1, batch_size) * max(1, n_process) * 4
+    it = iter(texts)
+    while True:
+        window = list(itertools.islice(it, window_size))
+        if not window:
             break
-        except Exception as e:
-            last_err = e
-            continue
+        results = []
+        missing = []
+        for idx, t in enumerate(window):
+            if not isinstance(t, str) or not t.strip():
+                results.append(_empty_result())
+                continue
+            cached = cache.get(t, model_id)
+            results.append(cached)
+            if cached is None:
+                missing.append(idx)
+        if missing:
+            nlp = get_nlp(model_name, profile=profile)
+            docs = nlp.pipe((window[i] for i in missing), batch_size=batch_size, n_process=n_process)
+            for idx, doc in zip(missing, docs):
+                res = _doc_to_result(doc)
+                cache.put(window[idx], model_id, res)
+                results[idx] = res
+        yield from results
 
-    if nlp is None:
-        raise RuntimeError(
-            "找不到可用的 spaCy 中文模型。请安装并下载一个中文模型，例如:\n"
-            "pip install -U spacy\n"
-            "python -m spacy download zh_core_web_sm\n"
-            "或者指定模型名称传入 analyze_sentence_syntax(..., model_name='your_model')"
-        ) from last_err
 
-    doc = nlp(text)
+def _empty_result() -> Dict[str, object]:
+    return {'tokens': [], 'dep': '', 'con_pos': ''}
+
 
+def _doc_to_result(doc) -> Dict[str, object]:
     tokens = []
     dep_parts = []
     con_pos_parts = []
@@ -0,0 +1,96 @@
+"""跨页/跨文件的页眉页脚检测与剔除（src 版本）"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+try:
+    from src.tokenizer_service import count_tokens_batch
+except ImportError:
+    from tokenizer_service import count_tokens_batch
+
+DEFAULT_EDGE_LINES = 3
+DEFAULT_MIN_RATIO = 0.3
+DEFAULT_MIN_PAGES = 3
+DEFAULT_HIGH_RATIO = 0.6
+DEFAULT_MAX_LEN = 60
+
+_DIGITS_RE = re.compile(r'\d+')
+_SPACE_RE = re.compile(r'\s+')
+_LETTER_RE = re.compile(r'[^\W\d_]')
+MIN_TEXT_CHARS = 2
+
+
+def normalize_line(line: str) -> str:
+    return _DIGITS_RE.sub('#', _SPACE_RE.sub('', line))
+
+
+def has_text(norm: str) -> bool:
+    return len(_LETTER_RE.findall(norm)) >= MIN_TEXT_CHARS
+
+
+def _edge_indexes(n: int, edge_lines: int) -> Set[int]:
+    return set(range(min(edge_lines, n))) | set(range(max(0, n - edge_lines), n))
+
+
+def _page_lines(page: str) -> List[str]:
+    return [ln.strip() for ln in page.splitlines() if ln.strip()]
+
+
+def detect_boilerplate(pages: List[str],
+                       edge_lines: int = DEFAULT_EDGE_LINES,
+                       min_ratio: float = DEFAULT_MIN_RATIO,
+                       min_pages: int = DEFAULT_MIN_PAGES,
+                       high_ratio: float = DEFAULT_HIGH_RATIO,
+                       max_len: int = DEFAULT_MAX_LEN) -> Set[str]:
+    edge_counts = Counter()
+    any_counts = Counter()
+    n_pages = 0
+    for page in pages:
+        lines = _page_lines(page)
+        if not lines:
+            continue
+        n_pages += 1
+        norm = [normalize_line(ln) for ln in lines]
+        edge_counts.update(set(norm[:edge_lines] + norm[-edge_lines:]))
+        any_counts.update(set(n for n in norm if len(n) <= max_len and has_text(n)))
+    if n_pages < min_pages:
+        return set()
+    edge_min = max(min_pages, min_ratio * n_pages)
+    high_min = max(min_pages, high_ratio * n_pages)
+    found = {n for n, c in edge_counts.items() if c >= edge_min}
+    found.update(n for n, c in any_counts.items() if c >= high_min)
+    found.discard('')
+    return found
+
+
+def strip_boilerplate(pages: Iterable[str], patterns: Set[str] = None, **detect_kwargs) -> Tuple[List[str], Dict[str, int]]:
+    pages = list(pages)
+    if patterns is None:
+        patterns = detect_boilerplate(pages, **detect_kwargs)
+    edge_lines = detect_kwargs.get('edge_lines', DEFAULT_EDGE_LINES)
+    removed = []
+    out = []
+    for page in pages:
+        lines = page.splitlines()
+        nonempty = [i for i, ln in enumerate(lines) if ln.strip()]
+        edges = {nonempty[j] for j in _edge_indexes(len(nonempty), edge_lines)}
+        kept = []
+        for i, ln in enumerate(lines):
+            norm = normalize_line(ln) if ln.strip() else None
+            if norm in patterns and (i in edges or has_text(norm)):
+                removed.append(ln.strip())
+            else:
+                kept.append(ln)
+        out.append('\n'.join(kept))
+    stats = {
+        'patterns': len(patterns),
+        'lines_removed': len(removed),
+        'chars_removed': sum(len(ln) for ln in removed),
+        'tokens_removed': sum(count_tokens_batch(removed)) if removed else 0,
+    }
+    return out, stats
+
+
+def format_stats(stats: Dict[str, int]) -> str:
+    return (f"页眉页脚: {stats['patterns']} 种重复行，删除 {stats['lines_removed']} 行 / "
+            f"{stats['chars_removed']} 字符 / 约 {stats['tokens_removed']} tokens")
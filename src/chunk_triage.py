@@ -0,0 +1,92 @@
+"""基于句法信号的文本块分诊（src 版本）"""
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+try:
+    from src.rule_relations import OBJ_DEPS, PASS_SUBJ_DEPS, SUBJ_DEPS
+except ImportError:
+    from rule_relations import OBJ_DEPS, PASS_SUBJ_DEPS, SUBJ_DEPS
+try:
+    from src.syntax_format import iter_tokens
+except ImportError:
+    from syntax_format import iter_tokens
+
+ROUTES = ('llm', 'rules', 'skip')
+DEFAULT_LLM_THRESHOLD = 0.35
+DEFAULT_SKIP_THRESHOLD = 0.1
+MIN_CONTENT_TOKENS = 4
+
+_IGNORED_POS = {'PUNCT', 'SPACE', 'SYM', 'X'}
+_ARG_DEPS = SUBJ_DEPS | PASS_SUBJ_DEPS | OBJ_DEPS
+
+
+def _tokens(syntax: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if isinstance(syntax, dict) and syntax.get('scope') == 'sentence':
+        out = []
+        for s in syntax.get('sentences') or []:
+            out.extend(iter_tokens(s.get('syntax')))
+        return out
+    return list(iter_tokens(syntax)) if isinstance(syntax, dict) else []
+
+
+def chunk_signals(syntax: Dict[str, Any]) -> Dict[str, float]:
+    tokens = [t for t in _tokens(syntax) if t.get('pos') not in _IGNORED_POS and str(t.get('text', '')).strip()]
+    n = len(tokens)
+    arg_heads = set()
+    for t in tokens:
+        if t.get('dep') in _ARG_DEPS:
+            arg_heads.add((t.get('head_i'), t.get('head_text')))
+    verbs = [t for t in tokens if t.get('pos') == 'VERB']
+    relations = sum(1 for t in verbs if (t.get('i'), t.get('text')) in arg_heads)
+    np_heads = sum(1 for t in tokens if t.get('pos') in ('NOUN', 'PROPN') and not str(t.get('dep', '')).startswith('compound'))
+    nums = sum(1 for t in tokens if t.get('pos') == 'NUM' or any(ch.isdigit() for ch in str(t.get('text', ''))))
+    return {
+        'content': n,
+        'verbs': len(verbs),
+        'relations': relations,
+        'np_density': np_heads / n if n else 0.0,
+        'num_ratio': nums / n if n else 0.0,
+    }
+
+
+def score_signals(sig: Dict[str, float]) -> float:
+    if sig['content'] < MIN_CONTENT_TOKENS:
+        return 0.0
+    score = (0.5 * min(sig['relations'], 3) / 3
+             + 0.2 * min(sig['verbs'], 4) / 4
+             + 0.3 * min(sig['np_density'] * 2, 1.0))
+    return round(score * (1.0 - sig['num_ratio']), 4)
+
+
+def score_chunk(syntax: Dict[str, Any]) -> float:
+    return score_signals(chunk_signals(syntax))
+
+
+def route_score(score: float, llm_threshold: float = DEFAULT_LLM_THRESHOLD,
+                skip_threshold: float = DEFAULT_SKIP_THRESHOLD) -> str:
+    if score >= llm_threshold:
+        return 'llm'
+    if score >= skip_threshold:
+        return 'rules'
+    return 'skip'
+
+
+def triage(items: List[Dict[str, Any]], syntaxes: Iterable[Dict[str, Any]],
+           llm_threshold: float = DEFAULT_LLM_THRESHOLD,
+           skip_threshold: float = DEFAULT_SKIP_THRESHOLD) -> List[Dict[str, Any]]:
+    if skip_threshold > llm_threshold:
+        raise ValueError('skip_threshold 不能大于 llm_threshold')
+    decisions = []
+    for it, syntax in zip(items, syntaxes):
+        sig = chunk_signals(syntax)
+        score = score_signals(sig)
+        decisions.append({'id': it.get('id'), 'route': route_score(score, llm_threshold, skip_threshold),
+                          'score': score, 'signals': sig})
+    return decisions
+
+
+def summarize(decisions: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = Counter(d['route'] for d in decisions)
+    out = {r: counts.get(r, 0) for r in ROUTES}
+    out['llm_calls_avoided'] = 2 * (out['rules'] + out['skip'])
+    return out
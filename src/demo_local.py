@@ -1,10 +1,12 @@
 """本地演示脚本（src 版本）：模拟 NER 与 RE"""
-import json
+try:
+    from src.jsonl_io import iter_records, write_records
+except ImportError:
+    from jsonl_io import iter_records, write_records
 
 
 def demo_ner(input_json):
-    with open(input_json, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    chunks = iter_records(input_json)
     results = []
     for chunk in chunks:
         text = chunk['text']
@@ -30,8 +32,7 @@ def demo_ner(input_json):
 
 
 def demo_re(input_json):
-    with open(input_json, 'r', encoding='utf-8') as f:
-        ner_data = json.load(f)
+    ner_data = iter_records(input_json)
     results = []
     for item in ner_data:
         text = item['text']
@@ -58,11 +59,9 @@ def demo_re(input_json):
 
 def demo_pipeline():
     ner_results = demo_ner('processed_texts.json')
-    with open('entities_extracted.json', 'w', encoding='utf-8') as f:
-        json.dump(ner_results, f, ensure_ascii=False, indent=2)
+    write_records('entities_extracted.json', ner_results)
     re_results = demo_re('entities_extracted.json')
-    with open('triplets_final.json', 'w', encoding='utf-8') as f:
-        json.dump(re_results, f, ensure_ascii=False, indent=2)
+    write_records('triplets_final.json', re_results)
 
 
 if __name__ == '__main__':
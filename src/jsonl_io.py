@@ -0,0 +1,178 @@
+"""阶段产物的 JSON / JSON Lines 读写（src 版本）"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+_READ_BLOCK = 1 << 16
+_WS_RE = re.compile(r'\s*')
+
+
+def is_jsonl(path: str) -> bool:
+    return str(path).lower().endswith(JSONL_SUFFIXES)
+
+
+def _iter_jsonl(path: str) -> Iterator[Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+                return
+
+
+def _refill(f, buf, pos):
+    chunk = f.read(_READ_BLOCK)
+    return buf[pos:] + chunk, 0, not chunk
+
+
+def _iter_json_array(path: str, partial: bool = False) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos, eof = '', 0, False
+        state = 'start'
+        while True:
+            pos = _WS_RE.match(buf, pos).end()
+            if pos >= len(buf):
+                if eof:
+                    break
+                buf, pos, eof = _refill(f, buf, pos)
+                continue
+            ch = buf[pos]
+            if state == 'start':
+                if ch != '[':
+                    raise ValueError(f'{path} 不是 JSON 数组')
+                pos += 1
+                state = 'first'
+            elif state != 'item' and ch == ']':
+                return
+            elif state == 'sep':
+                if ch != ',':
+                    raise ValueError(f'{path} 中的 JSON 数组格式错误')
+                pos += 1
+                state = 'item'
+            else:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    obj, end = None, -1
+                if (end < 0 or end == len(buf)) and not eof:
+                    buf, pos, eof = _refill(f, buf, pos)
+                    continue
+                if end < 0:
+                    break
+                yield obj
+                pos = end
+                state = 'sep'
+    if not partial:
+        raise ValueError(f'{path} 中的 JSON 数组不完整')
+
+
+def iter_records(path: str, partial: bool = False) -> Iterator[Any]:
+    if is_jsonl(path):
+        return _iter_jsonl(path)
+    return _iter_json_array(path, partial=partial)
+
+
+def read_records(path: str) -> List[Any]:
+    return list(iter_records(path))
+
+
+def completed_ids(path: str) -> Set[Any]:
+    if not os.path.exists(path):
+        return set()
+    return {r.get('id') for r in iter_records(path, partial=True) if isinstance(r, dict)}
+
+
+class JsonArrayWriter:
+    def __init__(self, path: str, initial: Iterable[Any] = ()):
+        self.path = path
+        self.count = 0
+        self._initial = list(initial)
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w', encoding='utf-8')
+        self._f.write('[')
+        for item in self._initial:
+            self.write(item)
+        return self
+
+    def write(self, item: Any) -> None:
+        body = json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        self._f.write((',\n  ' if self.count else '\n  ') + body)
+        self._f.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self._f.write('\n]' if self.count else ']')
+        self._f.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'a' if self.append else 'w', encoding='utf-8')
+        return self
+
+    def write(self, item: Any) -> None:
+        self._f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self._f.flush()
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+def _truncate_partial_line(path: str) -> None:
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            start = max(0, pos - _READ_BLOCK)
+            f.seek(start)
+            block = f.read(pos - start)
+            cut = block.rfind(b'\n')
+            if cut >= 0:
+                pos = start + cut + 1
+                break
+            pos = start
+        if pos < size:
+            f.truncate(pos)
+
+
+def open_writer(path: str, resume: bool = False):
+    exists = resume and os.path.exists(path)
+    if is_jsonl(path):
+        if exists:
+            _truncate_partial_line(path)
+        return JsonlWriter(path, append=exists)
+    initial = list(iter_records(path, partial=True)) if exists else ()
+    return JsonArrayWriter(path, initial=initial)
+
+
+def write_records(path: str, records: Iterable[Any]) -> int:
+    with open_writer(path) as w:
+        for r in records:
+            w.write(r)
+    return w.count
+
+
+def write_mapping(path: str, mapping: Dict[str, Any], key: str = 'key', value: str = 'value') -> None:
+    if is_jsonl(path):
+        write_records(path, ({key: k, value: v} for k, v in mapping.items()))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=2)
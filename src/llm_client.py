@@ -0,0 +1,242 @@
+"""进程内共享的 OpenAI-compatible LLM 客户端（src 版本）"""
+import asyncio
+import contextlib
+import inspect
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+try:
+    from openai import AsyncOpenAI, OpenAI
+except Exception:
+    AsyncOpenAI = OpenAI = None
+
+try:
+    from src.llm_cache import CacheMiss, cache_only, get_cache, make_key
+except ImportError:
+    from llm_cache import CacheMiss, cache_only, get_cache, make_key
+
+try:
+    from src.rate_limiter import estimate_request_tokens, get_limiter
+except ImportError:
+    from rate_limiter import estimate_request_tokens, get_limiter
+
+DEFAULT_MODEL = 'gpt-4o-mini'
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name) or default)
+
+
+def api_settings():
+    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise RuntimeError('请设置环境变量 GRAPHRAG_CHAT_API_KEY 或 OPENAI_API_KEY')
+    return api_key, os.getenv('GRAPHRAG_API_BASE') or None
+
+
+def default_model(fallback: str = DEFAULT_MODEL) -> str:
+    return os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL') or fallback
+
+
+def _limits(max_connections: Optional[int] = None):
+    max_connections = max_connections or int(_env_float('LLM_MAX_CONNECTIONS', 32))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_connections, int(_env_float('LLM_MAX_KEEPALIVE', 16))),
+        keepalive_expiry=_env_float('LLM_KEEPALIVE_EXPIRY', 60.0),
+    )
+
+
+def _timeout():
+    return httpx.Timeout(
+        _env_float('LLM_READ_TIMEOUT', 120.0),
+        connect=_env_float('LLM_CONNECT_TIMEOUT', 10.0),
+    )
+
+
+def build_http_client():
+    if httpx is None:
+        return None
+    return httpx.Client(limits=_limits(), timeout=_timeout())
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    api_key, base_url = api_settings()
+    kwargs = {'api_key': api_key, 'max_retries': 0}
+    if base_url:
+        kwargs['base_url'] = base_url
+    return kwargs
+
+
+def get_client():
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            if OpenAI is None:
+                raise RuntimeError('openai package not installed')
+            kwargs = _client_kwargs()
+            http_client = build_http_client()
+            if http_client is not None:
+                kwargs['http_client'] = http_client
+            _client = OpenAI(**kwargs)
+            _client_pid = pid
+    return _client
+
+
+def ensure_ready() -> None:
+    if not cache_only():
+        get_client()
+
+
+def reset_client() -> None:
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            try:
+                _client.close()
+            except Exception:
+                pass
+        _client = None
+        _client_pid = None
+
+
+@contextlib.asynccontextmanager
+async def _no_client():
+    yield None
+
+
+def async_client(max_connections: Optional[int] = None):
+    if cache_only():
+        return _no_client()
+    if AsyncOpenAI is None:
+        raise RuntimeError('openai package not installed')
+    kwargs = _client_kwargs()
+    if httpx is not None:
+        kwargs['http_client'] = httpx.AsyncClient(limits=_limits(max_connections), timeout=_timeout())
+    return AsyncOpenAI(**kwargs)
+
+
+def _request(messages, model, temperature, max_tokens, response_format) -> Dict[str, Any]:
+    kwargs = {
+        'model': model or default_model(),
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+    }
+    if response_format is not None:
+        kwargs['response_format'] = response_format
+    return kwargs
+
+
+def _cache_lookup(kwargs):
+    cache = get_cache()
+    if cache is None:
+        return None, None, None
+    key = make_key(kwargs['model'], kwargs['messages'], kwargs['temperature'], kwargs['max_tokens'],
+                   kwargs.get('response_format'))
+    content = cache.get(key)
+    if content is None and cache_only():
+        raise CacheMiss(f'缓存回放模式下未命中: model={kwargs["model"]} key={key[:12]}')
+    return cache, key, content
+
+
+def _usage_tokens(response) -> Optional[int]:
+    return getattr(getattr(response, 'usage', None), 'total_tokens', None)
+
+
+def _create(client, kwargs):
+    raw_api = getattr(client.chat.completions, 'with_raw_response', None)
+    if raw_api is None:
+        return client.chat.completions.create(**kwargs), None
+    raw = raw_api.create(**kwargs)
+    return raw.parse(), raw.headers
+
+
+async def _acreate(client, kwargs):
+    raw_api = getattr(client.chat.completions, 'with_raw_response', None)
+    if raw_api is None:
+        return await client.chat.completions.create(**kwargs), None
+    raw = await raw_api.create(**kwargs)
+    response = raw.parse()
+    if inspect.isawaitable(response):
+        response = await response
+    return response, raw.headers
+
+
+def chat(messages: List[Dict[str, Any]], model: Optional[str] = None, temperature: float = 0,
+         max_tokens: int = 1024, response_format: Optional[Dict[str, Any]] = None,
+         max_retries: int = 5, wait_base: float = 1.0) -> str:
+    kwargs = _request(messages, model, temperature, max_tokens, response_format)
+    cache, key, content = _cache_lookup(kwargs)
+    if content is not None:
+        return content
+    client = get_client()
+    limiter = get_limiter()
+    estimate = estimate_request_tokens(messages, max_tokens)
+    attempt = 0
+    while True:
+        delay = limiter.acquire(estimate)
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            response, headers = _create(client, kwargs)
+        except Exception as e:
+            limiter.settle(estimate, 0)
+            attempt += 1
+            delay = limiter.retry_delay(e, attempt, wait_base)
+            if delay is None or attempt >= max_retries:
+                raise
+            time.sleep(delay)
+            continue
+        limiter.observe(headers)
+        limiter.settle(estimate, _usage_tokens(response))
+        content = response.choices[0].message.content
+        if cache is not None and content is not None:
+            cache.put(key, kwargs['model'], content)
+        return content
+
+
+async def achat(client, messages: List[Dict[str, Any]], model: Optional[str] = None, temperature: float = 0,
+                max_tokens: int = 1024, response_format: Optional[Dict[str, Any]] = None,
+                max_retries: int = 5, wait_base: float = 1.0) -> str:
+    kwargs = _request(messages, model, temperature, max_tokens, response_format)
+    cache, key, content = _cache_lookup(kwargs)
+    if content is not None:
+        return content
+    limiter = get_limiter()
+    estimate = estimate_request_tokens(messages, max_tokens)
+    attempt = 0
+    while True:
+        delay = limiter.acquire(estimate)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            response, headers = await _acreate(client, kwargs)
+        except Exception as e:
+            limiter.settle(estimate, 0)
+            attempt += 1
+            delay = limiter.retry_delay(e, attempt, wait_base)
+            if delay is None or attempt >= max_retries:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        limiter.observe(headers)
+        limiter.settle(estimate, _usage_tokens(response))
+        content = response.choices[0].message.content
+        if cache is not None and content is not None:
+            cache.put(key, kwargs['model'], content)
+        return content
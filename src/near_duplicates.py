@@ -0,0 +1,140 @@
+"""文本块近似重复检测（src 版本）"""
+import argparse
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+try:
+    from src.jsonl_io import read_records
+except ImportError:
+    from jsonl_io import read_records
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_NGRAM = 3
+SIMHASH_BITS = 64
+DEFAULT_BANDS = 4
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub('', unicodedata.normalize('NFKC', text or ''))
+
+
+def shingles(text: str, n: int = DEFAULT_NGRAM) -> FrozenSet[str]:
+    t = normalize(text)
+    if len(t) <= n:
+        return frozenset([t]) if t else frozenset()
+    return frozenset(t[i:i + n] for i in range(len(t) - n + 1))
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+_LANE = 32
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = [[sum(1 << ((k * 8 + i) * _LANE) for i in range(8) if (byte >> i) & 1) for byte in range(256)]
+           for k in range(8)]
+
+
+def simhash(grams: FrozenSet[str]) -> int:
+    total = 0
+    for g in grams:
+        h = _hash64(g)
+        for k in range(8):
+            total += _SPREAD[k][(h >> (k * 8)) & 0xff]
+    half = len(grams) / 2
+    return sum(1 << b for b in range(SIMHASH_BITS) if ((total >> (b * _LANE)) & _LANE_MASK) > half)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _bands(fp: int, bands: int):
+    width = SIMHASH_BITS // bands
+    mask = (1 << width) - 1
+    return [(k, (fp >> (k * width)) & mask) for k in range(bands)]
+
+
+def find_duplicates(items: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD,
+                    ngram: int = DEFAULT_NGRAM, bands: int = DEFAULT_BANDS) -> Dict[Any, Tuple[Any, float]]:
+    exact: Dict[str, Any] = {}
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    canon_grams: Dict[int, FrozenSet[str]] = {}
+    out = {}
+    for idx, it in enumerate(items):
+        text = normalize(it.get('text'))
+        if not text:
+            continue
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        if digest in exact:
+            out[it.get('id')] = (exact[digest], 1.0)
+            continue
+        grams = shingles(text, ngram)
+        keys = _bands(simhash(grams), bands)
+        cands = {c for key in keys for c in buckets.get(key, ())}
+        scored = [(jaccard(grams, canon_grams[c]), -c) for c in cands]
+        if scored:
+            sim, neg_idx = max(scored)
+            if sim >= threshold:
+                best = -neg_idx
+                out[it.get('id')] = (items[best].get('id'), round(sim, 4))
+                continue
+        exact[digest] = it.get('id')
+        canon_grams[idx] = grams
+        for key in keys:
+            buckets.setdefault(key, []).append(idx)
+    return out
+
+
+def dedup_stats(n_items: int, duplicates: Dict[Any, Tuple[Any, float]]) -> Dict[str, Any]:
+    n_dup = len(duplicates)
+    return {
+        'chunks': n_items,
+        'duplicates': n_dup,
+        'exact': sum(1 for _, sim in duplicates.values() if sim >= 1.0),
+        'dedup_ratio': n_dup / n_items if n_items else 0.0,
+        'llm_calls_saved': 2 * n_dup,
+    }
+
+
+def propagate(results: List[Dict[str, Any]], duplicates: Dict[Any, Tuple[Any, float]],
+              fields=('entities', 'triplets')) -> List[Dict[str, Any]]:
+    by_id = {r.get('id'): r for r in results}
+    for r in results:
+        dup = duplicates.get(r.get('id'))
+        if dup is None or dup[0] not in by_id:
+            continue
+        canon = by_id[dup[0]]
+        for f in fields:
+            if f in canon:
+                r[f] = canon[f]
+        r['duplicate_of'] = dup[0]
+        r['similarity'] = dup[1]
+    return results
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', '-i', default='processed_texts.json')
+    p.add_argument('--output', '-o', default='duplicates.json', help='输出 {重复块 id: [规范块 id, 相似度]}')
+    p.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Jaccard 相似度阈值')
+    p.add_argument('--ngram', type=int, default=DEFAULT_NGRAM)
+    args = p.parse_args()
+    items = read_records(args.input)
+    dups = find_duplicates(items, threshold=args.threshold, ngram=args.ngram)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({str(k): list(v) for k, v in dups.items()}, f, ensure_ascii=False, indent=2)
+    st = dedup_stats(len(items), dups)
+    print(f"重复块 {st['duplicates']}/{st['chunks']}（完全重复 {st['exact']}），去重率 {st['dedup_ratio']:.1%}，"
+          f"可节省 {st['llm_calls_saved']} 次 LLM 调用")
+
+
+if __name__ == '__main__':
+    main()
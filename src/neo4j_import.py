@@ -1,9 +1,13 @@
 """Neo4j 导入模块（src 版本）。"""
-import json
 import re
 from tqdm import tqdm
 from neo4j import GraphDatabase
 
+try:
+    from src.jsonl_io import iter_records
+except ImportError:
+    from jsonl_io import iter_records
+
 
 def sanitize_rel(rel):
     s = re.sub(r"\W+", "_", str(rel)).strip('_')
@@ -16,11 +20,8 @@ def sanitize_rel(rel):
 
 def import_triplets(uri, user, password, input_json, database=None):
     driver = GraphDatabase.driver(uri, auth=(user, password))
-    with open(input_json, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     total = 0
-    for item in data:
+    for item in iter_records(input_json):
         t = item.get('triplets', [])
         if isinstance(t, list):
             total += len(t)
@@ -30,7 +31,7 @@ def import_triplets(uri, user, password, input_json, database=None):
     if database:
         with driver.session(database=database) as session:
             def import_batch(tx):
-                for item in data:
+                for item in iter_records(input_json):
                     triplets = item.get('triplets', [])
                     if not isinstance(triplets, list):
                         continue
@@ -50,7 +51,7 @@ def import_triplets(uri, user, password, input_json, database=None):
             session.execute_write(import_batch)
     else:
         with driver.session() as session:
-            for item in data:
+            for item in iter_records(input_json):
                 triplets = item.get('triplets', [])
                 if not isinstance(triplets, list):
                     continue
@@ -131,15 +131,30 @@
 
 import os
 import json
-import time
 import argparse
+import asyncio
 import re
 from tqdm import tqdm
 
 try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+    from src.jsonl_io import completed_ids, iter_records, open_writer
+except ImportError:
+    from jsonl_io import completed_ids, iter_records, open_writer
+
+try:
+    from src.llm_cache import CacheMiss, configure as configure_cache, get_cache
+except ImportError:
+    from llm_cache import CacheMiss, configure as configure_cache, get_cache
+
+try:
+    from src.llm_client import achat, async_client, chat, ensure_ready
+except ImportError:
+    from llm_client import achat, async_client, chat, ensure_ready
+
+try:
+    from src.ordered_pool import async_ordered_map
+except ImportError:
+    from ordered_pool import async_ordered_map
 
 # --- 配置区 ---
 # 核心概念：所有的提取工作都将围绕这个词展开
@@ -173,36 +188,43 @@ FEW_SHOT_EXAMPLE_OUTPUT = {
 }
 
 def call_llm(prompt_messages, model=None, max_retries=5, wait_base=1.0):
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
-    
-    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise RuntimeError('请设置环境变量 GRAPHRAG_CHAT_API_KEY 或 OPENAI_API_KEY')
-    
-    api_base = os.getenv('GRAPHRAG_API_BASE')
+    # 配置错误（未安装 openai、未设置 API Key）直接抛出，不计入重试
+    ensure_ready()
     model = model or os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o') # 建议使用强模型
-    
-    client = OpenAI(api_key=api_key, base_url=api_base) if api_base else OpenAI(api_key=api_key)
-    
-    attempt = 0
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=prompt_messages,
-                temperature=0.1, # 降低随机性
-                max_tokens=2048,
-                response_format={"type": "json_object"} # 强制 JSON 模式（如果模型支持）
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            attempt += 1
-            if attempt >= max_retries:
-                print(f"Error calling LLM: {e}")
-                return "{}" # 失败返回空对象
-            sleep = wait_base * (2 ** (attempt - 1))
-            time.sleep(sleep)
+    try:
+        return chat(
+            prompt_messages,
+            model=model,
+            temperature=0.1, # 降低随机性
+            max_tokens=2048,
+            response_format={"type": "json_object"}, # 强制 JSON 模式（如果模型支持）
+            max_retries=max_retries,
+            wait_base=wait_base,
+        )
+    except CacheMiss:
+        raise
+    except Exception as e:
+        print(f"Error calling LLM: {e}")
+        return "{}" # 失败返回空对象
+
+async def call_llm_async(client, prompt_messages, model=None, max_retries=5, wait_base=1.0):
+    model = model or os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o')
+    try:
+        return await achat(
+            client,
+            prompt_messages,
+            model=model,
+            temperature=0.1,
+            max_tokens=2048,
+            response_format={"type": "json_object"},
+            max_retries=max_retries,
+            wait_base=wait_base,
+        )
+    except CacheMiss:
+        raise
+    except Exception as e:
+        print(f"Error calling LLM: {e}")
+        return "{}"
 
 def extract_json_from_text(s):
     s = s.strip()
@@ -239,35 +261,56 @@ def build_messages(text):
     ]
     return messages
 
-def run(input_json, output_json, model=None):
+def build_record(it, resp):
+    parsed = extract_json_from_text(resp)
+
+    # 验证：如果提取结果为空，记录空列表
+    if not parsed:
+        parsed = {"Location": [], "Land use function": [], "Direction": [], "Concept": [], "Planned activity": []}
+
+    return {"id": it.get('id'), "text": it.get('text'), "entities": parsed}
+
+def run(input_json, output_json, model=None, resume=False, concurrency=1):
     if not os.path.exists(input_json):
         print(f"错误：找不到输入文件 {input_json}")
         return
+    if concurrency > 1:
+        return asyncio.run(run_async(input_json, output_json, model=model, resume=resume, concurrency=concurrency))
 
-    with open(input_json, 'r', encoding='utf-8') as f:
-        items = json.load(f)
-
-    results = []
+    # 断点续跑：跳过输出中已完成的 id，结果逐条写出
+    done = completed_ids(output_json) if resume else set()
     print(f"开始实体抽取，核心概念：{CORE_CONCEPT}...")
-    
-    for it in tqdm(items, desc='NER'):
-        text = it.get('text')
-        # 简单过滤：如果句子太短，跳过
-        if len(text) < 5: 
-            continue
-            
-        messages = build_messages(text)
-        resp = call_llm(messages, model=model)
-        parsed = extract_json_from_text(resp)
-        
-        # 验证：如果提取结果为空，记录空列表
-        if not parsed:
-            parsed = {"Location": [], "Land use function": [], "Direction": [], "Concept": [], "Planned activity": []}
-            
-        results.append({"id": it.get('id'), "text": text, "entities": parsed})
-
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    with open_writer(output_json, resume=resume) as w:
+        for it in tqdm(iter_records(input_json), desc='NER'):
+            text = it.get('text')
+            # 简单过滤：如果句子太短，跳过
+            if len(text) < 5 or it.get('id') in done:
+                continue
+
+            resp = call_llm(build_messages(text), model=model)
+            w.write(build_record(it, resp))
+    print('实体抽取完成。已保存至', output_json)
+
+async def run_async(input_json, output_json, model=None, resume=False, concurrency=8):
+    if not os.path.exists(input_json):
+        print(f"错误：找不到输入文件 {input_json}")
+        return
+
+    # 并发请求，结果仍按输入顺序写出，与 run 的输出一致
+    done = completed_ids(output_json) if resume else set()
+    todo = (it for it in iter_records(input_json) if len(it.get('text')) >= 5 and it.get('id') not in done)
+    print(f"开始实体抽取（并发 {concurrency}），核心概念：{CORE_CONCEPT}...")
+
+    async with async_client(max_connections=concurrency) as client:
+        async def extract(it):
+            resp = await call_llm_async(client, build_messages(it.get('text')), model=model)
+            return build_record(it, resp)
+
+        with open_writer(output_json, resume=resume) as w, tqdm(desc='NER') as bar:
+            async for record in async_ordered_map(extract, todo, concurrency=concurrency):
+                w.write(record)
+                bar.update()
     print('实体抽取完成。已保存至', output_json)
 
 def main():
@@ -275,8 +318,19 @@ def main():
     p.add_argument('--input', '-i', default='processed_texts.json')
     p.add_argument('--output', '-o', default='entities_extracted.json')
     p.add_argument('--model', '-m', default=None)
+    p.add_argument('--resume', action='store_true', help='保留输出中已完成的记录，只处理剩余的块')
+    p.add_argument('--concurrency', '-c', type=int, default=1, help='同时在途的 LLM 请求数，大于 1 时使用异步并发')
+    p.add_argument('--cache', default=None, help='LLM 响应缓存路径（SQLite），相同请求直接复用已缓存的响应')
+    p.add_argument('--cache-only', action='store_true', help='只从缓存回放，未命中时报错，不访问网络')
+    p.add_argument('--cache-ttl', type=float, default=None, help='缓存条目有效期（秒），默认不过期')
+    p.add_argument('--cache-max-mb', type=int, default=512, help='缓存大小上限 (MB)，超出后淘汰最久未用条目')
     args = p.parse_args()
-    run(args.input, args.output, model=args.model)
+    if args.cache or args.cache_only:
+        configure_cache(args.cache, ttl=args.cache_ttl, max_mb=args.cache_max_mb, cache_only=args.cache_only)
+    run(args.input, args.output, model=args.model, resume=args.resume, concurrency=args.concurrency)
+    cache = get_cache()
+    if cache is not None:
+        print(cache.summary())
 
 if __name__ == '__main__':
     main()
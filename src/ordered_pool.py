@@ -0,0 +1,52 @@
+"""保持输入顺序的有界并发执行（src 版本）"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+async def async_ordered_map(fn: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int = 8,
+                            window: Optional[int] = None) -> AsyncIterator[R]:
+    if concurrency < 1:
+        raise ValueError('concurrency 必须 >= 1')
+    sem = asyncio.Semaphore(concurrency)
+    window = max(window or concurrency * 4, concurrency)
+
+    async def guarded(item):
+        async with sem:
+            return await fn(item)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(guarded(item)))
+            while pending and (len(pending) >= window or pending[0].done()):
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], workers: int = 4,
+                window: Optional[int] = None) -> Iterator[R]:
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    window = max(window or workers * 4, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                while pending and (len(pending) >= window or pending[0].done()):
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -2,44 +2,227 @@
 
 用法示例:
     python src/pdf_processing.py --input plan.pdf --output processed_texts.json
+    python src/pdf_processing.py --input plan.pdf --workers 8 --pages-per-task 16   # 多进程并行提取页面
+    python src/pdf_processing.py --input plan.pdf --stream   # 逐页流式处理，内存占用恒定
+    python src/pdf_processing.py --input plan.pdf --pdf-backend auto   # pypdfium2 快速提取，多栏/表格页回退 pdfplumber
     python src/pdf_processing.py --text input/text1.txt --output processed_texts.json
+    python src/pdf_processing.py --text input/text1.txt --output processed_texts.jsonl   # JSON Lines，逐条写出
+    python src/pdf_processing.py --text dump.txt --stream   # 超大文本按窗口 mmap 读取，内存占用恒定
+    python src/pdf_processing.py --text input/text1.txt --overlap-sentences 2   # 相邻块重叠 2 句，输出 overlap_chars
 
-依赖: pdfplumber, tiktoken (可选), tqdm
+依赖: pdfplumber 和/或 pypdfium2, tiktoken (可选), tqdm
 """
 import argparse
-import json
+import codecs
+import mmap
 import re
 import os
-import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
 
 try:
-    import tiktoken
+    import pdfplumber
 except Exception:
-    tiktoken = None
+    pdfplumber = None
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+try:
+    from src.boilerplate import format_stats, strip_boilerplate as strip_page_boilerplate
+except ImportError:
+    from boilerplate import format_stats, strip_boilerplate as strip_page_boilerplate
+try:
+    from src.jsonl_io import open_writer, write_records
+except ImportError:
+    from jsonl_io import open_writer, write_records
+try:
+    from src.pdf_page_cache import PageCache, hashing_available, page_hashes
+except ImportError:
+    from pdf_page_cache import PageCache, hashing_available, page_hashes
+try:
+    from src.tokenizer_service import chunk_boundaries, count_tokens, count_tokens_batch, pack_boundaries
+except ImportError:
+    from tokenizer_service import chunk_boundaries, count_tokens, count_tokens_batch, pack_boundaries
+
+PDF_BACKENDS = ('fast', 'layout', 'auto')
+
+TABLE_GAP_RATIO = 0.04
+TABLE_MIN_ROWS = 3
+GUTTER_RANGE = (0.35, 0.65)
+GUTTER_MAX_CROSSING = 0.1
+COLUMN_MIN_SHARE = 0.25
+LAYOUT_MIN_RECTS = 6
+
+
+def needs_layout(rects, page_width):
+    """根据 pypdfium2 的文本矩形 [(left, bottom, right, top), ...] 判断页面是否含多栏或表格。"""
+    if len(rects) < LAYOUT_MIN_RECTS or page_width <= 0:
+        return False
+    heights = sorted(top - bottom for _, bottom, _, top in rects)
+    tol = max(heights[len(heights) // 2] / 2, 1.0)
+    rows = {}
+    for left, bottom, right, _ in rects:
+        rows.setdefault(round(bottom / tol), []).append((left, right))
+    gap = page_width * TABLE_GAP_RATIO
+    table_rows = 0
+    for segs in rows.values():
+        segs.sort()
+        gaps = sum(1 for (_, r1), (l2, _) in zip(segs, segs[1:]) if l2 - r1 > gap)
+        if gaps >= 2:
+            table_rows += 1
+    if table_rows >= TABLE_MIN_ROWS:
+        return True
+    lo, hi = GUTTER_RANGE
+    for k in range(int(lo * 100), int(hi * 100) + 1):
+        x = page_width * k / 100
+        if sum(1 for left, _, right, _ in rects if left < x < right) > GUTTER_MAX_CROSSING * len(rects):
+            continue
+        n_left = sum(1 for _, _, right, _ in rects if right <= x)
+        n_right = sum(1 for left, _, _, _ in rects if left >= x)
+        if min(n_left, n_right) >= COLUMN_MIN_SHARE * len(rects):
+            return True
+    return False
 
 
-def extract_text_from_pdf(path):
-    pages = []
+def _resolve_backend(backend):
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f'未知 PDF 后端: {backend}，可选 {PDF_BACKENDS}')
+    if pdfplumber is None and pdfium is None:
+        raise RuntimeError('解析 PDF 需要安装 pdfplumber 或 pypdfium2')
+    if backend == 'layout' and pdfplumber is None:
+        raise RuntimeError('layout 后端需要安装 pdfplumber')
+    if backend == 'fast' and pdfium is None:
+        raise RuntimeError('fast 后端需要安装 pypdfium2')
+    if backend == 'auto':
+        if pdfium is None:
+            return 'layout'
+        if pdfplumber is None:
+            return 'fast'
+    return backend
+
+
+def _release_page(p):
+    if hasattr(p, 'close'):
+        p.close()
+    else:
+        p.flush_cache()
+
+
+def _text_rects(textpage):
+    return [textpage.get_rect(i) for i in range(textpage.count_rects())]
+
+
+def _iter_page_texts(path, start=0, end=None, backend='layout'):
+    backend = _resolve_backend(backend)
+    if backend == 'layout':
+        with pdfplumber.open(path) as pdf:
+            for p in pdf.pages[start:end]:
+                yield p.extract_text() or ""
+                _release_page(p)
+        return
+    doc = pdfium.PdfDocument(path)
+    plumber = None
+    try:
+        stop = len(doc) if end is None else min(end, len(doc))
+        for i in range(start, stop):
+            page = doc[i]
+            textpage = page.get_textpage()
+            try:
+                if backend == 'auto' and needs_layout(_text_rects(textpage), page.get_width()):
+                    if plumber is None:
+                        plumber = pdfplumber.open(path)
+                    p = plumber.pages[i]
+                    txt = p.extract_text() or ""
+                    _release_page(p)
+                else:
+                    txt = textpage.get_text_range().replace('\r\n', '\n').replace('\r', '\n')
+            finally:
+                textpage.close()
+                page.close()
+            yield txt
+    finally:
+        if plumber is not None:
+            plumber.close()
+        doc.close()
+
+
+def _extract_page_range(task):
+    path, start, end, backend = task
+    return list(_iter_page_texts(path, start, end, backend))
+
+
+def count_pdf_pages(path):
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(path)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
     with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            txt = p.extract_text() or ""
-            pages.append(txt)
-    return "\n".join(pages)
+        return len(pdf.pages)
+
+
+def iter_pdf_pages(path, backend='layout'):
+    yield from _iter_page_texts(path, backend=backend)
+
+
+def _page_tasks(path, runs, pages_per_task, backend):
+    return [(path, a, min(a + pages_per_task, end), backend)
+            for start, end in runs for a in range(start, end, pages_per_task)]
+
+
+def _run_page_tasks(tasks, workers):
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return [t for texts in ex.map(_extract_page_range, tasks) for t in texts]
+    return [t for task in tasks for t in _extract_page_range(task)]
+
+
+def _extract_with_cache(path, workers, pages_per_task, backend, page_cache):
+    keys = page_hashes(path, backend)
+    cached = page_cache.get_many(keys)
+    missing = [i for i, k in enumerate(keys) if k not in cached]
+    runs = []
+    for i in missing:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    texts = _run_page_tasks(_page_tasks(path, runs, pages_per_task, backend), workers)
+    entries = list(zip((keys[i] for i in missing), texts))
+    page_cache.put_many(entries)
+    fresh = dict(entries)
+    return [cached[k] if k in cached else fresh[k] for k in keys]
+
+
+def extract_pages_from_pdf(path, workers=1, pages_per_task=16, backend='layout', page_cache=None):
+    if page_cache is not None:
+        if hashing_available():
+            return _extract_with_cache(path, workers, pages_per_task, backend, page_cache)
+        print('  未安装 pdfminer.six，无法计算页面哈希，跳过页缓存')
+    if workers and workers > 1:
+        n_pages = count_pdf_pages(path)
+        if n_pages > pages_per_task:
+            return _run_page_tasks(_page_tasks(path, [(0, n_pages)], pages_per_task, backend), workers)
+    return list(_iter_page_texts(path, backend=backend))
+
+
+def extract_text_from_pdf(path, workers=1, pages_per_task=16, backend='layout', page_cache=None):
+    return "\n".join(extract_pages_from_pdf(path, workers=workers, pages_per_task=pages_per_task,
+                                             backend=backend, page_cache=page_cache))
+
+
+_PAGE_LINE_RE = re.compile(r'page\s*\d+', re.I)
+
+
+def _keep_line(s):
+    return bool(s) and not re.fullmatch(r'\d{1,4}', s) and not _PAGE_LINE_RE.match(s)
 
 
 def clean_text(text):
-    lines = text.splitlines()
-    clean_lines = []
-    for ln in lines:
-        s = ln.strip()
-        if not s:
-            continue
-        if re.fullmatch(r'\d{1,4}', s):
-            continue
-        if re.match(r'page\s*\d+', s, re.I):
-            continue
-        clean_lines.append(s)
-    return '\n'.join(clean_lines)
+    return '\n'.join(s for s in (ln.strip() for ln in text.splitlines()) if _keep_line(s))
 
 
 def split_sentences(text):
@@ -49,74 +232,353 @@ def split_sentences(text):
     return parts
 
 
+_CLAUSE_RE = re.compile(r'(?<=[，；：、,;:])')
+
+
+def _hard_split(text, max_tokens):
+    out = []
+    while text:
+        lo, hi = 1, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(text[:mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        out.append(text[:lo])
+        text = text[lo:]
+    return out
+
+
+def split_long_sentence(sentence, max_tokens=512):
+    pieces = []
+    for clause in _CLAUSE_RE.split(sentence):
+        if not clause:
+            continue
+        if count_tokens(clause) > max_tokens:
+            pieces.extend(_hard_split(clause, max_tokens))
+        else:
+            pieces.append(clause)
+    counts = count_tokens_batch(pieces)
+    return [''.join(pieces[a:b]) for a, b in chunk_boundaries(counts, max_tokens)]
+
+
+def fit_sentences(sentences, counts, max_tokens=512):
+    if all(t <= max_tokens for t in counts):
+        return list(sentences), list(counts)
+    out_s, out_c = [], []
+    for s, t in zip(sentences, counts):
+        if t <= max_tokens:
+            out_s.append(s)
+            out_c.append(t)
+            continue
+        parts = split_long_sentence(s, max_tokens)
+        out_s.extend(parts)
+        out_c.extend(count_tokens_batch(parts))
+    return out_s, out_c
+
+
 def estimate_tokens(s):
-    if tiktoken:
-        try:
-            enc = tiktoken.get_encoding("cl100k_base")
-            return len(enc.encode(s))
-        except Exception:
-            pass
-    return max(1, len(s) // 2)
+    return count_tokens(s)
+
+
+def pack_chunks(sentences, max_tokens=512, overlap_sentences=0, overlap_tokens=0):
+    sentences, counts = fit_sentences(sentences, count_tokens_batch(sentences), max_tokens)
+    out = []
+    prev_end = 0
+    for a, b in pack_boundaries(counts, max_tokens, overlap_sentences, overlap_tokens):
+        overlap_chars = sum(len(x) for x in sentences[a:prev_end])
+        out.append((''.join(sentences[a:b]), overlap_chars))
+        prev_end = b
+    return out
+
+
+def chunk_sentences(sentences, max_tokens=512, overlap_sentences=0, overlap_tokens=0):
+    return [c for c, _ in pack_chunks(sentences, max_tokens, overlap_sentences, overlap_tokens)]
 
 
-def chunk_sentences(sentences, max_tokens=512):
-    chunks = []
+_SENT_END_RE = re.compile(r'[。！？!?\.!]\s*$')
+
+
+def iter_clean_sentences(pages):
+    carry = ''
+    for page in pages:
+        cleaned = clean_text(page)
+        if not cleaned:
+            continue
+        text = carry + '\n' + cleaned if carry else cleaned
+        parts = split_sentences(text)
+        carry = '' if _SENT_END_RE.search(text) or not parts else parts.pop()
+        yield from parts
+    if carry:
+        yield carry
+
+
+def _overlap_tail(cur, next_tokens, max_tokens, overlap_sentences, overlap_tokens):
+    j = len(cur)
+    if overlap_sentences or overlap_tokens:
+        j = 0
+        if overlap_sentences:
+            j = max(j, len(cur) - overlap_sentences)
+        if overlap_tokens:
+            tail = 0
+            k = len(cur)
+            while k > 0 and tail + cur[k - 1][1] <= overlap_tokens:
+                k -= 1
+                tail += cur[k][1]
+            j = max(j, k)
+        j = max(j, 1)
+    tail_tokens = sum(t for _, t in cur[j:])
+    while j < len(cur) and tail_tokens + next_tokens > max_tokens:
+        tail_tokens -= cur[j][1]
+        j += 1
+    return cur[j:], tail_tokens
+
+
+def iter_packed_chunks(sentences, max_tokens=512, count_batch=256, overlap_sentences=0, overlap_tokens=0):
     cur = []
     cur_tokens = 0
-    for s in sentences:
-        t = estimate_tokens(s)
-        if cur and cur_tokens + t > max_tokens:
-            chunks.append(''.join(cur))
-            cur = [s]
-            cur_tokens = t
-        else:
-            cur.append(s)
+    overlap_chars = 0
+    batch = []
+
+    def _drain():
+        nonlocal cur, cur_tokens, overlap_chars
+        for s, t in zip(*fit_sentences(batch, count_tokens_batch(batch), max_tokens)):
+            if cur and cur_tokens + t > max_tokens:
+                yield ''.join(x for x, _ in cur), overlap_chars
+                cur, cur_tokens = _overlap_tail(cur, t, max_tokens, overlap_sentences, overlap_tokens)
+                overlap_chars = sum(len(x) for x, _ in cur)
+            cur.append((s, t))
             cur_tokens += t
+        batch.clear()
+
+    for s in sentences:
+        batch.append(s)
+        if len(batch) >= count_batch:
+            yield from _drain()
+    yield from _drain()
     if cur:
-        chunks.append(''.join(cur))
-    return chunks
+        yield ''.join(x for x, _ in cur), overlap_chars
+
 
+def iter_chunks(sentences, max_tokens=512, count_batch=256, overlap_sentences=0, overlap_tokens=0):
+    for c, _ in iter_packed_chunks(sentences, max_tokens, count_batch, overlap_sentences, overlap_tokens):
+        yield c
 
-def process_text_file(input_path, output_path, max_tokens=512):
+
+def _chunk_item(i, text, overlap_chars, source, overlap):
+    item = {"id": i, "text": text, "source": source}
+    if overlap:
+        item["overlap_chars"] = overlap_chars
+    return item
+
+
+DEFAULT_WINDOW_BYTES = 8 * 1024 * 1024
+
+
+def iter_mmap_text(path, window_bytes=DEFAULT_WINDOW_BYTES):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for off in range(0, len(mm), window_bytes):
+                piece = decoder.decode(mm[off:off + window_bytes])
+                if piece:
+                    yield piece
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+
+
+_LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+_SENT_ENDS = '。！？!?.'
+_UNDECIDED_LINE_RE = re.compile(r'p(?:a(?:g(?:e\s*)?)?)?|\d{1,4}', re.I)
+MAX_SENTENCE_CHARS = 4096
+
+
+def _last_index(text, chars):
+    return max(text.rfind(c) for c in chars)
+
+
+def iter_clean_pieces(path, window_bytes=DEFAULT_WINDOW_BYTES):
+    carry = ''
+    in_line = False
+    dropping = False
+    emitted = False
+    for piece in iter_mmap_text(path, window_bytes):
+        buf = carry + piece
+        cut = _last_index(buf, _LINE_BREAKS)
+        if cut >= 0:
+            lines = buf[:cut].splitlines() or ['']
+            carry = buf[cut + 1:]
+            out = []
+            if in_line:
+                if not dropping:
+                    out.append(lines[0].rstrip())
+                lines = lines[1:]
+                in_line = dropping = False
+            for ln in lines:
+                ln = ln.strip()
+                if _keep_line(ln):
+                    out.append(('\n' if emitted else '') + ln)
+                    emitted = True
+            if out:
+                yield ''.join(out)
+            continue
+        carry = buf
+        if len(carry) <= window_bytes:
+            continue
+        if not in_line:
+            carry = carry.lstrip()
+            if len(carry) <= window_bytes or _UNDECIDED_LINE_RE.fullmatch(carry.rstrip()):
+                continue
+            in_line = True
+            dropping = bool(_PAGE_LINE_RE.match(carry))
+            if not dropping:
+                if emitted:
+                    yield '\n'
+                emitted = True
+        if dropping:
+            carry = ''
+            continue
+        body = carry.rstrip()
+        if body:
+            yield body
+        carry = carry[len(body):]
+    if in_line:
+        if not dropping and carry.rstrip():
+            yield carry.rstrip()
+    else:
+        out = [ln.strip() for ln in carry.splitlines()]
+        out = [ln for ln in out if _keep_line(ln)]
+        if out:
+            yield ('\n' if emitted else '') + '\n'.join(out)
+
+
+def iter_text_blocks(path, window_bytes=DEFAULT_WINDOW_BYTES):
+    limit = max(window_bytes, MAX_SENTENCE_CHARS)
+    carry = ''
+    for piece in iter_clean_pieces(path, window_bytes):
+        buf = carry + piece
+        cut = _last_index(buf, _SENT_ENDS)
+        if cut < 0 and len(buf) > limit:
+            cut = buf.rfind('\n')
+            if cut < 0:
+                cut = len(buf) - 1
+        if cut < 0:
+            carry = buf
+            continue
+        yield buf[:cut + 1]
+        carry = buf[cut + 1:]
+    if carry:
+        yield carry
+
+
+def iter_text_sentences(path, window_bytes=DEFAULT_WINDOW_BYTES):
+    for block in iter_text_blocks(path, window_bytes):
+        yield from split_sentences(block)
+
+
+def process_text_file_stream(input_path, output_path, max_tokens=512, window_bytes=DEFAULT_WINDOW_BYTES,
+                             overlap_sentences=0, overlap_tokens=0):
+    sentences = iter_text_sentences(input_path, window_bytes)
+    chunks = iter_packed_chunks(sentences, max_tokens=max_tokens,
+                                overlap_sentences=overlap_sentences, overlap_tokens=overlap_tokens)
+    with open_writer(output_path) as w:
+        for i, (c, ov) in enumerate(chunks, 1):
+            w.write(_chunk_item(i, c, ov, input_path, overlap_sentences or overlap_tokens))
+    return w.count
+
+
+def process_text_file(input_path, output_path, max_tokens=512, overlap_sentences=0, overlap_tokens=0):
     with open(input_path, 'r', encoding='utf-8') as f:
         raw = f.read()
     cleaned = clean_text(raw)
     sents = split_sentences(cleaned)
-    chunks = chunk_sentences(sents, max_tokens=max_tokens)
+    chunks = pack_chunks(sents, max_tokens=max_tokens, overlap_sentences=overlap_sentences,
+                         overlap_tokens=overlap_tokens)
     out = []
-    for i, c in enumerate(chunks, 1):
-        out.append({"id": i, "text": c, "source": input_path})
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    for i, (c, ov) in enumerate(chunks, 1):
+        out.append(_chunk_item(i, c, ov, input_path, overlap_sentences or overlap_tokens))
+    write_records(output_path, out)
     return out
 
 
-def process_pdf(input_path, output_path, max_tokens=512):
-    raw = extract_text_from_pdf(input_path)
+def process_pdf(input_path, output_path, max_tokens=512, workers=1, pages_per_task=16, backend='layout',
+                page_cache=None, strip_boilerplate=False, overlap_sentences=0, overlap_tokens=0):
+    pages = extract_pages_from_pdf(input_path, workers=workers, pages_per_task=pages_per_task, backend=backend,
+                                   page_cache=page_cache)
+    if strip_boilerplate:
+        pages, stats = strip_page_boilerplate(pages)
+        print(' ', format_stats(stats))
+    raw = "\n".join(pages)
     cleaned = clean_text(raw)
     sents = split_sentences(cleaned)
-    chunks = chunk_sentences(sents, max_tokens=max_tokens)
+    chunks = pack_chunks(sents, max_tokens=max_tokens, overlap_sentences=overlap_sentences,
+                         overlap_tokens=overlap_tokens)
     out = []
-    for i, c in enumerate(chunks, 1):
-        out.append({"id": i, "text": c, "source": input_path})
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    for i, (c, ov) in enumerate(chunks, 1):
+        out.append(_chunk_item(i, c, ov, input_path, overlap_sentences or overlap_tokens))
+    write_records(output_path, out)
     return out
 
 
+def process_pdf_stream(input_path, output_path, max_tokens=512, backend='layout',
+                       overlap_sentences=0, overlap_tokens=0):
+    sentences = iter_clean_sentences(iter_pdf_pages(input_path, backend=backend))
+    chunks = iter_packed_chunks(sentences, max_tokens=max_tokens,
+                                overlap_sentences=overlap_sentences, overlap_tokens=overlap_tokens)
+    with open_writer(output_path) as w:
+        for i, (c, ov) in enumerate(chunks, 1):
+            w.write(_chunk_item(i, c, ov, input_path, overlap_sentences or overlap_tokens))
+    return w.count
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--input', '-i', default=None)
     p.add_argument('--text', '-t', default=None, help='纯文本文件路径')
     p.add_argument('--output', '-o', default='processed_texts.json')
     p.add_argument('--max-tokens', type=int, default=512)
+    p.add_argument('--workers', type=int, default=1, help='PDF 页面提取的进程数，>1 时并行')
+    p.add_argument('--pages-per-task', type=int, default=16, help='并行提取时每个任务的页数')
+    p.add_argument('--pdf-backend', choices=PDF_BACKENDS, default='layout',
+                   help='fast: pypdfium2；layout: pdfplumber；auto: 仅多栏/表格页使用 pdfplumber')
+    p.add_argument('--page-cache', default=None,
+                   help='逐页提取结果缓存路径（SQLite），PDF 改版时只重新提取变化的页；默认不启用')
+    p.add_argument('--page-cache-max-mb', type=int, default=256, help='页缓存大小上限 (MB)，超出后淘汰最久未用的页')
+    p.add_argument('--strip-boilerplate', action='store_true',
+                   help='切分前剔除跨页重复的页眉页脚（不适用于 --stream）')
+    p.add_argument('--overlap-sentences', type=int, default=0, help='相邻块重叠的句数')
+    p.add_argument('--overlap-tokens', type=int, default=0, help='相邻块重叠的 token 上限（按整句回退）')
+    p.add_argument('--stream', action='store_true',
+                   help='流式处理并增量写出，内存占用不随输入大小增长：PDF 逐页（忽略 --workers），纯文本按 mmap 窗口')
     args = p.parse_args()
+    overlap = dict(overlap_sentences=args.overlap_sentences, overlap_tokens=args.overlap_tokens)
     if args.text:
         print('Processing text file:', args.text)
-        items = process_text_file(args.text, args.output, max_tokens=args.max_tokens)
+        if args.stream:
+            n = process_text_file_stream(args.text, args.output, max_tokens=args.max_tokens, **overlap)
+            print(f'Saved {n} chunks to', args.output)
+            return
+        items = process_text_file(args.text, args.output, max_tokens=args.max_tokens, **overlap)
     elif args.input:
         print('Processing PDF:', args.input)
-        items = process_pdf(args.input, args.output, max_tokens=args.max_tokens)
+        if args.stream:
+            n = process_pdf_stream(args.input, args.output, max_tokens=args.max_tokens, backend=args.pdf_backend,
+                                   **overlap)
+            print(f'Saved {n} chunks to', args.output)
+            return
+        page_cache = (PageCache(args.page_cache, max_bytes=args.page_cache_max_mb * 1024 * 1024)
+                      if args.page_cache else None)
+        items = process_pdf(args.input, args.output, max_tokens=args.max_tokens,
+                            workers=args.workers, pages_per_task=args.pages_per_task, backend=args.pdf_backend,
+                            page_cache=page_cache, strip_boilerplate=args.strip_boilerplate, **overlap)
+        if page_cache is not None:
+            st = page_cache.stats()
+            print(f"页缓存: 复用 {st['reused']} 页，重新提取 {st['extracted']} 页")
+            page_cache.close()
     else:
         raise SystemExit('请提供 --input (PDF) 或 --text (纯文本文件) 参数')
     print(f'Saved {len(items)} chunks to', args.output)
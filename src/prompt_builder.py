@@ -1,13 +1,40 @@
 """Prompt builder (src 版本)"""
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+try:
+    from src.syntax_format import is_compact, syntax_strings
+except ImportError:
+    from syntax_format import is_compact, syntax_strings
 
 
 def build_core_prompt(sentence: str,
                       para_content: str,
                       syntax_info: Dict[str, Any],
                       core_concepts: List[str]) -> str:
-    dep = syntax_info.get('dep') or syntax_info.get('dependency') or ''
-    con = syntax_info.get('con') or syntax_info.get('con_pos') or syntax_info.get('const') or ''
+    if is_compact(syntax_info):
+        dep, con = syntax_strings(syntax_info)
+    else:
+        dep = syntax_info.get('dep') or syntax_info.get('dependency') or ''
+        con = syntax_info.get('con') or syntax_info.get('con_pos') or syntax_info.get('const') or ''
+    return _render_prompt(para_content, f"句法分析结果：\n依存关系：{dep}\n成分分析：{con}\n\n", core_concepts)
+
+
+def build_sentence_prompt(para_content: str,
+                          sentence_syntaxes: List[Tuple[str, Dict[str, Any]]],
+                          core_concepts: List[str]) -> str:
+    if sentence_syntaxes:
+        parts = ["句法分析结果（仅含实体的句子）：\n"]
+        for n, (_, syn) in enumerate(sentence_syntaxes, 1):
+            dep, con = syntax_strings(syn)
+            parts.append(f"[句{n}] 依存关系：{dep}\n[句{n}] 成分分析：{con}\n")
+        parts.append("\n")
+        syntax_block = ''.join(parts)
+    else:
+        syntax_block = "句法分析结果：（无包含实体的句子，已省略）\n\n"
+    return _render_prompt(para_content, syntax_block, core_concepts)
+
+
+def _render_prompt(para_content: str, syntax_block: str, core_concepts: List[str]) -> str:
     if isinstance(core_concepts, (list, tuple)):
         cc_display = ', '.join(str(x) for x in core_concepts)
     else:
@@ -16,9 +43,7 @@ def build_core_prompt(sentence: str,
         f"系统：你是一个NLP专家，专注于城市规划领域的关系抽取（RE）任务。\n"
         f"用户：你的任务是根据提供的信息，在每个输入句子中提取关系三元组。\n\n"
         f"段落的背景内容：\n{para_content}\n\n"
-        f"句法分析结果：\n"
-        f"依存关系：{dep}\n"
-        f"成分分析：{con}\n\n"
+        f"{syntax_block}"
         f"任务目标：\n"
         f"围绕核心概念【{cc_display}】进行抽取。请确保提取的三元组中，头实体或尾实体至少有一个与上述核心概念语义高度相关。\n\n"
         f"实体约束（a1）：\n"
@@ -0,0 +1,240 @@
+"""按服务商 RPM/TPM 限额控制 LLM 请求速率（src 版本）"""
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+try:
+    from openai import APIConnectionError
+except Exception:
+    APIConnectionError = None
+
+try:
+    from src.tokenizer_service import count_tokens
+except ImportError:
+    from tokenizer_service import count_tokens
+
+TRANSIENT_ERRORS = tuple(e for e in (ConnectionError, TimeoutError, APIConnectionError) if e is not None)
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_UNIT_SECONDS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+_limiter = None
+_limiter_pid = None
+_lock = threading.Lock()
+
+
+def estimate_request_tokens(messages, max_tokens: int = 0) -> int:
+    prompt = 0
+    for m in messages or ():
+        content = m.get('content') if isinstance(m, Mapping) else None
+        prompt += MESSAGE_OVERHEAD_TOKENS + (count_tokens(content) if isinstance(content, str) and content else 0)
+    return prompt + (max_tokens or 0)
+
+
+def parse_duration(value) -> Optional[float]:
+    if value is None:
+        return None
+    s = str(value).strip()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(s)
+    if not parts or ''.join(n + u for n, u in parts) != s:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def _header(headers, name: str):
+    if not headers:
+        return None
+    try:
+        return headers.get(name)
+    except AttributeError:
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_retry_after(headers, now: Optional[float] = None) -> Optional[float]:
+    ms = _header(headers, 'retry-after-ms')
+    if ms is not None:
+        try:
+            return max(0.0, float(ms) / 1000)
+        except ValueError:
+            pass
+    value = _header(headers, 'retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+def status_code(exc) -> Optional[int]:
+    code = getattr(exc, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return code if isinstance(code, int) else None
+
+
+def error_headers(exc):
+    return getattr(getattr(exc, 'response', None), 'headers', None)
+
+
+def is_retryable(exc) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, now: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, n: float, now: float) -> float:
+        self._refill(now)
+        self.level -= n
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def credit(self, n: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + n)
+
+    def resize(self, capacity: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, capacity)
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+
+    def observe_remaining(self, remaining: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_backoff: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic, jitter: Callable[[], float] = random.random):
+        self.clock = clock
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        now = clock()
+        self.requests = TokenBucket(rpm, now) if rpm else None
+        self.tokens = TokenBucket(tpm, now) if tpm else None
+        self.paused_until = 0.0
+        self.counters = {'requests': 0, 'throttled': 0, 'retries': 0, 'waited': 0.0}
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        with self._lock:
+            now = self.clock()
+            delay = max(0.0, self.paused_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.counters['requests'] += 1
+            if delay > 0:
+                self.counters['throttled'] += 1
+                self.counters['waited'] += delay
+            return delay
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        if actual is None or self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.credit(estimated - actual, self.clock())
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def observe(self, headers) -> None:
+        if not headers:
+            return
+        with self._lock:
+            now = self.clock()
+            for kind in ('requests', 'tokens'):
+                limit = _to_float(_header(headers, f'x-ratelimit-limit-{kind}'))
+                remaining = _to_float(_header(headers, f'x-ratelimit-remaining-{kind}'))
+                reset = parse_duration(_header(headers, f'x-ratelimit-reset-{kind}'))
+                bucket = getattr(self, kind)
+                if limit:
+                    if bucket is None:
+                        bucket = TokenBucket(limit, now)
+                        setattr(self, kind, bucket)
+                    elif limit < bucket.capacity:
+                        bucket.resize(limit, now)
+                if bucket is not None and remaining is not None:
+                    bucket.observe_remaining(remaining, now)
+                if remaining is not None and remaining <= 0 and reset:
+                    self.paused_until = max(self.paused_until, now + reset)
+
+    def retry_delay(self, exc, attempt: int, wait_base: float = 1.0) -> Optional[float]:
+        if not is_retryable(exc):
+            return None
+        headers = error_headers(exc)
+        self.observe(headers)
+        delay = parse_retry_after(headers)
+        if delay is None:
+            delay = min(self.max_backoff, wait_base * (2 ** (attempt - 1))) * (0.5 + 0.5 * self.jitter())
+        else:
+            delay = min(self.max_backoff, delay)
+        if status_code(exc) == 429:
+            self.pause(delay)
+        with self._lock:
+            self.counters['retries'] += 1
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters)
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter, _limiter_pid
+    pid = os.getpid()
+    if _limiter is not None and _limiter_pid == pid:
+        return _limiter
+    with _lock:
+        if _limiter is None or _limiter_pid != pid:
+            _limiter = RateLimiter(
+                rpm=float(os.getenv('LLM_RPM') or 0),
+                tpm=float(os.getenv('LLM_TPM') or 0),
+                max_backoff=float(os.getenv('LLM_MAX_BACKOFF') or 60.0),
+            )
+            _limiter_pid = pid
+    return _limiter
+
+
+def reset_limiter() -> None:
+    global _limiter, _limiter_pid
+    with _lock:
+        _limiter = None
+        _limiter_pid = None
@@ -96,15 +96,30 @@
 
 import os
 import json
-import time
 import argparse
 import re
+from functools import partial
 from tqdm import tqdm
 
 try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+    from src.jsonl_io import completed_ids, iter_records, open_writer
+except ImportError:
+    from jsonl_io import completed_ids, iter_records, open_writer
+
+try:
+    from src.llm_cache import CacheMiss, configure as configure_cache, get_cache
+except ImportError:
+    from llm_cache import CacheMiss, configure as configure_cache, get_cache
+
+try:
+    from src.llm_client import chat, ensure_ready
+except ImportError:
+    from llm_client import chat, ensure_ready
+
+try:
+    from src.ordered_pool import ordered_map
+except ImportError:
+    from ordered_pool import ordered_map
 
 # --- 配置区 ---
 CORE_CONCEPT = "本土设计"
@@ -124,33 +139,14 @@ SYSTEM_PROMPT = f"""
 """
 
 def call_llm(messages, model=None, max_retries=5):
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
-    
-    api_key = os.getenv('GRAPHRAG_CHAT_API_KEY') or os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise RuntimeError('请设置环境变量')
-    
-    api_base = os.getenv('GRAPHRAG_API_BASE')
+    ensure_ready()
     model = model or os.getenv('GRAPHRAG_CHAT_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o')
-    
-    client = OpenAI(api_key=api_key, base_url=api_base) if api_base else OpenAI(api_key=api_key)
-    
-    attempt = 0
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=1024,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            attempt += 1
-            if attempt >= max_retries:
-                return "[]"
-            time.sleep(1 * (2 ** (attempt - 1)))
+    try:
+        return chat(messages, model=model, temperature=0.1, max_tokens=1024, max_retries=max_retries)
+    except CacheMiss:
+        raise
+    except Exception:
+        return "[]"
 
 def extract_json_array(s):
     s = s.strip()
@@ -203,59 +199,59 @@ def build_messages(text, entities):
     
     return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
 
-def run(input_json, output_json, model=None):
+def link_core(entities, triplets):
+    # --- 后处理优化：强制连接孤岛 ---
+    # 如果 LLM 返回空，或者没有包含核心概念，我们人工通过启发式规则补充一条
+    # 只有当确实存在实体时才补充
+    has_core_link = False
+    flat_entities = []
+    for cat, ent_list in entities.items():
+        flat_entities.extend(ent_list)
+
+    for t in triplets:
+        if CORE_CONCEPT in t[0] or CORE_CONCEPT in t[2]:
+            has_core_link = True
+            break
+
+    # 如果没有找到核心连接，且有提取到“规划概念”或“行动”，强制连接第一个重要实体
+    if not has_core_link and flat_entities:
+        # 优先连接 Concept 或 Location
+        candidates = entities.get("Concept", []) + entities.get("Location", [])
+        if candidates:
+            # 补充一个弱连接，保证图谱连通
+            forced_triplet = [candidates[0], "相关于", CORE_CONCEPT]
+            triplets.append(forced_triplet)
+    return triplets
+
+def extract_item(it, model=None):
+    text = it.get('text')
+    entities = it.get('entities')
+    messages = build_messages(text, entities)
+    if messages is None:
+        return None
+
+    # 后处理在工作线程内、请求完成时执行，不阻塞其它请求
+    resp = call_llm(messages, model=model)
+    triplets = link_core(entities, extract_json_array(resp))
+    return {"id": it.get('id'), "text": text, "triplets": triplets}
+
+def run(input_json, output_json, model=None, resume=False, concurrency=1):
     if not os.path.exists(input_json):
         print(f"错误：找不到输入文件 {input_json}")
         return
 
-    with open(input_json, 'r', encoding='utf-8') as f:
-        items = json.load(f)
-
-    all_triplets = []
-    
+    # 断点续跑：跳过输出中已完成的 id，结果逐条写出
+    done = completed_ids(output_json) if resume else set()
     print(f"开始关系抽取，策略：Hub-and-Spoke (围绕 {CORE_CONCEPT})...")
 
-    for it in tqdm(items, desc='Relation Extraction'):
-        text = it.get('text')
-        entities = it.get('entities')
-        
-        # 如果没有实体，跳过
-        if not any(entities.values()):
-            continue
-            
-        messages = build_messages(text, entities)
-        if messages is None:
-            continue
-
-        resp = call_llm(messages, model=model)
-        triplets = extract_json_array(resp)
-        
-        # --- 后处理优化：强制连接孤岛 ---
-        # 如果 LLM 返回空，或者没有包含核心概念，我们人工通过启发式规则补充一条
-        # 只有当确实存在实体时才补充
-        has_core_link = False
-        flat_entities = []
-        for cat, ent_list in entities.items():
-            flat_entities.extend(ent_list)
-
-        for t in triplets:
-            if CORE_CONCEPT in t[0] or CORE_CONCEPT in t[2]:
-                has_core_link = True
-                break
-        
-        # 如果没有找到核心连接，且有提取到“规划概念”或“行动”，强制连接第一个重要实体
-        if not has_core_link and flat_entities:
-            # 优先连接 Concept 或 Location
-            candidates = entities.get("Concept", []) + entities.get("Location", [])
-            if candidates:
-                # 补充一个弱连接，保证图谱连通
-                forced_triplet = [candidates[0], "相关于", CORE_CONCEPT]
-                triplets.append(forced_triplet)
-
-        all_triplets.append({"id": it.get('id'), "text": text, "triplets": triplets})
-
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(all_triplets, f, ensure_ascii=False, indent=2)
+    # 如果没有实体或已完成，跳过
+    todo = (it for it in iter_records(input_json)
+            if any(it.get('entities').values()) and it.get('id') not in done)
+    records = ordered_map(partial(extract_item, model=model), todo, workers=concurrency)
+    with open_writer(output_json, resume=resume) as w:
+        for record in tqdm(records, desc='Relation Extraction'):
+            if record is not None:
+                w.write(record)
     print('关系抽取完成。已保存至', output_json)
 
 def main():
@@ -263,8 +259,19 @@ def main():
     p.add_argument('--input', '-i', default='entities_extracted.json')
     p.add_argument('--output', '-o', default='triplets_final.json')
     p.add_argument('--model', '-m', default=None)
+    p.add_argument('--resume', action='store_true', help='保留输出中已完成的记录，只处理剩余的块')
+    p.add_argument('--concurrency', '-c', type=int, default=1, help='同时在途的 LLM 请求数（线程池）')
+    p.add_argument('--cache', default=None, help='LLM 响应缓存路径（SQLite），相同请求直接复用已缓存的响应')
+    p.add_argument('--cache-only', action='store_true', help='只从缓存回放，未命中时报错，不访问网络')
+    p.add_argument('--cache-ttl', type=float, default=None, help='缓存条目有效期（秒），默认不过期')
+    p.add_argument('--cache-max-mb', type=int, default=512, help='缓存大小上限 (MB)，超出后淘汰最久未用条目')
     args = p.parse_args()
-    run(args.input, args.output, model=args.model)
+    if args.cache or args.cache_only:
+        configure_cache(args.cache, ttl=args.cache_ttl, max_mb=args.cache_max_mb, cache_only=args.cache_only)
+    run(args.input, args.output, model=args.model, resume=args.resume, concurrency=args.concurrency)
+    cache = get_cache()
+    if cache is not None:
+        print(cache.summary())
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,173 @@
+"""基于依存句法模式的规则关系抽取（src 版本）"""
+import argparse
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, List
+
+try:
+    from src.jsonl_io import iter_records, open_writer
+except ImportError:
+    from jsonl_io import iter_records, open_writer
+try:
+    from src.spacy_nlp import analyze_many
+except ImportError:
+    from spacy_nlp import analyze_many
+try:
+    from src.syntax_format import iter_tokens
+except ImportError:
+    from syntax_format import iter_tokens
+
+SUBJ_DEPS = {'nsubj', 'nsubj:xsubj', 'csubj'}
+PASS_SUBJ_DEPS = {'nsubjpass', 'nsubj:pass'}
+AGENT_DEPS = {'nmod:agent', 'obl:agent'}
+OBJ_DEPS = {'dobj', 'obj', 'attr'}
+PHRASE_DEPS = {'compound:nn', 'compound', 'amod', 'nmod:assmod', 'nmod', 'name', 'flat', 'nummod', 'amod:ordmod'}
+INHERIT_DEPS = {'conj', 'xcomp', 'ccomp'}
+NOMINAL_POS = {'NOUN', 'PROPN'}
+PRED_POS = {'VERB'}
+MAX_PHRASE_TOKENS = 8
+
+
+def _contiguous_span(ids, center):
+    lo = hi = center
+    while lo - 1 in ids:
+        lo -= 1
+    while hi + 1 in ids:
+        hi += 1
+    lo = max(lo, center - MAX_PHRASE_TOKENS + 1)
+    return range(lo, hi + 1)
+
+
+def _phrase(tok, by_i, children):
+    ids = {tok['i']}
+    stack = [tok]
+    while stack:
+        t = stack.pop()
+        for c in children.get(t['i'], ()):
+            if c['dep'] in PHRASE_DEPS:
+                ids.add(c['i'])
+                stack.append(c)
+            elif c['dep'] == 'case' and t['dep'] == 'nmod:assmod':
+                ids.add(c['i'])
+    return ''.join(by_i[i]['text'] for i in _contiguous_span(ids, tok['i']) if i in by_i).strip()
+
+
+def _predicate(tok, children):
+    parts = [tok] + [c for c in children.get(tok['i'], ()) if c['dep'] in ('compound:vc', 'neg')]
+    return ''.join(t['text'] for t in sorted(parts, key=lambda t: t['i']))
+
+
+def _expand_conj(toks, children):
+    out = []
+    stack = list(toks)
+    seen = set()
+    while stack:
+        t = stack.pop(0)
+        if t['i'] in seen:
+            continue
+        seen.add(t['i'])
+        out.append(t)
+        stack.extend(c for c in children.get(t['i'], ()) if c['dep'] == 'conj' and c['pos'] in NOMINAL_POS)
+    return out
+
+
+def _deps_of(tok, children, deps):
+    return [c for c in children.get(tok['i'], ()) if c['dep'] in deps]
+
+
+def _subjects(tok, by_i, children):
+    seen = set()
+    cur = tok
+    while cur['i'] not in seen:
+        seen.add(cur['i'])
+        subs = _deps_of(cur, children, SUBJ_DEPS)
+        if subs:
+            return subs
+        if cur['dep'] not in INHERIT_DEPS or cur['head_i'] not in by_i:
+            break
+        cur = by_i[cur['head_i']]
+    return []
+
+
+def extract_from_tokens(tokens: List[Dict[str, Any]]) -> List[List[str]]:
+    by_i = {t['i']: t for t in tokens}
+    children = defaultdict(list)
+    for t in tokens:
+        if t['head_i'] != t['i']:
+            children[t['head_i']].append(t)
+    triplets = []
+    seen = set()
+
+    def _add(h_tok, rel, t_tok):
+        if h_tok['pos'] not in NOMINAL_POS or t_tok['pos'] not in NOMINAL_POS:
+            return
+        h = _phrase(h_tok, by_i, children)
+        t = _phrase(t_tok, by_i, children)
+        if not h or not t or not rel or h == t:
+            return
+        key = (h, rel, t)
+        if key not in seen:
+            seen.add(key)
+            triplets.append([h, rel, t])
+    for tok in tokens:
+        cops = _deps_of(tok, children, {'cop'})
+        if cops:
+            subs = _expand_conj(_subjects(tok, by_i, children), children)
+            for s in subs:
+                for o in _expand_conj([tok], children):
+                    _add(s, cops[0]['text'], o)
+            continue
+        if tok['pos'] not in PRED_POS:
+            continue
+        rel = _predicate(tok, children)
+        objs = _expand_conj(_deps_of(tok, children, OBJ_DEPS), children)
+        if objs:
+            for s in _expand_conj(_subjects(tok, by_i, children), children):
+                for o in objs:
+                    _add(s, rel, o)
+        agents = _expand_conj(_deps_of(tok, children, AGENT_DEPS), children)
+        for x in _expand_conj(_deps_of(tok, children, PASS_SUBJ_DEPS), children):
+            for a in agents:
+                _add(a, rel, x)
+    return triplets
+
+
+def extract_triplets(syntax: Dict[str, Any]) -> List[List[str]]:
+    if not isinstance(syntax, dict):
+        return []
+    if syntax.get('scope') == 'sentence':
+        out = []
+        for s in syntax.get('sentences') or []:
+            for tri in extract_triplets(s.get('syntax')):
+                if tri not in out:
+                    out.append(tri)
+        return out
+    return extract_from_tokens(list(iter_tokens(syntax)))
+
+
+def run(input_json, output_json, model=None, batch_size=64, n_process=1, profile=None):
+    items, for_text = itertools.tee(iter_records(input_json))
+    texts = (it.get('text') for it in for_text)
+    syntaxes = analyze_many(texts, model_name=model, batch_size=batch_size, n_process=n_process, profile=profile)
+    with open_writer(output_json) as w:
+        for it, syntax in zip(items, syntaxes):
+            w.write({'id': it.get('id'), 'text': it.get('text'), 'triplets': extract_triplets(syntax)})
+    print('Saved', w.count, 'rule-based triplet records to', output_json)
+    return w.count
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', '-i', default='processed_texts.json')
+    p.add_argument('--output', '-o', default='triplets_final.json')
+    p.add_argument('--model', '-m', default=None)
+    p.add_argument('--syntax-profile', default='fast')
+    p.add_argument('--batch-size', type=int, default=64)
+    p.add_argument('--n-process', type=int, default=1)
+    args = p.parse_args()
+    run(args.input, args.output, model=args.model, batch_size=args.batch_size,
+        n_process=args.n_process, profile=args.syntax_profile)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,49 @@
 """spaCy 中文句法分析工具（src 版本）"""
-from typing import Dict
+import functools
+import itertools
+import json
+import os
+import threading
+from importlib import metadata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+DEFAULT_MODEL_CANDIDATES = ("zh_core_web_trf", "zh_core_web_sm")
 
-def analyze_sentence_syntax(text: str, model_name: str = None) -> Dict[str, object]:
-    if not isinstance(text, str) or not text.strip():
-        return {'tokens': [], 'dep': '', 'con_pos': '', 'dep_triples': []}
+SYNTAX_PROFILES: Dict[str, Dict[str, object]] = {
+    'fast': {'model': 'zh_core_web_sm', 'exclude': ('ner',)},
+    'accurate': {'model': 'zh_core_web_trf', 'exclude': ('ner',)},
+    'tokens-only': {
+        'model': 'zh_core_web_sm',
+        'exclude': ('transformer', 'tok2vec', 'tagger', 'parser', 'attribute_ruler', 'ner'),
+    },
+}
+
+RegistryKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+_NLP_REGISTRY: Dict[RegistryKey, object] = {}
+_NLP_REGISTRY_LOCK = threading.Lock()
+
+
+def _registry_key(model_name: Optional[str],
+                  disable: Optional[Iterable[str]],
+                  exclude: Optional[Iterable[str]] = None) -> RegistryKey:
+    return (model_name or '', tuple(sorted(set(disable or ()))), tuple(sorted(set(exclude or ()))))
+
+
+def resolve_profile(model_name: str = None, profile: str = None) -> Tuple[Optional[str], Tuple[str, ...]]:
+    if not profile:
+        return model_name, ()
+    if profile not in SYNTAX_PROFILES:
+        raise ValueError(f'未知 syntax profile: {profile}，可选: {", ".join(SYNTAX_PROFILES)}')
+    conf = SYNTAX_PROFILES[profile]
+    return model_name or conf['model'], tuple(conf['exclude'])
+
+
+def _model_candidates(model_name: Optional[str]) -> Tuple[str, ...]:
+    return (model_name,) if model_name else DEFAULT_MODEL_CANDIDATES
+
+
+def _load_model(model_name: Optional[str], disable: Tuple[str, ...], exclude: Tuple[str, ...] = ()):
     try:
         import spacy
     except Exception as e:
@@ -12,26 +51,171 @@ def analyze_sentence_syntax(text: str, model_name: str = None) -> Dict[str, obje
             "spaCy 未安装。请先运行: pip install -U spacy；\n"
             "然后下载中文模型，例如: python -m spacy download zh_core_web_sm"
         ) from e
-    candidates = []
-    if model_name:
-        candidates.append(model_name)
-    candidates.extend(["zh_core_web_trf", "zh_core_web_sm"])
-    nlp = None
     last_err = None
-    for m in candidates:
+    for m in _model_candidates(model_name):
         try:
-            nlp = spacy.load(m)
-            break
+            return spacy.load(m, disable=list(disable), exclude=list(exclude))
         except Exception as e:
             last_err = e
             continue
-    if nlp is None:
+    if model_name:
         raise RuntimeError(
-            "找不到可用的 spaCy 中文模型。请安装并下载一个中文模型，例如:\n"
-            "pip install -U spacy\n"
-            "python -m spacy download zh_core_web_sm\n"
+            f"spaCy 模型 {model_name} 不可用（指定模型或 syntax profile 时不会回退到其他模型）。请先下载:\n"
+            f"python -m spacy download {model_name}"
         ) from last_err
-    doc = nlp(text)
+    raise RuntimeError(
+        "找不到可用的 spaCy 中文模型。请安装并下载一个中文模型，例如:\n"
+        "pip install -U spacy\n"
+        "python -m spacy download zh_core_web_sm\n"
+    ) from last_err
+
+
+def get_nlp(model_name: str = None,
+            disable: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            profile: str = None):
+    model_name, profile_exclude = resolve_profile(model_name, profile)
+    key = _registry_key(model_name, disable, tuple(exclude or ()) + profile_exclude)
+    nlp = _NLP_REGISTRY.get(key)
+    if nlp is not None:
+        return nlp
+    with _NLP_REGISTRY_LOCK:
+        nlp = _NLP_REGISTRY.get(key)
+        if nlp is None:
+            nlp = _load_model(model_name, key[1], key[2])
+            _NLP_REGISTRY[key] = nlp
+    return nlp
+
+
+def warm_up(model_name: str = None,
+            disable: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            profile: str = None):
+    nlp = get_nlp(model_name, disable, exclude, profile)
+    nlp("")
+    return nlp
+
+
+def release(model_name: str = None, disable: Iterable[str] = None) -> int:
+    with _NLP_REGISTRY_LOCK:
+        if model_name is None and disable is None:
+            n = len(_NLP_REGISTRY)
+            _NLP_REGISTRY.clear()
+            return n
+        if disable is None:
+            keys = [k for k in _NLP_REGISTRY if k[0] == (model_name or '')]
+        else:
+            keys = [k for k in _NLP_REGISTRY if k[:2] == _registry_key(model_name, disable)[:2]]
+        n = 0
+        for k in keys:
+            if _NLP_REGISTRY.pop(k, None) is not None:
+                n += 1
+        return n
+
+
+def _model_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except Exception:
+        pass
+    meta_path = os.path.join(name, 'meta.json')
+    if os.path.isfile(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return str(json.load(f).get('version') or 'unknown')
+        except Exception:
+            return 'unknown'
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def model_identity(model_name: str = None, profile: str = None) -> str:
+    model_name, exclude = resolve_profile(model_name, profile)
+    ident = f"{model_name or 'default'}@unknown"
+    for m in _model_candidates(model_name):
+        ver = _model_version(m)
+        if ver:
+            ident = f'{m}@{ver}'
+            break
+    if exclude:
+        ident += '|exclude=' + ','.join(sorted(exclude))
+    return ident
+
+
+def loaded_models() -> List[RegistryKey]:
+    with _NLP_REGISTRY_LOCK:
+        return list(_NLP_REGISTRY)
+
+
+def analyze_sentence_syntax(text: str,
+                            model_name: str = None,
+                            profile: str = None,
+                            cache=None) -> Dict[str, object]:
+    if not isinstance(text, str) or not text.strip():
+        return _empty_result()
+    if cache is not None:
+        model_id = model_identity(model_name, profile)
+        cached = cache.get(text, model_id)
+        if cached is not None:
+            return cached
+    nlp = get_nlp(model_name, profile=profile)
+    res = _doc_to_result(nlp(text))
+    if cache is not None:
+        cache.put(text, model_id, res)
+    return res
+
+
+def analyze_many(texts: Iterable[str],
+                 model_name: str = None,
+                 batch_size: int = 64,
+                 n_process: int = 1,
+                 profile: str = None,
+                 cache=None) -> Iterator[Dict[str, object]]:
+    if cache is not None:
+        yield from _analyze_many_cached(texts, model_name, batch_size, n_process, profile, cache)
+        return
+    nlp = get_nlp(model_name, profile=profile)
+    pairs = (
+        (t, True) if isinstance(t, str) and t.strip() else ('', False)
+        for t in texts
+    )
+    for doc, valid in nlp.pipe(pairs, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield _doc_to_result(doc) if valid else _empty_result()
+
+
+def _analyze_many_cached(texts, model_name, batch_size, n_process, profile, cache):
+    model_id = model_identity(model_name, profile)
+    window_size = max(1, batch_size) * max(1, n_process) * 4
+    it = iter(texts)
+    while True:
+        window = list(itertools.islice(it, window_size))
+        if not window:
+            break
+        results = []
+        missing = []
+        for idx, t in enumerate(window):
+            if not isinstance(t, str) or not t.strip():
+                results.append(_empty_result())
+                continue
+            cached = cache.get(t, model_id)
+            results.append(cached)
+            if cached is None:
+                missing.append(idx)
+        if missing:
+            nlp = get_nlp(model_name, profile=profile)
+            docs = nlp.pipe((window[i] for i in missing), batch_size=batch_size, n_process=n_process)
+            for idx, doc in zip(missing, docs):
+                res = _doc_to_result(doc)
+                cache.put(window[idx], model_id, res)
+                results[idx] = res
+        yield from results
+
+
+def _empty_result() -> Dict[str, object]:
+    return {'tokens': [], 'dep': '', 'con_pos': '', 'dep_triples': []}
+
+
+def _doc_to_result(doc) -> Dict[str, object]:
     tokens = []
     dep_parts = []
     con_pos_parts = []
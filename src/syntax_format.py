@@ -0,0 +1,104 @@
+"""句法分析结果的紧凑列式格式（src 版本）"""
+from typing import Any, Dict, List, Tuple
+
+COMPACT_FORMAT = 'compact'
+
+
+def is_compact(syntax: Any) -> bool:
+    return isinstance(syntax, dict) and syntax.get('format') == COMPACT_FORMAT
+
+
+def _intern(values: List[str]) -> Tuple[List[int], List[str]]:
+    table: Dict[str, int] = {}
+    idx = []
+    for v in values:
+        if v not in table:
+            table[v] = len(table)
+        idx.append(table[v])
+    return idx, list(table)
+
+
+def to_compact(syntax: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(syntax, dict) or is_compact(syntax) or 'tokens' not in syntax:
+        return syntax
+    tokens = syntax.get('tokens') or []
+    texts = [t.get('text', '') for t in tokens]
+    pos_idx, pos_labels = _intern([t.get('pos', '') for t in tokens])
+    tag_idx, tag_labels = _intern([t.get('tag', '') for t in tokens])
+    dep_idx, dep_labels = _intern([t.get('dep', '') for t in tokens])
+    ids = [t.get('i', n) for n, t in enumerate(tokens)]
+    out = {
+        'format': COMPACT_FORMAT,
+        'text': texts,
+        'pos': pos_idx,
+        'tag': tag_idx,
+        'dep': dep_idx,
+        'head': [t.get('head_i', t.get('i', n)) for n, t in enumerate(tokens)],
+        'labels': {'pos': pos_labels, 'tag': tag_labels, 'dep': dep_labels},
+    }
+    lemmas = [t.get('lemma', '') for t in tokens]
+    if lemmas != texts:
+        out['lemma'] = lemmas
+    if ids != list(range(len(tokens))):
+        out['i'] = ids
+    return out
+
+
+def iter_tokens(syntax: Dict[str, Any]):
+    if not is_compact(syntax):
+        yield from (syntax or {}).get('tokens') or []
+        return
+    texts = syntax.get('text') or []
+    labels = syntax.get('labels') or {}
+    pos_l, tag_l, dep_l = labels.get('pos', []), labels.get('tag', []), labels.get('dep', [])
+    ids = syntax.get('i') or list(range(len(texts)))
+    lemmas = syntax.get('lemma') or texts
+    text_by_i = dict(zip(ids, texts))
+    for n, text in enumerate(texts):
+        head_i = syntax['head'][n]
+        yield {
+            'text': text,
+            'lemma': lemmas[n],
+            'pos': pos_l[syntax['pos'][n]],
+            'tag': tag_l[syntax['tag'][n]],
+            'dep': dep_l[syntax['dep'][n]],
+            'i': ids[n],
+            'head_i': head_i,
+            'head_text': text_by_i.get(head_i, ''),
+        }
+
+
+def syntax_strings(syntax: Dict[str, Any]) -> Tuple[str, str]:
+    if not is_compact(syntax):
+        syntax = syntax or {}
+        return syntax.get('dep') or '', syntax.get('con_pos') or ''
+    labels = syntax.get('labels') or {}
+    pos_l, dep_l = labels.get('pos', []), labels.get('dep', [])
+    texts = syntax.get('text') or []
+    dep = ' -> '.join(f"{t}({dep_l[d]})" for t, d in zip(texts, syntax.get('dep') or []))
+    con_pos = ' '.join(f"{t}({pos_l[p]})" for t, p in zip(texts, syntax.get('pos') or []))
+    return dep, con_pos
+
+
+def to_full(syntax: Dict[str, Any]) -> Dict[str, Any]:
+    if not is_compact(syntax):
+        return syntax
+    tokens = list(iter_tokens(syntax))
+    dep, con_pos = syntax_strings(syntax)
+    dep_triples = [
+        {'head_i': t['head_i'], 'head_text': t['head_text'], 'dep': t['dep'],
+         'child_i': t['i'], 'child_text': t['text']}
+        for t in tokens
+    ]
+    return {'tokens': tokens, 'dep': dep, 'con_pos': con_pos, 'dep_triples': dep_triples}
+
+
+def convert_syntax(syntax: Any, fmt: str = None) -> Any:
+    if isinstance(syntax, dict) and syntax.get('scope') == 'sentence':
+        sentences = [dict(s, syntax=convert_syntax(s.get('syntax'), fmt)) for s in syntax.get('sentences') or []]
+        return dict(syntax, sentences=sentences)
+    if fmt == COMPACT_FORMAT:
+        return to_compact(syntax)
+    if fmt == 'full':
+        return to_full(syntax)
+    return syntax
@@ -0,0 +1,126 @@
+"""分块使用的 token 计数服务（src 版本）"""
+import bisect
+import itertools
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+DEFAULT_ENCODING = 'cl100k_base'
+
+ESTIMATOR_COEFFS = {'cjk': 1.2, 'word': 0.25, 'other': 0.8}
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]')
+_WORD_RE = re.compile(r'[A-Za-z0-9_]')
+_SPACE_RE = re.compile(r'\s')
+
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = DEFAULT_ENCODING):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def _char_classes(text: str) -> Tuple[int, int, int]:
+    cjk = len(_CJK_RE.findall(text))
+    word = len(_WORD_RE.findall(text))
+    other = len(text) - cjk - word - len(_SPACE_RE.findall(text))
+    return cjk, word, other
+
+
+def estimate_tokens_fast(text: str, coeffs: Optional[Dict[str, float]] = None) -> int:
+    c = coeffs or ESTIMATOR_COEFFS
+    cjk, word, other = _char_classes(text)
+    return max(1, round(cjk * c['cjk'] + word * c['word'] + other * c['other']))
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    return count_tokens_batch([text], encoding)[0]
+
+
+def count_tokens_batch(texts: Sequence[str], encoding: str = DEFAULT_ENCODING) -> List[int]:
+    enc = get_encoder(encoding)
+    if enc is not None and texts:
+        try:
+            return [len(ids) for ids in enc.encode_ordinary_batch(list(texts))]
+        except Exception:
+            pass
+    return [estimate_tokens_fast(t) for t in texts]
+
+
+def prefix_sums(counts: Iterable[int]) -> List[int]:
+    return list(itertools.accumulate(counts, initial=0))
+
+
+def chunk_boundaries(counts: Sequence[int], max_tokens: int = 512) -> List[Tuple[int, int]]:
+    prefix = prefix_sums(counts)
+    n = len(counts)
+    out = []
+    start = 0
+    while start < n:
+        end = bisect.bisect_right(prefix, prefix[start] + max_tokens, lo=start + 1) - 1
+        end = max(end, start + 1)
+        out.append((start, end))
+        start = end
+    return out
+
+
+def _overlap_start(prefix: List[int], start: int, end: int, overlap_sentences: int, overlap_tokens: int) -> int:
+    nxt = start
+    if overlap_sentences:
+        nxt = max(nxt, end - overlap_sentences)
+    if overlap_tokens:
+        nxt = max(nxt, bisect.bisect_left(prefix, prefix[end] - overlap_tokens, lo=start, hi=end))
+    return max(nxt, start + 1)
+
+
+def pack_boundaries(counts: Sequence[int], max_tokens: int = 512,
+                    overlap_sentences: int = 0, overlap_tokens: int = 0) -> List[Tuple[int, int]]:
+    if not overlap_sentences and not overlap_tokens:
+        return chunk_boundaries(counts, max_tokens)
+    prefix = prefix_sums(counts)
+    n = len(counts)
+    out = []
+    start = 0
+    while start < n:
+        end = bisect.bisect_right(prefix, prefix[start] + max_tokens, lo=start + 1) - 1
+        end = max(end, start + 1)
+        out.append((start, end))
+        if end >= n:
+            break
+        nxt = _overlap_start(prefix, start, end, overlap_sentences, overlap_tokens)
+        start = bisect.bisect_left(prefix, prefix[end + 1] - max_tokens, lo=nxt, hi=end)
+    return out
+
+
+def calibrate(samples: Sequence[str], encoding: str = DEFAULT_ENCODING) -> Dict[str, float]:
+    enc = get_encoder(encoding)
+    if enc is None:
+        raise RuntimeError('calibrate 需要安装 tiktoken')
+    rows = [_char_classes(s) for s in samples]
+    ys = [len(ids) for ids in enc.encode_ordinary_batch(list(samples))]
+    xtx = [[sum(r[i] * r[j] for r in rows) for j in range(3)] for i in range(3)]
+    xty = [sum(r[i] * y for r, y in zip(rows, ys)) for i in range(3)]
+
+    def det(m):
+        return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+                - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+    d = det(xtx)
+    if abs(d) < 1e-9:
+        raise ValueError('样本需同时包含中日韩字符、ASCII 词字符与其他符号')
+    coeffs = []
+    for k in range(3):
+        m = [row[:] for row in xtx]
+        for i in range(3):
+            m[i][k] = xty[i]
+        coeffs.append(det(m) / d)
+    return dict(zip(('cjk', 'word', 'other'), coeffs))
@@ -0,0 +1,135 @@
+"""句法分析结果的持久化缓存（SQLite）
+
+键 = sha256(模型标识 + 归一化文本)，模型标识包含模型名、版本与排除组件（见
+`spacy_nlp.model_identity`），因此换模型或升级模型版本会自动失效。
+缓存总大小超过 `max_bytes` 时按最近访问时间淘汰最旧的条目，并统计命中/未命中次数。
+
+用法示例:
+    from syntax_cache import SyntaxCache
+    cache = SyntaxCache('syntax_cache.sqlite')
+    res = analyze_sentence_syntax(text, cache=cache)
+    print(cache.stats())
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 淘汰时清理到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """缓存键使用的文本归一化：统一换行与 Unicode 形式，去掉行尾多余空白。"""
+    return unicodedata.normalize('NFC', text.replace('\r\n', '\n')).rstrip()
+
+
+def make_key(text: str, model_id: str) -> str:
+    h = hashlib.sha256()
+    h.update(model_id.encode('utf-8'))
+    h.update(b'\0')
+    h.update(normalize_text(text).encode('utf-8'))
+    return h.hexdigest()
+
+
+class SyntaxCache:
+    """以 SQLite 存储的句法分析结果缓存，可在多个线程间共享。"""
+
+    def __init__(self, path: str = 'syntax_cache.sqlite', max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS syntax_cache ('
+            ' key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_syntax_cache_accessed ON syntax_cache(accessed)')
+        self._conn.commit()
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM syntax_cache').fetchone()
+        self._total_bytes = int(row[0])
+
+    def get(self, text: str, model_id: str) -> Optional[Dict[str, object]]:
+        key = make_key(text, model_id)
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM syntax_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE syntax_cache SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, text: str, model_id: str, result: Dict[str, object]) -> None:
+        key = make_key(text, model_id)
+        value = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM syntax_cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO syntax_cache (key, model, value, size, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, model_id, value, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                'SELECT key, size FROM syntax_cache ORDER BY accessed ASC LIMIT 1000'
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            doomed = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                doomed.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany('DELETE FROM syntax_cache WHERE key = ?', doomed)
+            self.evictions += len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM syntax_cache')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM syntax_cache').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': self._total_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,47 @@
+from boilerplate import detect_boilerplate, normalize_line, strip_boilerplate
+
+
+def _pages(n):
+    topics = ['生态保护', '交通组织', '公共服务', '历史文化', '产业布局', '住房保障', '防灾减灾', '市政设施', '绿地系统', '城市设计']
+    pages = []
+    for k in range(1, n + 1):
+        topic = topics[(k - 1) % len(topics)]
+        body = f'本节说明{topic}的总体目标。\n规划要求统筹推进{topic}相关工作。'
+        pages.append(f'某市国土空间总体规划（2021-2035年）\n{body}\n某市人民政府 第 {k} 页')
+    return pages
+
+
+def test_detects_running_header_and_footer_with_varying_numbers():
+    found = detect_boilerplate(_pages(10))
+    assert normalize_line('某市国土空间总体规划（2021-2035年）') in found
+    assert normalize_line('某市人民政府 第 3 页') in found
+    assert not any('生态保护' in p or '总体目标' in p for p in found)
+
+
+def test_strip_reports_removed_chars_and_tokens():
+    pages, stats = strip_boilerplate(_pages(10))
+    assert all('人民政府' not in p and '总体规划' not in p for p in pages)
+    assert all('总体目标' in p and '规划要求' in p for p in pages)
+    assert stats['lines_removed'] == 20
+    assert stats['chars_removed'] > 0 and stats['tokens_removed'] > 0
+
+
+def test_too_few_pages_detects_nothing():
+    assert detect_boilerplate(_pages(2)) == set()
+
+
+def test_numeric_value_line_mid_page_survives():
+    pages = []
+    for k, page in enumerate(_pages(10), 1):
+        header, first, second, footer = page.split('\n')
+        # 每页正文中间一行不同的指标值，归一化后都是 "#.#%"
+        pages.append('\n'.join([header, first, '绿地率指标如下', f'{k + 1}.{k}%', '详见附表说明', second, footer]))
+    found = detect_boilerplate(pages)
+    assert normalize_line('2.1%') not in found
+    stripped, _ = strip_boilerplate(pages)
+    assert all(f'{k + 1}.{k}%' in p for k, p in enumerate(stripped, 1))
+    # 出现在页首/页尾位置的纯数字行仍会被识别
+    numbered = [f'- {k} -\n{p}' for k, p in enumerate(pages, 1)]
+    stripped, _ = strip_boilerplate(numbered, patterns={normalize_line('- 1 -'), normalize_line('2.1%')})
+    assert not any(p.startswith('- ') for p in stripped)
+    assert all(f'{k + 1}.{k}%' in p for k, p in enumerate(stripped, 1))
@@ -0,0 +1,50 @@
+import pytest
+
+from chunk_triage import route_score, score_chunk, summarize, triage
+
+
+def _tok(i, text, pos, dep, head):
+    return {'text': text, 'lemma': text, 'pos': pos, 'tag': '', 'dep': dep, 'i': i, 'head_i': head, 'head_text': ''}
+
+
+def _syntax(toks):
+    by_i = {t['i']: t['text'] for t in toks}
+    for t in toks:
+        t['head_text'] = by_i[t['head_i']]
+    return {'tokens': toks}
+
+
+# 政府 加强 城市 基础设施 建设 。
+RELATIONAL = _syntax([
+    _tok(0, '政府', 'NOUN', 'nsubj', 1),
+    _tok(1, '加强', 'VERB', 'ROOT', 1),
+    _tok(2, '城市', 'NOUN', 'compound:nn', 4),
+    _tok(3, '基础设施', 'NOUN', 'compound:nn', 4),
+    _tok(4, '建设', 'NOUN', 'dobj', 1),
+    _tok(5, '。', 'PUNCT', 'punct', 1),
+])
+
+# 表 3 2019 2020 12.5
+TABLE = _syntax([
+    _tok(0, '表', 'NOUN', 'ROOT', 0),
+    _tok(1, '3', 'NUM', 'nummod', 0),
+    _tok(2, '2019', 'NUM', 'dep', 0),
+    _tok(3, '2020', 'NUM', 'dep', 0),
+    _tok(4, '12.5', 'NUM', 'dep', 0),
+])
+
+
+def test_relational_chunk_outscores_table():
+    assert score_chunk(RELATIONAL) >= 0.35
+    assert score_chunk(TABLE) < 0.1
+    assert score_chunk({'tokens': []}) == 0.0
+
+
+def test_routes_and_avoided_calls():
+    items = [{'id': 1}, {'id': 2}, {'id': 3}]
+    decisions = triage(items, [RELATIONAL, TABLE, {'tokens': []}])
+    assert [d['route'] for d in decisions] == ['llm', 'skip', 'skip']
+    assert summarize(decisions) == {'llm': 1, 'rules': 0, 'skip': 2, 'llm_calls_avoided': 4}
+    assert route_score(0.2, llm_threshold=0.35, skip_threshold=0.1) == 'rules'
+    with pytest.raises(ValueError):
+        triage(items, [], llm_threshold=0.1, skip_threshold=0.5)
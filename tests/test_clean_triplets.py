@@ -0,0 +1,20 @@
+import json
+
+from clean_triplets import clean_triplets
+
+
+def test_overlap_region_triplets_deduplicated(tmp_path):
+    data = [
+        {'id': 1, 'text': '政府推进老城更新。新区建设公园。', 'triplets': [['政府', '推进', '老城'], ['新区', '建设', '公园']]},
+        # 第 2 块开头 7 个字符（“新区建设公园。”）与第 1 块重叠
+        {'id': 2, 'text': '新区建设公园。政府推进老城更新。', 'overlap_chars': 7,
+         'triplets': [['新区', '建设', '公园'], ['政府', '推进', '老城']]},
+    ]
+    src, out = tmp_path / 'in.json', tmp_path / 'out.json'
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    stats = clean_triplets(str(src), str(out))
+    cleaned = json.loads(out.read_text(encoding='utf-8'))
+    # 重叠区内的重复关系被去掉；重叠区外再次出现的关系保留
+    assert cleaned[1]['triplets'] == [['政府', '推进', '老城']]
+    assert cleaned[1]['overlap_chars'] == 7
+    assert stats['removed']['overlap_dup'] == 1
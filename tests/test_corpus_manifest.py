@@ -0,0 +1,46 @@
+import os
+
+from corpus_manifest import CorpusManifest
+
+
+def _write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_diff_allocate_and_tombstone(tmp_path):
+    a = _write(tmp_path / 'a.txt', '城市更新。')
+    b = _write(tmp_path / 'b.txt', '生态保护。')
+    mpath = str(tmp_path / 'm.json')
+    settings = {'max_tokens': 512}
+
+    m = CorpusManifest(mpath, settings)
+    unchanged, todo, deleted = m.diff([a, b])
+    assert (unchanged, todo, deleted) == ([], [a, b], [])
+    m.record(a, m.allocate(2))
+    m.record(b, m.allocate(1))
+    m.save()
+
+    # b 只被 touch（内容不变），a 内容变化，再新增 c
+    st = os.stat(b)
+    os.utime(b, (st.st_atime, st.st_mtime + 10))
+    _write(tmp_path / 'a.txt', '城市更新行动。')
+    c = _write(tmp_path / 'c.txt', '公共服务。')
+    m = CorpusManifest(mpath, settings)
+    unchanged, todo, deleted = m.diff([a, b, c])
+    assert unchanged == [b] and todo == [a, c] and deleted == []
+    assert m.allocate(1) == [4]
+
+    m.tombstone('b.txt')
+    assert 'b.txt' not in m.files and m.tombstones['b.txt']['chunk_ids'] == [3]
+
+
+def test_settings_change_invalidates_but_keeps_next_id(tmp_path):
+    a = _write(tmp_path / 'a.txt', '城市更新。')
+    mpath = str(tmp_path / 'm.json')
+    m = CorpusManifest(mpath, {'max_tokens': 512})
+    m.record(a, m.allocate(5))
+    m.save()
+    m = CorpusManifest(mpath, {'max_tokens': 256})
+    assert m.reset_reason and m.files == {}
+    assert m.allocate(1) == [6]
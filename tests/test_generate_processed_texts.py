@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from test_pdf_page_cache import _write_pdf
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_spec = importlib.util.spec_from_file_location('generate_processed_texts',
+                                               os.path.join(ROOT, 'scripts', 'generate_processed_texts.py'))
+gpt = importlib.util.module_from_spec(_spec)
+# 进程池按模块名序列化任务函数，子进程需要能找到该模块
+sys.modules[_spec.name] = gpt
+_spec.loader.exec_module(gpt)
+
+
+def _corpus(tmp_path, n=6):
+    d = tmp_path / 'input'
+    d.mkdir()
+    for i in range(n):
+        # 文件大小差别很大，各进程的完成顺序与提交顺序不同
+        body = f'第{i}号文件规划推进城市更新。' * (1 + 40 * (n - i))
+        (d / f'f{i}.txt').write_text(f'城市更新规划\n{body}\f城市更新规划\n公共服务设施建设！', encoding='utf-8')
+    return str(d)
+
+
+def _run(input_dir, out, **kw):
+    return gpt.process_all_txt(input_dir, str(out), max_tokens=40, **kw)
+
+
+def test_ids_follow_file_order_when_workers_finish_out_of_order(tmp_path, monkeypatch):
+    input_dir = _corpus(tmp_path)
+    serial = _run(input_dir, tmp_path / 'serial.json')
+    finished = []
+    file_task = gpt._file_task
+
+    def slow_first(task):
+        # 排在前面的文件等待更久，完成顺序与提交顺序相反
+        name = os.path.basename(task[0])
+        time.sleep(0.05 * (6 - int(name[1])))
+        out = file_task(task)
+        finished.append(name)
+        return out
+
+    monkeypatch.setattr(gpt, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(gpt, '_file_task', slow_first)
+    pooled = _run(input_dir, tmp_path / 'pooled.json', workers=6)
+    assert finished[0] != 'f0.txt'
+    assert pooled == serial
+    assert [it['id'] for it in pooled] == list(range(1, len(pooled) + 1))
+    assert [it['file'] for it in pooled] == sorted(it['file'] for it in pooled)
+
+
+@pytest.mark.parametrize('strip', [False, True])
+def test_worker_count_does_not_change_output(tmp_path, strip):
+    input_dir = _corpus(tmp_path)
+    one, many = tmp_path / 'one.json', tmp_path / 'many.json'
+    _run(input_dir, one, workers=1, strip_repeated=strip)
+    _run(input_dir, many, workers=3, strip_repeated=strip)
+    assert one.read_text(encoding='utf-8') == many.read_text(encoding='utf-8')
+
+
+def test_pdf_input_through_pool(tmp_path):
+    pytest.importorskip('pdfplumber')
+    input_dir = _corpus(tmp_path, n=3)
+    for i in range(2):
+        _write_pdf(tmp_path / 'input' / f'plan{i}.pdf',
+                   [[f'Plan {i} keeps the old town.', 'Riverside space is restored.'],
+                    ['Public facilities are upgraded!']])
+    one, many = tmp_path / 'one.json', tmp_path / 'many.json'
+    serial = _run(input_dir, one, workers=1)
+    _run(input_dir, many, workers=3)
+    assert one.read_text(encoding='utf-8') == many.read_text(encoding='utf-8')
+    assert [it['file'] for it in serial if it['file'].endswith('.pdf')][0] == 'plan0.pdf'
+    assert any('Plan 1 keeps the old town.' in it['text'] for it in serial)
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import jsonl_io
+from jsonl_io import completed_ids, iter_records, open_writer, read_records, write_records
+
+ITEMS = [{'id': i, 'text': '城市更新' * (i % 7), 'entities': {'Location': ['滨江'] * (i % 3)}} for i in range(40)]
+
+
+def test_json_array_output_and_incremental_reader(tmp_path, monkeypatch):
+    path = tmp_path / 'p.json'
+    assert write_records(str(path), iter(ITEMS)) == len(ITEMS)
+    assert path.read_text(encoding='utf-8') == json.dumps(ITEMS, ensure_ascii=False, indent=2)
+    # 小读块迫使记录跨块解析
+    monkeypatch.setattr(jsonl_io, '_READ_BLOCK', 7)
+    assert read_records(str(path)) == ITEMS
+
+
+def test_jsonl_resume_after_truncated_write(tmp_path):
+    path = tmp_path / 'e.jsonl'
+    write_records(str(path), ITEMS)
+    raw = path.read_text(encoding='utf-8')
+    path.write_text(raw[:len(raw) // 2], encoding='utf-8')
+
+    done = completed_ids(str(path))
+    partial = read_records(str(path))
+    assert partial == ITEMS[:len(partial)] and done == {it['id'] for it in partial}
+    with open_writer(str(path), resume=True) as w:
+        for it in ITEMS:
+            if it['id'] not in done:
+                w.write(it)
+    assert list(iter_records(str(path))) == ITEMS
+
+
+def test_truncated_json_array_keeps_complete_records(tmp_path):
+    path = tmp_path / 'p.json'
+    write_records(str(path), ITEMS)
+    raw = path.read_text(encoding='utf-8')
+    path.write_text(raw[:len(raw) // 3], encoding='utf-8')
+    partial = list(iter_records(str(path), partial=True))
+    assert 0 < len(partial) < len(ITEMS) and partial == ITEMS[:len(partial)]
+    with open_writer(str(path), resume=True) as w:
+        for it in ITEMS[len(partial):]:
+            w.write(it)
+    assert path.read_text(encoding='utf-8') == json.dumps(ITEMS, ensure_ascii=False, indent=2)
+
+
+def test_json_array_left_open_when_writer_fails(tmp_path):
+    path = tmp_path / 'p.json'
+    with pytest.raises(RuntimeError):
+        with open_writer(str(path)) as w:
+            for it in ITEMS:
+                if it['id'] == 10:
+                    raise RuntimeError('中断')
+                w.write(it)
+    with pytest.raises(ValueError):
+        read_records(str(path))
+    assert completed_ids(str(path)) == {it['id'] for it in ITEMS[:10]}
+    with open_writer(str(path), resume=True) as w:
+        for it in ITEMS[10:]:
+            w.write(it)
+    assert path.read_text(encoding='utf-8') == json.dumps(ITEMS, ensure_ascii=False, indent=2)
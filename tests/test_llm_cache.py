@@ -0,0 +1,113 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+import llm_client
+import rate_limiter
+from llm_cache import CacheMiss, LLMCache, make_key
+
+MESSAGES = [{'role': 'system', 'content': '你是城市规划专家。'}, {'role': 'user', 'content': '政府推进\r\n老旧小区改造。'}]
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    for name in ('OPENAI_API_KEY', 'GRAPHRAG_CHAT_API_KEY', 'LLM_CACHE', 'LLM_CACHE_ONLY'):
+        monkeypatch.delenv(name, raising=False)
+    llm_cache.reset()
+    llm_client.reset_client()
+    rate_limiter.reset_limiter()
+    yield
+    llm_cache.reset()
+    llm_client.reset_client()
+    rate_limiter.reset_limiter()
+
+
+def test_key_is_canonical_and_covers_request_params():
+    reordered = [{'content': m['content'].replace('\r\n', '\n'), 'role': m['role']} for m in MESSAGES]
+    base = make_key('m', MESSAGES, 0, 1024)
+    assert make_key('m', reordered, 0.0, 1024) == base
+    assert make_key('m2', MESSAGES, 0, 1024) != base
+    assert make_key('m', MESSAGES, 0.1, 1024) != base
+    assert make_key('m', MESSAGES, 0, 2048) != base
+    assert make_key('m', MESSAGES, 0, 1024, {'type': 'json_object'}) != base
+
+
+def test_wal_ttl_and_stats(tmp_path, monkeypatch):
+    path = str(tmp_path / 'llm.sqlite')
+    cache = LLMCache(path, ttl=60)
+    assert sqlite3.connect(path).execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    key = make_key('m', MESSAGES)
+    assert cache.get(key) is None
+    cache.put(key, 'm', '{"Location": []}')
+    assert cache.get(key) == '{"Location": []}'
+
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now + 61)
+    assert cache.get(key) is None
+    st = cache.stats()
+    assert (st['hits'], st['misses'], st['expired'], st['entries']) == (1, 2, 1, 0)
+    assert st['hit_rate'] == pytest.approx(1 / 3)
+    cache.close()
+
+
+def test_size_eviction_keeps_recent(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.sqlite'), max_bytes=300)
+    for i in range(10):
+        cache.put(f'k{i}', 'm', '[["政府", "推进", "改造"]]' + str(i))
+    st = cache.stats()
+    assert st['bytes'] <= 300 and st['evictions'] > 0
+    assert cache.get('k9') is not None and cache.get('k0') is None
+    cache.close()
+
+
+def test_chat_replays_from_cache_without_network(tmp_path, monkeypatch, isolated):
+    calls = []
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+        def _create(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='[]'))])
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(llm_client, 'OpenAI', FakeOpenAI)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    path = str(tmp_path / 'llm.sqlite')
+    llm_cache.configure(path)
+    assert llm_client.chat(MESSAGES, model='m') == '[]'
+    assert llm_client.chat(MESSAGES, model='m') == '[]'
+    assert len(calls) == 1
+
+    # 回放模式：不需要 API Key，命中返回缓存内容，未命中抛出 CacheMiss
+    monkeypatch.delenv('OPENAI_API_KEY')
+    llm_client.reset_client()
+    llm_cache.configure(path, cache_only=True)
+    llm_client.ensure_ready()
+    assert llm_client.chat(MESSAGES, model='m') == '[]'
+    with pytest.raises(CacheMiss):
+        llm_client.chat(MESSAGES, model='other')
+    assert len(calls) == 1
+    assert llm_cache.get_cache().stats()['hits'] == 1
+
+
+def test_cache_only_async_client_replays_without_connecting(isolated, tmp_path, monkeypatch):
+    path = str(tmp_path / 'llm.sqlite')
+    with LLMCache(path) as cache:
+        cache.put(make_key('m', MESSAGES), 'm', '[]')
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    llm_cache.configure(path, cache_only=True)
+
+    async def replay():
+        # 回放模式返回的占位上下文同样支持 async with（Python 3.8/3.9 的 nullcontext 不支持）
+        async with llm_client.async_client() as client:
+            assert client is None
+            return await llm_client.achat(client, MESSAGES, model='m')
+
+    assert asyncio.run(replay()) == '[]'
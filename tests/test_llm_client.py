@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+import llm_client
+import rate_limiter
+
+
+class FakeOpenAI:
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = []
+        self.failures = 0
+        FakeOpenAI.instances.append(self)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('reset')
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='[]'))])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeOpenAI.instances = []
+    monkeypatch.setattr(llm_client, 'OpenAI', FakeOpenAI)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setenv('GRAPHRAG_API_BASE', 'http://127.0.0.1:9/v1')
+    monkeypatch.delenv('LLM_CACHE', raising=False)
+    llm_cache.reset()
+    llm_client.reset_client()
+    rate_limiter.reset_limiter()
+    yield
+    llm_client.reset_client()
+    rate_limiter.reset_limiter()
+
+
+def test_single_client_reused_across_calls(fake_client):
+    for _ in range(3):
+        assert llm_client.chat([{'role': 'user', 'content': 'x'}], model='m') == '[]'
+    assert len(FakeOpenAI.instances) == 1
+    client = FakeOpenAI.instances[0]
+    # SDK 自带重试关闭，避免与 chat 的退避重试叠加
+    assert client.kwargs['max_retries'] == 0 and client.kwargs['base_url'] == 'http://127.0.0.1:9/v1'
+    assert len(client.calls) == 3 and 'response_format' not in client.calls[0]
+
+
+def test_retry_then_raise(fake_client):
+    client = llm_client.get_client()
+    client.failures = 1
+    assert llm_client.chat([], model='m', max_retries=2, wait_base=0) == '[]'
+    client.failures = 5
+    with pytest.raises(ConnectionError):
+        llm_client.chat([], model='m', max_retries=2, wait_base=0)
+
+
+def test_missing_api_key(monkeypatch):
+    monkeypatch.setattr(llm_client, 'OpenAI', FakeOpenAI)
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.delenv('GRAPHRAG_CHAT_API_KEY', raising=False)
+    llm_client.reset_client()
+    with pytest.raises(RuntimeError):
+        llm_client.get_client()
+
+
+class FakeAsyncCompletions:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('reset')
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{}'))])
+
+
+def test_achat_retries_like_chat():
+    completions = FakeAsyncCompletions(failures=1)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    fmt = {'type': 'json_object'}
+    assert asyncio.run(llm_client.achat(client, [], model='m', response_format=fmt, wait_base=0)) == '{}'
+    assert len(completions.calls) == 2 and completions.calls[0]['response_format'] == fmt
+
+    completions.failures = 5
+    with pytest.raises(ConnectionError):
+        asyncio.run(llm_client.achat(client, [], model='m', max_retries=2, wait_base=0))
+
+
+class RateLimited(Exception):
+    status_code = 429
+    response = SimpleNamespace(status_code=429, headers={'retry-after': '0'})
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def test_chat_retries_rate_limit_but_not_client_errors(fake_client):
+    client = llm_client.get_client()
+    errors = [RateLimited()]
+
+    def create(**kwargs):
+        client.calls.append(kwargs)
+        if errors:
+            raise errors.pop()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='ok'))],
+                               usage=SimpleNamespace(total_tokens=7))
+
+    client.chat.completions.create = create
+    assert llm_client.chat([{'role': 'user', 'content': '老旧小区改造'}], model='m', max_retries=3) == 'ok'
+    assert len(client.calls) == 2 and rate_limiter.get_limiter().stats()['retries'] == 1
+
+    errors.append(BadRequest())
+    with pytest.raises(BadRequest):
+        llm_client.chat([], model='m', max_retries=3, wait_base=0)
+    assert len(client.calls) == 3
@@ -0,0 +1,42 @@
+from near_duplicates import dedup_stats, find_duplicates, jaccard, propagate, shingles
+
+BASE = ('坚持生态优先、绿色发展，统筹推进山水林田湖草沙一体化保护和系统治理，'
+        '加强长江岸线生态修复，建设滨江生态廊道，提升城市韧性与宜居水平。')
+OTHER = ('完善综合交通体系，推进轨道交通与城际铁路建设，优化公交线网布局，'
+         '建设慢行系统，提高公共交通出行分担率，缓解中心城区交通拥堵。')
+
+
+def test_exact_and_near_duplicates_map_to_first_chunk():
+    items = [
+        {'id': 1, 'text': BASE},
+        {'id': 2, 'text': OTHER},
+        {'id': 3, 'text': BASE.replace('，', '， ')},
+        {'id': 4, 'text': BASE.replace('提升', '增强')},
+    ]
+    dups = find_duplicates(items, threshold=0.85)
+    assert dups[3] == (1, 1.0)
+    assert dups[4][0] == 1 and 0.85 <= dups[4][1] < 1.0
+    assert 1 not in dups and 2 not in dups
+
+    st = dedup_stats(len(items), dups)
+    assert st['duplicates'] == 2 and st['exact'] == 1
+    assert st['llm_calls_saved'] == 4
+
+
+def test_threshold_rejects_partial_overlap():
+    half = BASE[:len(BASE) // 2] + OTHER[len(OTHER) // 2:]
+    items = [{'id': 1, 'text': BASE}, {'id': 2, 'text': half}]
+    assert jaccard(shingles(BASE), shingles(half)) < 0.9
+    assert find_duplicates(items, threshold=0.9) == {}
+
+
+def test_propagate_copies_results_with_provenance():
+    results = [
+        {'id': 1, 'entities': {'地点': ['长江']}, 'triplets': [['长江', '修复', '岸线']]},
+        {'id': 2, 'entities': {}, 'triplets': []},
+    ]
+    propagate(results, {2: (1, 0.93)})
+    assert results[1]['triplets'] == [['长江', '修复', '岸线']]
+    assert results[1]['entities'] == {'地点': ['长江']}
+    assert results[1]['duplicate_of'] == 1 and results[1]['similarity'] == 0.93
+    assert 'duplicate_of' not in results[0]
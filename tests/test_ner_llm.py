@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+pytest.importorskip('tqdm')
+import ner_llm  # noqa: E402
+from jsonl_io import read_records, write_records  # noqa: E402
+
+ITEMS = [{'id': i, 'text': f'第{i}片区推进城市更新与滨水空间改造。'} for i in range(1, 21)]
+
+
+def _response(messages):
+    text = messages[-1]['content'].rsplit('\n', 1)[-1]
+    return json.dumps({'Location': [text[:4]], 'Planned activity': ['推进']}, ensure_ascii=False)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    calls = []
+
+    def call_llm(messages, model=None):
+        calls.append(messages[-1]['content'])
+        return _response(messages)
+
+    async def call_llm_async(client, messages, model=None):
+        calls.append(messages[-1]['content'])
+        # 前面的块耗时更长，请求完成顺序与输入顺序相反
+        idx = int(messages[-1]['content'].split('第')[1].split('片区')[0])
+        await asyncio.sleep(0.002 * (len(ITEMS) - idx) + (0.003 if idx % 3 == 0 else 0))
+        return _response(messages)
+
+    @contextlib.asynccontextmanager
+    async def no_client(max_connections=None):
+        yield None
+
+    monkeypatch.setattr(ner_llm, 'call_llm', call_llm)
+    monkeypatch.setattr(ner_llm, 'call_llm_async', call_llm_async)
+    monkeypatch.setattr(ner_llm, 'async_client', no_client)
+    return calls
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.jsonl'])
+def test_concurrent_run_matches_sequential(tmp_path, stub_llm, suffix):
+    src = tmp_path / f'in{suffix}'
+    write_records(str(src), ITEMS)
+    serial, pooled = tmp_path / f'serial{suffix}', tmp_path / f'pooled{suffix}'
+    ner_llm.run(str(src), str(serial), concurrency=1)
+    ner_llm.run(str(src), str(pooled), concurrency=4)
+    assert pooled.read_text(encoding='utf-8') == serial.read_text(encoding='utf-8')
+    assert [r['id'] for r in read_records(str(pooled))] == [it['id'] for it in ITEMS]
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.jsonl'])
+def test_concurrent_resume_completes_partial_output(tmp_path, stub_llm, suffix):
+    src = tmp_path / f'in{suffix}'
+    write_records(str(src), ITEMS)
+    full, out = tmp_path / f'full{suffix}', tmp_path / f'out{suffix}'
+    ner_llm.run(str(src), str(full), concurrency=1)
+    raw = full.read_text(encoding='utf-8')
+    # 模拟中断：输出在某条记录中间被截断
+    out.write_text(raw[:len(raw) // 2], encoding='utf-8')
+    stub_llm.clear()
+    ner_llm.run(str(src), str(out), resume=True, concurrency=4)
+    assert out.read_text(encoding='utf-8') == raw
+    assert 0 < len(stub_llm) < len(ITEMS)
@@ -0,0 +1,79 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+from ordered_pool import async_ordered_map, ordered_map
+
+
+def collect(fn, items, **kwargs):
+    async def main():
+        return [r async for r in async_ordered_map(fn, items, **kwargs)]
+    return asyncio.run(main())
+
+
+def test_results_in_input_order_with_bounded_concurrency():
+    state = {'active': 0, 'peak': 0}
+    delays = [random.Random(i).uniform(0, 0.01) for i in range(40)]
+
+    async def work(i):
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        await asyncio.sleep(delays[i])
+        state['active'] -= 1
+        return i * i
+
+    # 生成器输入：任务按需创建，不预先展开
+    assert collect(work, (i for i in range(40)), concurrency=5) == [i * i for i in range(40)]
+    assert 1 < state['peak'] <= 5
+
+
+def test_error_surfaces_in_order_and_cancels_rest():
+    started = []
+
+    async def work(i):
+        started.append(i)
+        await asyncio.sleep(0.001 * (5 - i % 5))
+        if i == 3:
+            raise ValueError('boom')
+        return i
+
+    async def main():
+        out = []
+        with pytest.raises(ValueError):
+            async for r in async_ordered_map(work, range(100), concurrency=4, window=8):
+                out.append(r)
+        return out
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert len(started) < 100
+
+
+def test_thread_pool_keeps_order_and_overlaps_requests():
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def work(i):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.002 * (i % 4))
+        with lock:
+            state['active'] -= 1
+        return -i
+
+    assert list(ordered_map(work, iter(range(30)), workers=4)) == [-i for i in range(30)]
+    assert 1 < state['peak'] <= 4
+
+
+def test_single_worker_runs_inline():
+    threads = set()
+
+    def work(i):
+        threads.add(threading.get_ident())
+        return i
+
+    assert list(ordered_map(work, range(5), workers=1)) == list(range(5))
+    assert threads == {threading.get_ident()}
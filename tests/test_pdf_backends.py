@@ -0,0 +1,36 @@
+import pytest
+
+from pdf_processing import _resolve_backend, needs_layout
+
+WIDTH = 600
+
+
+def _prose():
+    # 单栏正文：每行一个从左边距到右边距的文本段
+    return [(50, 700 - 20 * k, 550, 712 - 20 * k) for k in range(20)]
+
+
+def _two_columns():
+    left = [(50, 700 - 20 * k, 280, 712 - 20 * k) for k in range(15)]
+    right = [(320, 700 - 20 * k, 550, 712 - 20 * k) for k in range(15)]
+    return left + right + [(150, 740, 450, 755)]  # 跨栏标题
+
+
+def _table():
+    rows = []
+    for k in range(5):
+        y = 400 - 20 * k
+        rows += [(50, y, 120, y + 12), (200, y, 260, y + 12), (340, y, 400, y + 12), (480, y, 540, y + 12)]
+    return _prose()[:5] + rows
+
+
+def test_layout_detection():
+    assert not needs_layout(_prose(), WIDTH)
+    assert needs_layout(_two_columns(), WIDTH)
+    assert needs_layout(_table(), WIDTH)
+    assert not needs_layout(_table()[:3], WIDTH)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        _resolve_backend('ocr')
@@ -0,0 +1,70 @@
+import pytest
+
+from pdf_page_cache import PageCache, page_hashes
+from pdf_processing import process_pdf
+
+PAGE_LINES = [
+    ['Urban renewal plan.', '12', 'The plan covers the old town.'],
+    ['Page 3', 'Public facilities are upgraded!', 'Riverside space is restored.'],
+]
+
+
+def _write_pdf(path, pages):
+    # 手工拼一个最小的文本 PDF：每页一个内容流，Helvetica 逐行输出
+    objs = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        ops = ' '.join(f'({ln}) Tj 0 -20 Td' for ln in lines)
+        stream = f'BT /F1 12 Tf 72 720 Td {ops} ET'
+        objs.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objs.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                    f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objs)} 0 R >>')
+        kids.append(f'{len(objs)} 0 R')
+    objs[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+    out, offsets = '%PDF-1.4\n', []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f'{i} 0 obj\n{body}\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objs) + 1}\n0000000000 65535 f \n' + ''.join(f'{o:010d} 00000 n \n' for o in offsets)
+    out += f'trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'
+    path.write_bytes(out.encode('latin-1'))
+
+
+def test_reused_and_extracted_counters(tmp_path):
+    path = str(tmp_path / 'pages.sqlite')
+    with PageCache(path) as cache:
+        assert cache.get_many(['a', 'b']) == {}
+        cache.put_many([('a', '第一页'), ('b', '第二页')])
+    # 改版后只有第二页变化
+    with PageCache(path) as cache:
+        found = cache.get_many(['a', 'b2'])
+        assert found == {'a': '第一页'}
+        cache.put_many([('b2', '第二页（修订）')])
+        assert cache.stats() == {'reused': 1, 'extracted': 1, 'evictions': 0, 'entries': 3,
+                                 'bytes': len('第一页第二页第二页（修订）'.encode('utf-8'))}
+
+
+def test_eviction_keeps_size_bounded(tmp_path):
+    with PageCache(str(tmp_path / 'pages.sqlite'), max_bytes=100) as cache:
+        cache.put_many([(f'k{i}', 'x' * 30) for i in range(10)])
+        st = cache.stats()
+        assert st['bytes'] <= 100 and st['evictions'] == 10 - st['entries']
+        assert cache.get('k9') == 'x' * 30 and cache.get('k0') is None
+
+
+def test_process_pdf_twice_reuses_pages(tmp_path):
+    pytest.importorskip('pdfplumber')
+    pdf = tmp_path / 'plan.pdf'
+    _write_pdf(pdf, PAGE_LINES)
+    plain = process_pdf(str(pdf), str(tmp_path / 'plain.json'), max_tokens=40)
+    n_pages = len(page_hashes(str(pdf)))
+    with PageCache(str(tmp_path / 'pages.sqlite')) as cache:
+        first = process_pdf(str(pdf), str(tmp_path / 'a.json'), max_tokens=40, page_cache=cache)
+        second = process_pdf(str(pdf), str(tmp_path / 'b.json'), max_tokens=40, page_cache=cache)
+        st = cache.stats()
+        # 缓存的是未清洗的原始页文本，与不启用缓存时的提取结果相同
+        assert cache.get(page_hashes(str(pdf))[1]).startswith('Page 3')
+    assert first == second == plain and plain
+    assert (tmp_path / 'a.json').read_text(encoding='utf-8') == (tmp_path / 'b.json').read_text(encoding='utf-8')
+    assert n_pages == 2 and st['extracted'] == n_pages and st['reused'] == n_pages
@@ -0,0 +1,69 @@
+from pdf_processing import (MAX_SENTENCE_CHARS, chunk_sentences, clean_text, iter_chunks, iter_clean_sentences,
+                            iter_packed_chunks, iter_text_blocks, pack_chunks, process_text_file,
+                            process_text_file_stream, split_long_sentence, split_sentences)
+from tokenizer_service import count_tokens
+
+
+PAGES = [
+    '城市更新规划\n12\n第一章 总则。本规划适用于中心城区，',
+    '包括老城与新区。\nPage 3\n规划期限为2021-2035年！',
+    '',
+    '近期重点推进滨水空间改造',
+    '与公共服务设施建设。',
+]
+
+
+def test_stream_matches_whole_document_chunking():
+    whole = split_sentences(clean_text('\n'.join(PAGES)))
+    streamed = list(iter_clean_sentences(PAGES))
+    assert streamed == whole
+    assert list(iter_chunks(iter(streamed), max_tokens=20, count_batch=2)) == chunk_sentences(whole, max_tokens=20)
+
+
+def test_overlap_stream_matches_batch_and_reports_overlap_chars():
+    sents = [f'第{i}条规划推进城市更新。' for i in range(30)]
+    packed = pack_chunks(sents, max_tokens=40, overlap_sentences=1)
+    assert list(iter_packed_chunks(iter(sents), max_tokens=40, count_batch=4, overlap_sentences=1)) == packed
+    for (prev, _), (cur, ov) in zip(packed, packed[1:]):
+        assert ov > 0 and prev.endswith(cur[:ov])
+
+
+def test_oversized_sentence_split_at_clauses():
+    sent = '，'.join(['推进老旧小区改造与公共服务设施补短板'] * 20) + '。'
+    parts = split_long_sentence(sent, max_tokens=50)
+    assert ''.join(parts) == sent and len(parts) > 1
+    assert all(count_tokens(p) <= 50 for p in parts)
+    assert all(p.endswith(('，', '。')) for p in parts)
+    assert all(count_tokens(c) <= 50 for c in chunk_sentences([sent], max_tokens=50))
+
+
+def test_mmap_text_stream_matches_process_text_file(tmp_path):
+    src = tmp_path / 'dump.txt'
+    src.write_text('\n'.join(PAGES * 20), encoding='utf-8')
+    whole, streamed = tmp_path / 'a.json', tmp_path / 'b.json'
+    items = process_text_file(str(src), str(whole), max_tokens=40)
+    # 窗口 5 字节：多字节汉字与句子都会跨窗口边界
+    assert process_text_file_stream(str(src), str(streamed), max_tokens=40, window_bytes=5) == len(items)
+    assert streamed.read_text(encoding='utf-8') == whole.read_text(encoding='utf-8')
+
+
+def test_text_blocks_bounded_without_newlines(tmp_path):
+    src = tmp_path / 'oneline.txt'
+    raw = '推进城市更新与公共服务设施建设。' * 2000
+    src.write_text(raw, encoding='utf-8')
+    blocks = list(iter_text_blocks(str(src), window_bytes=64))
+    assert len(blocks) > 1 and max(map(len, blocks)) <= 64 * 3
+    assert ''.join(blocks) == clean_text(raw)
+    whole, streamed = tmp_path / 'a.json', tmp_path / 'b.json'
+    process_text_file(str(src), str(whole), max_tokens=40)
+    process_text_file_stream(str(src), str(streamed), max_tokens=40, window_bytes=64)
+    assert streamed.read_text(encoding='utf-8') == whole.read_text(encoding='utf-8')
+
+
+def test_text_blocks_force_cut_without_terminators(tmp_path):
+    src = tmp_path / 'noterm.txt'
+    raw = 'Page 3 目录' + '规划' * 100 + '\n' + '城市更新' * (MAX_SENTENCE_CHARS // 2)
+    src.write_text(raw, encoding='utf-8')
+    blocks = list(iter_text_blocks(str(src), window_bytes=64))
+    assert len(blocks) > 1 and max(map(len, blocks)) <= MAX_SENTENCE_CHARS + 64 * 2
+    assert ''.join(blocks) == clean_text(raw)
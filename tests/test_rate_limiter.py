@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limiter import RateLimiter, is_retryable, parse_duration, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f'HTTP {status}')
+        self.status_code = status
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_request_bucket_waits_for_refill(clock):
+    limiter = RateLimiter(rpm=60, clock=clock)
+    assert all(limiter.acquire() == 0 for _ in range(60))
+    # 第 61 个请求需要等 1 秒补充，第 62 个再排 1 秒
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert limiter.acquire() == pytest.approx(2.0)
+    clock.now += 2
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert limiter.stats()['throttled'] == 3
+
+
+def test_token_bucket_settles_actual_usage(clock):
+    limiter = RateLimiter(tpm=1200, clock=clock)  # 每秒补充 20 token
+    assert limiter.acquire(1000) == 0
+    assert limiter.acquire(1000) == pytest.approx(800 / 20)
+    # 两次请求实际各用 200 token，退回的预占额度让下一个请求无需等待
+    limiter.settle(1000, 200)
+    limiter.settle(1000, 200)
+    assert limiter.acquire(700) == 0
+    limiter.settle(700, None)
+    assert limiter.tokens.level == pytest.approx(1200 - 400 - 700)
+
+
+def test_headers_create_buckets_and_pause_on_exhaustion(clock):
+    limiter = RateLimiter(clock=clock)
+    assert limiter.acquire(10 ** 6) == 0
+    limiter.observe({'x-ratelimit-limit-requests': '500', 'x-ratelimit-remaining-requests': '0',
+                     'x-ratelimit-reset-requests': '2s', 'x-ratelimit-limit-tokens': '30000',
+                     'x-ratelimit-remaining-tokens': '29000', 'x-ratelimit-reset-tokens': '6m0s'})
+    assert limiter.requests.capacity == 500 and limiter.tokens.level == 29000
+    assert limiter.acquire(100) == pytest.approx(2.0)
+    clock.now += 2
+    assert limiter.acquire(100) == 0
+
+
+def test_retry_only_on_429_5xx_and_transport_errors(clock):
+    limiter = RateLimiter(clock=clock, jitter=lambda: 1.0)
+    assert limiter.retry_delay(HTTPError(400), 1) is None
+    assert limiter.retry_delay(ValueError('bad json'), 1) is None
+    assert limiter.retry_delay(HTTPError(503), 3, wait_base=0.5) == pytest.approx(2.0)
+    assert limiter.retry_delay(ConnectionError('reset'), 1) == pytest.approx(1.0)
+    assert limiter.acquire() == 0
+
+    # 429 的 Retry-After 对所有调用方生效
+    assert limiter.retry_delay(HTTPError(429, {'retry-after-ms': '1500'}), 1) == pytest.approx(1.5)
+    assert limiter.acquire() == pytest.approx(1.5)
+
+
+def test_jittered_backoff_bounds(clock):
+    low = RateLimiter(clock=clock, jitter=lambda: 0.0).retry_delay(HTTPError(500), 2)
+    high = RateLimiter(clock=clock, jitter=lambda: 1.0, max_backoff=1.5).retry_delay(HTTPError(500), 2)
+    assert low == pytest.approx(1.0) and high == pytest.approx(1.5)
+
+
+def test_parsers():
+    assert parse_duration('6m0s') == 360
+    assert parse_duration('20ms') == pytest.approx(0.02)
+    assert parse_duration('1.5s') == 1.5
+    assert parse_duration('soon') is None
+    assert parse_retry_after({'retry-after': '3'}) == 3
+    assert parse_retry_after({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}, now=1445412470) == 10
+    assert parse_retry_after({}) is None
+    assert is_retryable(HTTPError(502)) and not is_retryable(HTTPError(401))
@@ -0,0 +1,49 @@
+from rule_relations import extract_triplets
+from syntax_format import to_compact
+
+
+def _tok(i, text, pos, dep, head):
+    return {'text': text, 'lemma': text, 'pos': pos, 'tag': '', 'dep': dep, 'i': i, 'head_i': head, 'head_text': ''}
+
+
+# 政府 加强 建设 城市 基础设施 和 公园 。
+SVO = {'tokens': [
+    _tok(0, '政府', 'NOUN', 'nsubj', 1),
+    _tok(1, '加强', 'VERB', 'ROOT', 1),
+    _tok(2, '城市', 'NOUN', 'compound:nn', 3),
+    _tok(3, '基础设施', 'NOUN', 'dobj', 1),
+    _tok(4, '和', 'CCONJ', 'cc', 5),
+    _tok(5, '公园', 'NOUN', 'conj', 3),
+    _tok(6, '。', 'PUNCT', 'punct', 1),
+]}
+
+# 规划 团队 决定 调整 方案
+XCOMP = {'tokens': [
+    _tok(0, '规划', 'NOUN', 'compound:nn', 1),
+    _tok(1, '团队', 'NOUN', 'nsubj', 2),
+    _tok(2, '决定', 'VERB', 'ROOT', 2),
+    _tok(3, '调整', 'VERB', 'ccomp', 2),
+    _tok(4, '方案', 'NOUN', 'dobj', 3),
+]}
+
+# 中国馆 是 场馆
+COPULA = {'tokens': [
+    _tok(0, '中国馆', 'PROPN', 'nsubj', 2),
+    _tok(1, '是', 'AUX', 'cop', 2),
+    _tok(2, '场馆', 'NOUN', 'ROOT', 2),
+]}
+
+
+def test_svo_with_compound_and_conj_objects():
+    assert extract_triplets(SVO) == [['政府', '加强', '城市基础设施'], ['政府', '加强', '公园']]
+
+
+def test_complement_verb_inherits_subject():
+    assert extract_triplets(XCOMP) == [['规划团队', '调整', '方案']]
+
+
+def test_copula_and_compact_and_sentence_scope():
+    assert extract_triplets(to_compact(COPULA)) == [['中国馆', '是', '场馆']]
+    wrapped = {'scope': 'sentence', 'sentences': [{'text': 'a', 'syntax': SVO}, {'text': 'b', 'syntax': COPULA}]}
+    assert len(extract_triplets(wrapped)) == 3
+    assert extract_triplets({'tokens': []}) == []
@@ -26,3 +26,38 @@ def test_simple_sentence_structure():
     # dep_triples exists and basic shape
     assert 'dep_triples' in res and isinstance(res['dep_triples'], list)
     assert all(set(['head_i','head_text','dep','child_i','child_text']).issubset(t.keys()) for t in res['dep_triples'])
+
+
+def test_model_registry_reuses_loaded_model():
+    pytest.importorskip('spacy')
+    from spacy_nlp import get_nlp, release, loaded_models
+    try:
+        nlp = get_nlp()
+    except RuntimeError as err:
+        pytest.skip(f'spaCy 中文模型不可用: {err}')
+    assert get_nlp() is nlp
+    assert ('', (), ()) in loaded_models()
+    assert release() >= 1
+    assert loaded_models() == []
+
+
+def test_fast_profile_excludes_ner():
+    from spacy_nlp import get_nlp, resolve_profile
+    model, exclude = resolve_profile(profile='fast')
+    assert 'ner' in exclude
+    pytest.importorskip('spacy')
+    try:
+        nlp = get_nlp(profile='fast')
+    except RuntimeError as err:
+        pytest.skip(f'spaCy 模型 {model} 不可用: {err}')
+    assert 'ner' not in nlp.pipe_names
+    res = analyze_sentence_syntax('政府加强建设城市基础设施。', profile='fast')
+    assert res['tokens'] and res['dep_triples']
+
+
+def test_profile_never_falls_back_to_another_model():
+    from spacy_nlp import DEFAULT_MODEL_CANDIDATES, _model_candidates, model_identity, resolve_profile
+    assert _model_candidates(resolve_profile(profile='fast')[0]) == ('zh_core_web_sm',)
+    assert _model_candidates(None) == DEFAULT_MODEL_CANDIDATES
+    # 缓存键同样只按 profile 的模型计算，不会记成回退加载的其他模型
+    assert model_identity(profile='fast').startswith('zh_core_web_sm@')
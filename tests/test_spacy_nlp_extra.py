@@ -1,3 +1,5 @@
+import pytest
+
 from spacy_nlp import analyze_sentence_syntax
 
 
@@ -26,3 +28,17 @@ def test_special_characters():
     # parentheses and hyphen-like characters should be tokenized or present
     assert any(ch in texts for ch in ['(', ')', '-', '—']) or any('ISO' in t for t in texts)
     assert res['dep_triples']
+
+
+def test_analyze_many_matches_single_calls():
+    pytest.importorskip('spacy')
+    from spacy_nlp import analyze_many, get_nlp
+    try:
+        get_nlp()
+    except RuntimeError as err:
+        pytest.skip(f'spaCy 中文模型不可用: {err}')
+    texts = ['政府加强建设城市基础设施。', '', '项目A、项目B和项目C，均需完成。']
+    results = list(analyze_many(iter(texts), batch_size=2))
+    assert len(results) == len(texts)
+    for text, res in zip(texts, results):
+        assert res == analyze_sentence_syntax(text)
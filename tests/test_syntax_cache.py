@@ -0,0 +1,49 @@
+from spacy_nlp import analyze_many, analyze_sentence_syntax, model_identity
+from syntax_cache import SyntaxCache, make_key
+
+
+SAMPLE = {'tokens': [{'text': '政府', 'lemma': '政府', 'pos': 'NOUN', 'tag': 'NN', 'dep': 'nsubj',
+                      'i': 0, 'head_i': 1, 'head_text': '加强'}],
+          'dep': '政府(nsubj)', 'con_pos': '政府(NOUN)', 'dep_triples': []}
+
+
+def test_put_get_and_counters(tmp_path):
+    cache = SyntaxCache(str(tmp_path / 'c.sqlite'))
+    assert cache.get('政府加强建设。', 'm@1') is None
+    cache.put('政府加强建设。', 'm@1', SAMPLE)
+    assert cache.get('政府加强建设。\r\n', 'm@1') == SAMPLE
+    assert cache.get('政府加强建设。', 'm@2') is None
+    st = cache.stats()
+    assert (st['hits'], st['misses'], st['entries']) == (1, 2, 1)
+    cache.close()
+
+
+def test_key_depends_on_model_and_text():
+    assert make_key('a', 'm@1') != make_key('a', 'm@2')
+    assert make_key('a', 'm@1') != make_key('b', 'm@1')
+
+
+def test_size_based_eviction_drops_oldest(tmp_path):
+    cache = SyntaxCache(str(tmp_path / 'c.sqlite'), max_bytes=600)
+    for i in range(10):
+        cache.put(f'句子{i}', 'm@1', SAMPLE)
+    st = cache.stats()
+    assert st['bytes'] <= 600
+    assert st['evictions'] > 0
+    assert cache.get('句子9', 'm@1') == SAMPLE
+    assert cache.get('句子0', 'm@1') is None
+    cache.close()
+
+
+def test_full_cache_hits_skip_spacy(tmp_path):
+    cache = SyntaxCache(str(tmp_path / 'c.sqlite'))
+    model_id = model_identity('zh_core_web_sm')
+    texts = ['政府加强建设。', '', '城市更新。']
+    for t in texts:
+        if t:
+            cache.put(t, model_id, SAMPLE)
+    results = list(analyze_many(texts, model_name='zh_core_web_sm', cache=cache))
+    assert results[0] == SAMPLE and results[2] == SAMPLE
+    assert results[1]['tokens'] == []
+    assert analyze_sentence_syntax('城市更新。', model_name='zh_core_web_sm', cache=cache) == SAMPLE
+    cache.close()
@@ -0,0 +1,39 @@
+from prompt_builder import build_core_prompt
+from syntax_format import is_compact, syntax_strings, to_compact, to_full
+
+
+FULL = {
+    'tokens': [
+        {'text': '政府', 'lemma': '政府', 'pos': 'NOUN', 'tag': 'NN', 'dep': 'nsubj', 'i': 0, 'head_i': 1, 'head_text': '加强'},
+        {'text': '加强', 'lemma': '加强', 'pos': 'VERB', 'tag': 'VV', 'dep': 'ROOT', 'i': 1, 'head_i': 1, 'head_text': '加强'},
+        {'text': '建设', 'lemma': '建设', 'pos': 'NOUN', 'tag': 'NN', 'dep': 'dobj', 'i': 2, 'head_i': 1, 'head_text': '加强'},
+    ],
+    'dep': '政府(nsubj) -> 加强(ROOT) -> 建设(dobj)',
+    'con_pos': '政府(NOUN) 加强(VERB) 建设(NOUN)',
+    'dep_triples': [
+        {'head_i': 1, 'head_text': '加强', 'dep': 'nsubj', 'child_i': 0, 'child_text': '政府'},
+        {'head_i': 1, 'head_text': '加强', 'dep': 'ROOT', 'child_i': 1, 'child_text': '加强'},
+        {'head_i': 1, 'head_text': '加强', 'dep': 'dobj', 'child_i': 2, 'child_text': '建设'},
+    ],
+}
+
+
+def test_round_trip_is_lossless():
+    compact = to_compact(FULL)
+    assert is_compact(compact)
+    assert compact['labels']['pos'] == ['NOUN', 'VERB']
+    assert 'lemma' not in compact and 'i' not in compact
+    assert to_full(compact) == FULL
+
+
+def test_non_contiguous_token_ids_are_kept():
+    full = {'tokens': [dict(FULL['tokens'][0], i=0, head_i=2), dict(FULL['tokens'][1], i=2, head_i=2)]}
+    compact = to_compact(full)
+    assert compact['i'] == [0, 2]
+    assert [t['head_text'] for t in to_full(compact)['tokens']] == ['加强', '加强']
+
+
+def test_prompt_reads_compact_syntax():
+    compact = to_compact(FULL)
+    assert syntax_strings(compact) == (FULL['dep'], FULL['con_pos'])
+    assert build_core_prompt('s', 'p', compact, ['城市更新']) == build_core_prompt('s', 'p', FULL, ['城市更新'])
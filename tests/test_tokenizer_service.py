@@ -0,0 +1,45 @@
+import random
+
+from tokenizer_service import (chunk_boundaries, count_tokens_batch, estimate_tokens_fast, pack_boundaries,
+                               prefix_sums)
+
+
+def _greedy(counts, max_tokens):
+    out, start, cur = [], 0, 0
+    for i, t in enumerate(counts):
+        if i > start and cur + t > max_tokens:
+            out.append((start, i))
+            start, cur = i, 0
+        cur += t
+    if start < len(counts):
+        out.append((start, len(counts)))
+    return out
+
+
+def test_boundaries_match_greedy_reference():
+    rng = random.Random(0)
+    for _ in range(200):
+        counts = [rng.randint(0, 60) for _ in range(rng.randint(0, 40))]
+        max_tokens = rng.randint(1, 120)
+        assert chunk_boundaries(counts, max_tokens) == _greedy(counts, max_tokens)
+
+
+def test_prefix_sums_and_oversized_sentence():
+    assert prefix_sums([3, 4, 5]) == [0, 3, 7, 12]
+    assert chunk_boundaries([10, 600, 10], 512) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_pack_boundaries_overlap():
+    counts = [10] * 10
+    assert pack_boundaries(counts, 30) == chunk_boundaries(counts, 30)
+    assert pack_boundaries(counts, 30, overlap_sentences=1) == [(0, 3), (2, 5), (4, 7), (6, 9), (8, 10)]
+    # 回退不超过 15 tokens，只能重叠 1 句
+    assert pack_boundaries(counts, 30, overlap_tokens=15) == pack_boundaries(counts, 30, overlap_sentences=1)
+    # 重叠部分放不下下一句时逐句减少
+    assert pack_boundaries([10, 10, 10, 15], 30, overlap_sentences=2) == [(0, 3), (2, 4)]
+
+
+def test_estimator_weights_cjk_above_ascii():
+    assert estimate_tokens_fast('城市更新规划') > estimate_tokens_fast('urban plan')
+    assert estimate_tokens_fast('') == 1
+    assert len(count_tokens_batch(['城市。', 'plan'])) == 2
@@ -0,0 +1,164 @@
+"""分块使用的 token 计数服务
+
+  - 编码器按名称缓存，整个进程只调用一次 `tiktoken.get_encoding`
+  - `count_tokens_batch` 用一次 `encode_ordinary_batch` 计数整篇文档的全部句子
+  - `chunk_boundaries` 在前缀和上二分查找块边界，结果与逐句贪心累加完全一致
+  - `pack_boundaries` 在此基础上让相邻块按句数或 token 数重叠，跨块边界的关系不会丢失
+  - 未安装 tiktoken 时使用按字符类别校准的快速估算（中日韩字符、ASCII 词字符、其他符号分别计费），
+    可用 `calibrate` 在有 tiktoken 的机器上按样本重新拟合系数
+
+用法示例:
+    from tokenizer_service import count_tokens_batch, chunk_boundaries
+    counts = count_tokens_batch(sentences)
+    for start, end in chunk_boundaries(counts, max_tokens=512):
+        chunk = ''.join(sentences[start:end])
+"""
+import bisect
+import itertools
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+DEFAULT_ENCODING = 'cl100k_base'
+
+# cl100k_base 上的经验系数：常用汉字大多 1 个 token，生僻字按 UTF-8 字节拆成 2~3 个；
+# 英文/数字约 4 字符 1 个 token；标点与其他符号约 1 字符 1 个 token；空白并入相邻 token
+ESTIMATOR_COEFFS = {'cjk': 1.2, 'word': 0.25, 'other': 0.8}
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]')
+_WORD_RE = re.compile(r'[A-Za-z0-9_]')
+_SPACE_RE = re.compile(r'\s')
+
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = DEFAULT_ENCODING):
+    """返回缓存的 tiktoken 编码器；tiktoken 不可用或加载失败时返回 None。"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def _char_classes(text: str) -> Tuple[int, int, int]:
+    cjk = len(_CJK_RE.findall(text))
+    word = len(_WORD_RE.findall(text))
+    other = len(text) - cjk - word - len(_SPACE_RE.findall(text))
+    return cjk, word, other
+
+
+def estimate_tokens_fast(text: str, coeffs: Optional[Dict[str, float]] = None) -> int:
+    """不依赖 tiktoken 的 token 数估算。"""
+    c = coeffs or ESTIMATOR_COEFFS
+    cjk, word, other = _char_classes(text)
+    return max(1, round(cjk * c['cjk'] + word * c['word'] + other * c['other']))
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    return count_tokens_batch([text], encoding)[0]
+
+
+def count_tokens_batch(texts: Sequence[str], encoding: str = DEFAULT_ENCODING) -> List[int]:
+    """一次调用计数多段文本；有 tiktoken 时走 encode_ordinary_batch，否则逐段估算。"""
+    enc = get_encoder(encoding)
+    if enc is not None and texts:
+        try:
+            return [len(ids) for ids in enc.encode_ordinary_batch(list(texts))]
+        except Exception:
+            pass
+    return [estimate_tokens_fast(t) for t in texts]
+
+
+def prefix_sums(counts: Iterable[int]) -> List[int]:
+    """[c0, c1, ...] -> [0, c0, c0+c1, ...]"""
+    return list(itertools.accumulate(counts, initial=0))
+
+
+def chunk_boundaries(counts: Sequence[int], max_tokens: int = 512) -> List[Tuple[int, int]]:
+    """按 token 上限贪心切块，返回 [(start, end), ...] 句子下标区间。
+
+    与逐句累加的贪心写法等价：块内至少一句；单句超过上限时独占一块。
+    """
+    prefix = prefix_sums(counts)
+    n = len(counts)
+    out = []
+    start = 0
+    while start < n:
+        end = bisect.bisect_right(prefix, prefix[start] + max_tokens, lo=start + 1) - 1
+        end = max(end, start + 1)
+        out.append((start, end))
+        start = end
+    return out
+
+
+def _overlap_start(prefix: List[int], start: int, end: int, overlap_sentences: int, overlap_tokens: int) -> int:
+    # 句数与 token 数两个限制同时给出时取更严格（回退更少）的一个
+    nxt = start
+    if overlap_sentences:
+        nxt = max(nxt, end - overlap_sentences)
+    if overlap_tokens:
+        nxt = max(nxt, bisect.bisect_left(prefix, prefix[end] - overlap_tokens, lo=start, hi=end))
+    return max(nxt, start + 1)
+
+
+def pack_boundaries(counts: Sequence[int], max_tokens: int = 512,
+                    overlap_sentences: int = 0, overlap_tokens: int = 0) -> List[Tuple[int, int]]:
+    """按 token 上限切块并让相邻块重叠，返回 [(start, end), ...]；start 小于上一块的 end 即为重叠部分。
+
+    下一块从上一块末尾回退 overlap_sentences 句，或回退总计不超过 overlap_tokens 的整句；
+    回退后放不下下一句时逐句减少重叠，保证每块都有新内容且不超过上限（单句超限时除外）。
+    两个参数都为 0 时与 chunk_boundaries 相同。
+    """
+    if not overlap_sentences and not overlap_tokens:
+        return chunk_boundaries(counts, max_tokens)
+    prefix = prefix_sums(counts)
+    n = len(counts)
+    out = []
+    start = 0
+    while start < n:
+        end = bisect.bisect_right(prefix, prefix[start] + max_tokens, lo=start + 1) - 1
+        end = max(end, start + 1)
+        out.append((start, end))
+        if end >= n:
+            break
+        nxt = _overlap_start(prefix, start, end, overlap_sentences, overlap_tokens)
+        # 重叠部分 + 下一句必须放得下，否则从前往后逐句减少重叠
+        start = bisect.bisect_left(prefix, prefix[end + 1] - max_tokens, lo=nxt, hi=end)
+    return out
+
+
+def calibrate(samples: Sequence[str], encoding: str = DEFAULT_ENCODING) -> Dict[str, float]:
+    """用真实编码器对样本计数，最小二乘拟合估算系数（需要 tiktoken）。
+
+    返回的字典可直接赋给 ESTIMATOR_COEFFS 或传给 estimate_tokens_fast。
+    """
+    enc = get_encoder(encoding)
+    if enc is None:
+        raise RuntimeError('calibrate 需要安装 tiktoken')
+    rows = [_char_classes(s) for s in samples]
+    ys = [len(ids) for ids in enc.encode_ordinary_batch(list(samples))]
+    # 3x3 正规方程 (X^T X) b = X^T y，按 Cramer 法则求解，避免引入 numpy
+    xtx = [[sum(r[i] * r[j] for r in rows) for j in range(3)] for i in range(3)]
+    xty = [sum(r[i] * y for r, y in zip(rows, ys)) for i in range(3)]
+
+    def det(m):
+        return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+                - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+
+    d = det(xtx)
+    if abs(d) < 1e-9:
+        raise ValueError('样本需同时包含中日韩字符、ASCII 词字符与其他符号')
+    coeffs = []
+    for k in range(3):
+        m = [row[:] for row in xtx]
+        for i in range(3):
+            m[i][k] = xty[i]
+        coeffs.append(det(m) / d)
+    return dict(zip(('cjk', 'word', 'other'), coeffs))